@@ -0,0 +1,271 @@
+"""
+Адаптивный лимит одновременных запросов по схеме AIMD (additive increase, multiplicative decrease).
+
+Пока ответы приходят без ошибок и задержка в норме, лимит растет на 1 за каждое "окно"
+успешных запросов (как окно перегрузки TCP). На таймаутах, 429/5xx или росте задержки
+лимит уменьшается в decrease_factor раз, но не чаще одного раза за время ответа.
+"""
+
+import asyncio
+import collections
+import contextlib
+import time
+import typing
+
+import aiohttp
+
+# Статусы, означающие, что upstream перегружен
+OVERLOAD_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """
+    Проверяет, означает ли исключение перегрузку upstream: таймаут или статус из OVERLOAD_STATUSES.
+
+    :param error: Исключение, возникшее при запросе.
+    """
+
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    return (
+        isinstance(error, aiohttp.ClientResponseError)
+        and error.status in OVERLOAD_STATUSES
+    )
+
+
+class AIMDLimiter:
+    """
+    Лимит одновременных запросов, подстраивающийся под состояние upstream.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 5,
+        min_limit: int = 1,
+        max_limit: int = 100,
+        decrease_factor: float = 0.5,
+        latency_threshold: typing.Optional[float] = None,
+        ewma_alpha: float = 0.2,
+    ):
+        """
+        :param initial_limit: Начальный лимит.
+        :param min_limit: Минимальный лимит.
+        :param max_limit: Максимальный лимит.
+        :param decrease_factor: Множитель лимита при перегрузке.
+        :param latency_threshold: Задержка (с), выше которой успешный ответ тоже считается перегрузкой.
+        :param ewma_alpha: Вес нового наблюдения в экспоненциальном среднем задержки.
+        """
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_threshold = latency_threshold
+        self.ewma_alpha = ewma_alpha
+
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._latency_ewma: typing.Optional[float] = None
+        self._last_decrease = 0.0
+        self._waiters: collections.deque[asyncio.Future] = collections.deque()
+
+    @property
+    def limit(self) -> int:
+        """
+        Текущий лимит одновременных запросов.
+        """
+
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Количество запросов в обработке.
+        """
+
+        return self._in_flight
+
+    @property
+    def latency_ewma(self) -> typing.Optional[float]:
+        """
+        Экспоненциальное скользящее среднее задержки успешных запросов в секундах.
+        """
+
+        return self._latency_ewma
+
+    async def acquire(self) -> None:
+        """
+        Ждет, пока число запросов в обработке станет меньше текущего лимита, и занимает слот.
+        """
+
+        while self._in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with contextlib.suppress(ValueError):
+                    self._waiters.remove(waiter)
+                raise
+
+        self._in_flight += 1
+
+    def release(self, latency: float, overloaded: bool = False) -> None:
+        """
+        Освобождает слот и подстраивает лимит по результату запроса.
+
+        :param latency: Длительность запроса в секундах.
+        :param overloaded: Запрос завершился признаком перегрузки (таймаут, 429/5xx).
+        """
+
+        self._in_flight -= 1
+
+        if not overloaded:
+            self._latency_ewma = (
+                latency
+                if self._latency_ewma is None
+                else self.ewma_alpha * latency
+                + (1 - self.ewma_alpha) * self._latency_ewma
+            )
+            overloaded = (
+                self.latency_threshold is not None
+                and self._latency_ewma > self.latency_threshold
+            )
+
+        if overloaded:
+            self._decrease()
+        elif self._in_flight + 1 >= self.limit:
+            # Растем, только если лимит действительно был узким местом
+            self._limit = min(self._limit + 1 / self._limit, float(self.max_limit))
+
+        self._wakeup()
+
+    def _decrease(self) -> None:
+        """
+        Уменьшает лимит не чаще одного раза за среднее время ответа:
+        ответы на запросы, отправленные до снижения, не должны снижать его повторно.
+        """
+
+        now = time.monotonic()
+
+        if now - self._last_decrease < (self._latency_ewma or 0.0):
+            return
+
+        self._last_decrease = now
+        self._limit = max(self._limit * self.decrease_factor, float(self.min_limit))
+
+    def _wakeup(self) -> None:
+        """
+        Будит столько ожидающих, сколько слотов освободилось при текущем лимите.
+        """
+
+        free = self.limit - self._in_flight
+
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> typing.AsyncIterator[None]:
+        """
+        Занимает слот на время запроса и сообщает лимитеру его длительность и исход.
+        Исключения is_overload_error снижают лимит, остальные исключения пробрасываются без снижения.
+        """
+
+        await self.acquire()
+        start = time.perf_counter()
+        overloaded = False
+
+        try:
+            yield
+        except BaseException as e:
+            overloaded = is_overload_error(e)
+            raise
+        finally:
+            self.release(time.perf_counter() - start, overloaded)
+
+
+async def _run_load(
+    session: aiohttp.ClientSession,
+    url: str,
+    total: int,
+    workers: int,
+    limiter: typing.Optional[AIMDLimiter],
+) -> dict:
+    """
+    Выполняет total запросов пулом из workers воркеров, опционально через лимитер.
+    """
+
+    remaining = iter(range(total))
+    errors = 0
+    limits = []
+
+    async def worker() -> None:
+        nonlocal errors
+
+        for _ in remaining:
+            try:
+                async with limiter.slot() if limiter else contextlib.nullcontext():
+                    async with session.get(url, raise_for_status=True) as response:
+                        await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                errors += 1
+
+            if limiter:
+                limits.append(limiter.limit)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        # Успешные ответы в секунду: быстрые 503 не должны выглядеть как пропускная способность
+        "ok_rps": round((total - errors) / elapsed, 1),
+        "errors": errors,
+        "limit_avg": round(sum(limits) / len(limits), 1) if limits else workers,
+        "latency_ewma_ms": round((limiter.latency_ewma or 0) * 1000, 1)
+        if limiter
+        else None,
+    }
+
+
+async def performance_comparison(total: int = 3000, capacity: int = 20) -> dict:
+    """
+    Сравнивает фиксированные лимиты и AIMD на локальном сервере, который деградирует
+    при числе одновременных запросов больше capacity и отвечает 503 при двукратной перегрузке.
+
+    :param total: Количество запросов на вариант.
+    :param capacity: Емкость сервера без деградации.
+    """
+
+    from src.asyncio_tasks.local_servers import degrading_app, start_app
+
+    runner = await start_app(degrading_app(capacity), 8784)
+    url = "http://127.0.0.1:8784/item"
+    variants = {
+        "fixed_5": (5, None),
+        "fixed_60": (60, None),
+        "aimd": (100, AIMDLimiter(initial_limit=5, max_limit=100)),
+    }
+    results = {}
+
+    try:
+        async with aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=0)
+        ) as session:
+            for name, (workers, limiter) in variants.items():
+                results[name] = await _run_load(session, url, total, workers, limiter)
+    finally:
+        await runner.cleanup()
+
+    for name, stats in results.items():
+        print(f"{name}: {stats}")
+
+    return results
+
+
+if __name__ == "__main__":
+    asyncio.run(performance_comparison())
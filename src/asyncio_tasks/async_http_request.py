@@ -6,39 +6,82 @@
 
 import asyncio
 import json
+import typing
 
+import aiofiles
 import aiohttp
 
+from src.asyncio_tasks.adaptive_limiter import OVERLOAD_STATUSES
+from src.asyncio_tasks.host_scheduling import HostLimiter, create_connector
+from src.asyncio_tasks.resilience import Retrier
 
-async def fetch_urls(urls: list[str], file_path: str):
+
+async def fetch_status(
+    session: aiohttp.ClientSession,
+    url: str,
+    retrier: typing.Optional[Retrier] = None,
+) -> tuple[str, int]:
+    """
+    Выполняет HTTP-запрос GET к указанному URL и возвращает кортеж (URL, статус-код).
+
+    :param session: Объект aiohttp.ClientSession для выполнения HTTP-запросов.
+    :param url: URL-адрес для запроса.
+    :param retrier: Повторы при сетевых ошибках и статусах перегрузки (429/5xx)
+        и выключатели хостов, None - одна попытка.
+    :return: Кортеж (URL, статус-код), где 0 - ошибка запроса.
+    """
+
+    timeout = aiohttp.ClientTimeout(total=10)
+
+    async def attempt() -> int:
+        async with session.get(url, timeout=timeout) as response:
+            # Статус перегрузки - ошибка, чтобы ее можно было повторить
+            if retrier is not None and response.status in OVERLOAD_STATUSES:
+                response.raise_for_status()
+            return response.status
+
+    try:
+        if retrier is not None:
+            return url, await retrier.call(url, attempt)
+        return url, await attempt()
+    except aiohttp.ClientResponseError as e:
+        # Повторы не помогли: возвращается последний статус
+        return url, e.status
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        # Где 0 - ошибка запроса (в т.ч. разомкнутый выключатель хоста)
+        return url, 0
+
+
+async def fetch_urls(
+    urls: list[str],
+    file_path: str,
+    max_concurrent: int = 5,
+    limit_per_host: typing.Optional[int] = None,
+    retrier: typing.Optional[Retrier] = None,
+):
     """
     Асинхронно отправляет HTTP-запросы к списку URL-адресов и сохраняет их статус-коды в JSON-файл.
 
     :param urls: Список URL-адресов для запроса.
     :param file_path: Путь к JSON-файлу, где будет сохранен результат.
+    :param max_concurrent: Максимальное количество одновременных запросов.
+    :param limit_per_host: Максимальное количество одновременных запросов к одному хосту,
+        None - max_concurrent (без отдельного ограничения на хост).
+    :param retrier: Повторы и выключатели хостов, None - одна попытка без повторов.
     """
 
-    async with aiohttp.ClientSession() as session:
-        # Ограничение кол-ва одновременных запросов
-        semaphore = asyncio.Semaphore(5)
-
-        async def fetch(url: str):
-            """
-            Выполняет HTTP-запрос GET к указанному URL и возвращает кортеж (URL, статус-код).
+    if limit_per_host is None:
+        limit_per_host = max_concurrent
 
-            :param url: URL-адрес для запроса.
-            :return: Кортеж (URL, статус-код)
-            """
+    connector = create_connector(limit=max_concurrent, limit_per_host=limit_per_host)
 
-            async with semaphore:
-                try:
-                    timeout = aiohttp.ClientTimeout(total=10)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        # Ограничение кол-ва одновременных запросов: общее и на каждый хост
+        limiter = HostLimiter(max_concurrent, limit_per_host)
 
-                    async with session.get(url, timeout=timeout) as response:
-                        return url, response.status
-                except (aiohttp.ClientError, asyncio.TimeoutError):
-                    # Где 0 - ошибка запроса
-                    return url, 0
+        async def fetch(url: str):
+            async with limiter.acquire(url):
+                return await fetch_status(session, url, retrier)
 
         # Создание задач для всех URL
         tasks = [fetch(url) for url in urls]
@@ -52,6 +95,174 @@ async def fetch_urls(urls: list[str], file_path: str):
                 file.write("\n")
 
 
+async def _aiter_urls(
+    urls: typing.Union[typing.Iterable[str], typing.AsyncIterable[str]],
+) -> typing.AsyncIterator[str]:
+    """
+    Приводит обычный или асинхронный итератор URL к асинхронному, не читая его целиком.
+
+    :param urls: Итерируемый объект с URL.
+    """
+
+    if hasattr(urls, "__aiter__"):
+        async for url in urls:
+            yield url
+    else:
+        for url in urls:
+            yield url
+
+
+async def _fetch_indexed(
+    session: aiohttp.ClientSession,
+    index: int,
+    url: str,
+    retrier: typing.Optional[Retrier] = None,
+) -> tuple[int, tuple[str, int]]:
+    """
+    Выполняет fetch_status и возвращает результат вместе с порядковым номером URL во входных данных.
+    """
+
+    return index, await fetch_status(session, url, retrier)
+
+
+async def write_results(file, queue: asyncio.Queue) -> None:
+    """
+    Записывает результаты (URL, статус-код) из очереди в файл построчно в формате JSONL.
+    Все накопившиеся в очереди результаты записываются одним вызовом write.
+
+    :param file: Объект aiofiles для записи результатов.
+    :param queue: Очередь результатов, None - сигнал завершения.
+    """
+
+    while True:
+        items = [await queue.get()]
+
+        while not queue.empty():
+            items.append(queue.get_nowait())
+
+        # None кладется в очередь последним, поэтому может быть только в конце пачки
+        done = items[-1] is None
+
+        if done:
+            items.pop()
+
+        lines = [
+            json.dumps({"url": url, "status_code": status_code}) + "\n"
+            for url, status_code in items
+        ]
+
+        if lines:
+            await file.write("".join(lines))
+        if done:
+            return
+
+
+async def fetch_urls_stream(
+    urls: typing.Union[typing.Iterable[str], typing.AsyncIterable[str]],
+    file_path: str,
+    max_concurrent: int = 5,
+    ordered: bool = False,
+    retrier: typing.Optional[Retrier] = None,
+) -> int:
+    """
+    Потоковый вариант fetch_urls для больших входных данных: память не растет с числом URL.
+
+    URL читаются из итератора по мере освобождения окна из max_concurrent задач,
+    результаты записываются в файл (JSONL) по мере готовности отдельной задачей-писателем.
+    При ordered=True результаты пишутся в порядке входных URL: готовые ответы ждут
+    в буфере, который входит в то же окно max_concurrent.
+
+    :param urls: Итерируемый (в т.ч. асинхронно) объект с URL-адресами.
+    :param file_path: Путь к JSONL-файлу для результатов.
+    :param max_concurrent: Размер окна: одновременные запросы плюс ожидающие записи по порядку.
+    :param ordered: Сохранять порядок входных URL в выходном файле.
+    :param retrier: Повторы и выключатели хостов, None - одна попытка без повторов.
+    :return: Количество обработанных URL.
+    """
+
+    queue = asyncio.Queue(maxsize=max_concurrent * 2)
+    pending: set[asyncio.Task] = set()
+    # Готовые результаты, ожидающие записи по порядку: номер URL -> результат
+    buffered: dict[int, tuple[str, int]] = {}
+    next_index = 0
+    total = 0
+
+    async def put(item: typing.Optional[tuple[str, int]]) -> None:
+        """
+        Кладет результат в очередь писателя. Если писатель упал (например, OSError при записи),
+        очередь больше никто не разбирает: вместо вечного ожидания поднимается его ошибка.
+        """
+
+        if not writer_task.done() and not queue.full():
+            queue.put_nowait(item)
+            return
+
+        put_task = asyncio.ensure_future(queue.put(item))
+
+        try:
+            await asyncio.wait(
+                {put_task, writer_task}, return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            put_task.cancel()
+
+        if not put_task.done() or put_task.cancelled():
+            writer_task.result()
+            raise RuntimeError("Задача-писатель завершилась раньше времени")
+
+    async def collect() -> None:
+        nonlocal pending, next_index
+
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+        for task in done:
+            index, result = task.result()
+
+            if ordered:
+                buffered[index] = result
+            else:
+                await put(result)
+
+        while next_index in buffered:
+            await put(buffered.pop(next_index))
+            next_index += 1
+
+    async with (
+        aiohttp.ClientSession(
+            connector=create_connector(
+                limit=max_concurrent, limit_per_host=max_concurrent
+            )
+        ) as session,
+        aiofiles.open(file_path, "w") as file,
+    ):
+        writer_task = asyncio.create_task(write_results(file, queue))
+
+        try:
+            async for url in _aiter_urls(urls):
+                while len(pending) + len(buffered) >= max_concurrent:
+                    await collect()
+
+                pending.add(
+                    asyncio.create_task(_fetch_indexed(session, total, url, retrier))
+                )
+                total += 1
+
+            while pending:
+                await collect()
+
+            await put(None)
+            await writer_task
+        finally:
+            # При ошибке или отмене останавливаем и запросы, и задачу-писателя
+            for task in pending:
+                task.cancel()
+
+            writer_task.cancel()
+            await asyncio.gather(*pending, writer_task, return_exceptions=True)
+
+    return total
+
+
 if __name__ == "__main__":
     urls = [
         "https://example.com",
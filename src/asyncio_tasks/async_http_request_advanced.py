@@ -1,32 +1,74 @@
 import asyncio
-import json
+import concurrent.futures
+import contextlib
 import logging
 import typing
 
 import aiofiles
 import aiohttp
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler("errors.log", encoding="utf-8"),
-        logging.StreamHandler(),
-    ],
+from src.asyncio_tasks.adaptive_limiter import OVERLOAD_STATUSES, AIMDLimiter
+from src.asyncio_tasks.batched_writer import BatchedWriter
+from src.asyncio_tasks.crawl_checkpoint import (
+    BloomFilter,
+    Checkpoint,
+    CompactHashSet,
+    url_hash,
 )
+from src.asyncio_tasks.host_scheduling import HostQueue, create_connector
+from src.asyncio_tasks.instrumentation import LoopMonitor
+from src.asyncio_tasks.json_streaming import (
+    MAX_BODY_SIZE,
+    JsonParser,
+    ResponseTooLarge,
+)
+from src.asyncio_tasks.resilience import CircuitOpenError, Retrier
+
+
+def configure_logging(log_file: typing.Optional[str] = "errors.log") -> None:
+    """
+    Настраивает логирование для запуска загрузки: в консоль и в файл.
+    Вызывается из точки входа, а не при импорте, чтобы импорт модуля не создавал файл лога
+    и не менял конфигурацию логов чужого процесса.
+
+    :param log_file: Файл лога, None - только консоль.
+    """
+
+    handlers: list[logging.Handler] = [logging.StreamHandler()]
+
+    if log_file is not None:
+        handlers.append(logging.FileHandler(log_file, encoding="utf-8"))
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        handlers=handlers,
+    )
 
 
 async def process_url(
-    session: aiohttp.ClientSession, url: str
-) -> typing.Optional[dict]:
+    session: aiohttp.ClientSession,
+    url: str,
+    parser: typing.Optional[JsonParser] = None,
+    raise_overload: bool = False,
+) -> typing.Optional[typing.Any]:
     """
     Обрабатывает URL, выполняет запрос и парсит JSON-ответ.
 
     :param session: Объект aiohttp.ClientSession для выполнения HTTP-запросов.
     :param url: URL-адрес для обработки.
+    :param parser: Чтение тела с ограничением размера и разбор JSON, None - настройки по умолчанию.
+    :param raise_overload: Статусы перегрузки (429/5xx) - ошибка, а не пропуск: нужно,
+        когда их учитывает адаптивный лимит или повторы.
     """
 
+    if parser is None:
+        parser = JsonParser()
+
     async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+        if raise_overload and response.status in OVERLOAD_STATUSES:
+            response.raise_for_status()
+
         if response.status != 200:
             logging.warning(
                 f"Получен статус-код {response.status} для URL: {url}. Пропуск..."
@@ -40,115 +82,282 @@ async def process_url(
             return None
 
         try:
-            return await response.json()
-        except (aiohttp.ContentTypeError, json.JSONDecodeError) as e:
+            return await parser.read(response)
+        except ResponseTooLarge as e:
+            logging.warning(f"Слишком большой ответ на {url}: {e}. Пропуск...")
+            return None
+        except ValueError as e:
             logging.error(f"Ошибка парсинга JSON на {url}: {e}. Пропуск...")
             return None
 
 
 async def worker(
-    session: aiohttp.ClientSession, queue_in: asyncio.Queue, queue_out: asyncio.Queue
+    session: aiohttp.ClientSession,
+    queue_in: HostQueue,
+    queue_out: asyncio.Queue,
+    limiter: typing.Optional[AIMDLimiter] = None,
+    checkpoint: typing.Optional[Checkpoint] = None,
+    parser: typing.Optional[JsonParser] = None,
+    retrier: typing.Optional[Retrier] = None,
+    monitor: typing.Optional[LoopMonitor] = None,
 ) -> None:
     """
     Рабочая задача, обрабатывающая URL из входной очереди.
 
     :param session: Объект aiohttp.ClientSession для выполнения HTTP-запросов.
-    :param queue_in: Очередь входных URL для обработки.
+    :param queue_in: Очередь входных URL с похостовым лимитом.
     :param queue_out: Очередь для хранения результатов обработки.
+    :param limiter: Адаптивный лимит одновременных запросов, общий для всех воркеров.
+    :param checkpoint: Контрольная точка: пропущенные URL (не JSON, не 200) сразу отмечаются
+        завершенными, URL с результатом отмечает writer, URL с ошибкой не отмечаются.
+    :param parser: Чтение тела с ограничением размера и разбор JSON.
+    :param retrier: Повторы с бюджетом и выключатели хостов, None - одна попытка.
+        Слот лимитера занимается на каждую попытку, а не на время пауз между ними.
+    :param monitor: Учет исходов по стадиям fetched, skipped, failed.
     """
 
+    # Без лимита и повторов статусы перегрузки пропускаются, как и остальные не-200
+    raise_overload = limiter is not None or retrier is not None
+
+    async def attempt(url: str) -> typing.Optional[typing.Any]:
+        async with limiter.slot() if limiter else contextlib.nullcontext():
+            return await process_url(session, url, parser, raise_overload)
+
     while True:
         url = await queue_in.get()
 
         if url is None:
-            queue_in.task_done()
             return
 
         try:
-            result = await process_url(session, url)
+            if retrier is not None:
+                result = await retrier.call(url, lambda: attempt(url))
+            else:
+                result = await attempt(url)
+
             if result is not None:
                 await queue_out.put({url: result})  # Добавлено URL как ключ
+            elif checkpoint is not None:
+                checkpoint.add(url)
+
+            if monitor is not None:
+                monitor.count("fetched" if result is not None else "skipped")
+        except CircuitOpenError as e:
+            logging.warning(f"URL {url} не запрашивался: {e}")
+
+            if monitor is not None:
+                monitor.count("failed")
         except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             logging.error(f"Ошибка обработки URL: {url}, {e}")
+
+            if monitor is not None:
+                monitor.count("failed")
+        except Exception:
+            # Неожиданная ошибка (например, BrokenProcessPool пула разбора) не должна завершать
+            # воркер: иначе, когда упадут все воркеры, producer навсегда зависнет на put
+            logging.exception(f"Непредвиденная ошибка обработки URL: {url}")
+
+            if monitor is not None:
+                monitor.count("failed")
         finally:
-            queue_in.task_done()
+            queue_in.release(url)
 
 
-async def writer(file, queue: asyncio.Queue) -> None:
+async def url_producer(
+    input_file: str,
+    queue: HostQueue,
+    checkpoint: typing.Optional[Checkpoint] = None,
+    byte_range: typing.Optional[tuple[int, int]] = None,
+) -> None:
     """
-    Записывает результаты в JSON-файл.
+    Считывает URL из входного файла и помещает их в очередь.
+    Повторы URL во входном файле и URL, завершенные в прошлых запусках, пропускаются.
 
-    :param file: Объект aiofiles для записи результатов.
-    :param queue: Очередь для хранения результатов обработки.
+    :param input_file: Имя файла с входными URL.
+    :param queue: Очередь для хранения входных URL.
+    :param checkpoint: Контрольная точка завершенных URL.
+    :param byte_range: Читать только строки, начинающиеся в диапазоне байтов [start, end).
     """
 
-    while True:
-        data = await queue.get()
+    seen = CompactHashSet()
+    duplicates = finished = 0
+    start, end = byte_range if byte_range is not None else (0, None)
 
-        if data is None:
-            queue.task_done()
-            return
+    async with aiofiles.open(input_file, "rb") as file:
+        await file.seek(start)
+        position = start
 
-        await file.write(json.dumps(data) + "\n")  # Запись результата в формате JSON
+        async for line in file:
+            if end is not None and position >= end:
+                break
 
+            position += len(line)
+            url = line.decode().strip()
 
-async def url_producer(input_file: str, queue: asyncio.Queue) -> None:
-    """
-    Считывает URL из входного файла и помещает их в очередь.
+            if not url or not url.startswith(("http://", "https://")):
+                continue
 
-    :param input_file: Имя файла с входными URL.
-    :param queue: Очередь для хранения входных URL.
-    """
+            key = url_hash(url)
 
-    async with aiofiles.open(input_file, "r") as file:
-        async for line in file:
-            url = line.strip()
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+
+            if checkpoint is not None and url in checkpoint:
+                finished += 1
+                continue
 
-            if url and url.startswith(("http://", "https://")):
-                await queue.put(url)
+            await queue.put(url)
+
+    logging.info(
+        "Пропущено повторов URL: %d, завершенных ранее: %d", duplicates, finished
+    )
 
 
 async def fetch_urls(
-    input_file: str, output_file: str, max_concurrent: int = 5
+    input_file: str,
+    output_file: str,
+    max_concurrent: int = 5,
+    limit_per_host: typing.Optional[int] = None,
+    limiter: typing.Optional[AIMDLimiter] = None,
+    compression: typing.Optional[str] = None,
+    resume: bool = False,
+    checkpoint_file: typing.Optional[str] = None,
+    checkpoint_seen: typing.Union[CompactHashSet, BloomFilter, None] = None,
+    max_body_size: int = MAX_BODY_SIZE,
+    fields: typing.Optional[typing.Collection[str]] = None,
+    parse_processes: int = 0,
+    retrier: typing.Optional[Retrier] = None,
+    monitor: typing.Optional[LoopMonitor] = None,
+    byte_range: typing.Optional[tuple[int, int]] = None,
+    writer_factory: typing.Optional[typing.Callable[[Checkpoint], typing.Any]] = None,
 ) -> None:
     """
     Запускает процесс асинхронной загрузки URL и записи результатов в файл.
 
+    Завершенные URL записываются в файл контрольной точки (64-битные хеши).
+    С resume=True URL из контрольной точки пропускаются, а результаты дописываются в output_file.
+
+    URL одного хоста обрабатываются не более чем limit_per_host воркерами одновременно,
+    а хосты чередуются по кругу: медленный хост не занимает весь пул воркеров.
+
     :param input_file: Имя файла с входными URL.
     :param output_file: Имя файла для записи результатов.
     :param max_concurrent: Максимальное количество одновременных запросов.
+    :param limit_per_host: Максимальное количество одновременных запросов к одному хосту,
+        None - max_concurrent (без отдельного ограничения на хост).
+    :param limiter: Адаптивный лимит (AIMD) вместо фиксированного max_concurrent:
+        воркеров запускается limiter.max_limit, одновременно работают limiter.limit из них.
+    :param compression: Сжатие выходного JSONL-файла: None, "gzip" или "zstd".
+    :param resume: Продолжить прерванную загрузку по контрольной точке.
+    :param checkpoint_file: Файл контрольной точки, по умолчанию output_file + ".checkpoint".
+    :param checkpoint_seen: Пустое множество завершенных URL в памяти, None - CompactHashSet.
+        BloomFilter(capacity) экономит память на десятках миллионов URL, но с вероятностью
+        error_rate пропускает еще не загруженный URL.
+    :param max_body_size: Максимальный размер тела ответа, большие ответы пропускаются.
+    :param fields: Ключи JSON-объектов, которые нужно сохранить, None - все.
+    :param parse_processes: Размер пула процессов для разбора больших ответов,
+        0 - разбор в пуле потоков.
+    :param retrier: Политика повторов, бюджет и выключатели хостов,
+        None - одна попытка без повторов.
+        URL, не загруженные после всех повторов или из-за разомкнутого выключателя,
+        не попадают в контрольную точку и загружаются при возобновлении.
+    :param monitor: Отчеты о задержке цикла событий, задачах, глубине очередей
+        и пропускной способности стадий, например LoopMonitor(report_path="loop_stats.jsonl").
+        Уже запущенный монитор (async with LoopMonitor()) после загрузки не останавливается.
+    :param byte_range: Обрабатывать только URL из диапазона байтов входного файла
+        (шард для sharded_fetch.fetch_urls_sharded).
+    :param writer_factory: Создает приемник результатов вместо BatchedWriter по контрольной точке,
+        например DatabaseWriter из databases.data_access. Приемник должен иметь
+        run(queue) и lines_written и отмечать записанные URL в контрольной точке.
     """
 
-    queue_in = asyncio.Queue(maxsize=1000)
+    if limiter is not None:
+        max_concurrent = limiter.max_limit
+    if limit_per_host is None:
+        limit_per_host = max_concurrent
+
+    checkpoint = Checkpoint(
+        checkpoint_file or f"{output_file}.checkpoint", resume, seen=checkpoint_seen
+    )
+    processes = (
+        concurrent.futures.ProcessPoolExecutor(parse_processes)
+        if parse_processes
+        else None
+    )
+    parser = JsonParser(max_body_size, fields=fields, executor=processes)
+    queue_in = HostQueue(limit_per_host=limit_per_host, maxsize=1000)
     queue_out = asyncio.Queue(maxsize=1000)
+    connector = create_connector(limit=max_concurrent, limit_per_host=limit_per_host)
 
-    async with (
-        aiohttp.ClientSession() as session,
-        aiofiles.open(output_file, "w") as out_file,
-    ):
+    async with aiohttp.ClientSession(connector=connector) as session:
         # Запуск worker-потоков и writer-потока
         workers = [
-            asyncio.create_task(worker(session, queue_in, queue_out))
-            for _ in range(max_concurrent)
+            asyncio.create_task(
+                worker(
+                    session,
+                    queue_in,
+                    queue_out,
+                    limiter,
+                    checkpoint,
+                    parser,
+                    retrier,
+                    monitor,
+                ),
+                name=f"worker-{i}",
+            )
+            for i in range(max_concurrent)
         ]
-        writer_task = asyncio.create_task(writer(out_file, queue_out))
+        if writer_factory is not None:
+            writer = writer_factory(checkpoint)
+        else:
+            writer = BatchedWriter(
+                output_file,
+                compression,
+                fsync_interval=10.0,
+                append=resume,
+                checkpoint=checkpoint,
+            )
+        writer_task = asyncio.create_task(writer.run(queue_out), name="writer")
 
-        # Запускает корутину и ждет ее завершения
-        await url_producer(input_file, queue_in)
+        # Монитор, запущенный снаружи (async with LoopMonitor()), останавливает вызывающий код
+        own_monitor = monitor is not None and not monitor.running
 
-        for _ in range(max_concurrent):
-            # Уведомление workers о завершении
-            await queue_in.put(None)
+        if monitor is not None:
+            monitor.watch_queue("queue_in", queue_in)
+            monitor.watch_queue("queue_out", queue_out)
+            monitor.watch_total("written", lambda: writer.lines_written)
+            monitor.start()
 
-        # Ожидание завершения всех workers
-        await queue_in.join()
-        # Уведомление writer о завершении
-        await queue_out.put(None)
-        # Ожидание завершения writer-потока
-        await writer_task
-        # Проверка, что все workers завершены
-        await asyncio.gather(*workers, return_exceptions=True)
+        try:
+            # Запускает корутину и ждет ее завершения
+            await url_producer(input_file, queue_in, checkpoint, byte_range)
+            # Уведомление workers о завершении: после выдачи всех URL get вернет None
+            queue_in.close()
+
+            # Ожидание завершения всех workers
+            await asyncio.gather(*workers, return_exceptions=True)
+            # Уведомление writer о завершении
+            await queue_out.put(None)
+            # Ожидание завершения writer-потока
+            await writer_task
+        except BaseException:
+            # При прерывании writer успевает записать полученные результаты и контрольную точку
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            writer_task.cancel()
+            await asyncio.gather(writer_task, return_exceptions=True)
+            raise
+        finally:
+            if processes is not None:
+                # shutdown ждет завершения процессов - не в цикле событий
+                await asyncio.to_thread(processes.shutdown, cancel_futures=True)
+            if own_monitor:
+                await monitor.stop()
 
 
 if __name__ == "__main__":
+    configure_logging()
     asyncio.run(fetch_urls("urls.txt", "./results2.jsonl"))
@@ -0,0 +1,295 @@
+"""
+Пакетная запись результатов из asyncio.Queue в JSONL-файл.
+
+Вместо отдельного обращения к пулу потоков на каждую строку (как aiofiles file.write)
+writer забирает из очереди все накопившиеся результаты, кодирует их в буфер
+и записывает буфер одним вызовом в потоке при достижении размера или по таймеру.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import time
+import typing
+
+import aiofiles
+
+from src.asyncio_tasks.crawl_checkpoint import Checkpoint
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def encode_line(obj: typing.Any) -> bytes:
+    """
+    Кодирует объект в строку JSONL: через orjson, если он установлен, иначе через json.
+
+    :param obj: Сериализуемый объект.
+    """
+
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return json.dumps(obj, ensure_ascii=False).encode() + b"\n"
+
+
+def open_output(
+    path: str, compression: typing.Optional[str] = None, append: bool = False
+) -> typing.BinaryIO:
+    """
+    Открывает файл для записи, опционально со сжатием.
+    При дописывании в сжатый файл добавляется новый gzip-member/zstd-frame - такой файл читается целиком.
+
+    :param path: Путь к файлу.
+    :param compression: None, "gzip" или "zstd".
+    :param append: Дописывать в конец файла вместо перезаписи.
+    """
+
+    mode = "ab" if append else "wb"
+
+    if compression is None:
+        return open(path, mode)
+    if compression == "gzip":
+        return gzip.open(path, mode, compresslevel=6)
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Для сжатия zstd установите пакет zstandard")
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, mode))
+
+    raise ValueError(f"Неизвестный тип сжатия: {compression}")
+
+
+class BatchedWriter:
+    """
+    Writer для результатов из очереди: пакетное чтение, быстрая сериализация, сброс по размеру
+    или по времени, сжатие gzip/zstd и периодический fsync как контрольная точка.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        compression: typing.Optional[str] = None,
+        batch_size: int = 1000,
+        flush_bytes: int = 1 << 20,
+        flush_interval: float = 1.0,
+        fsync_interval: typing.Optional[float] = None,
+        append: bool = False,
+        checkpoint: typing.Optional[Checkpoint] = None,
+    ):
+        """
+        :param path: Путь к выходному файлу.
+        :param compression: None, "gzip" или "zstd".
+        :param batch_size: Сколько результатов забирать из очереди за один проход.
+        :param flush_bytes: Размер буфера, при котором он записывается в файл.
+        :param flush_interval: Максимальное время (с) нахождения результата в буфере.
+        :param fsync_interval: Период (с) fsync файла, None - не вызывать fsync.
+        :param append: Дописывать в существующий файл (при возобновлении загрузки).
+        :param checkpoint: Контрольная точка: URL результатов ({url: data}) отмечаются завершенными
+            и записываются в нее после того, как сами результаты записаны в выходной файл.
+        """
+
+        self.path = path
+        self.compression = compression
+        self.batch_size = batch_size
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.append = append
+        self.checkpoint = checkpoint
+
+        self.lines_written = 0
+        self._file: typing.Optional[typing.BinaryIO] = None
+        self._buffer: list[bytes] = []
+        self._buffered_bytes = 0
+        self._buffered_lines = 0
+        self._last_flush = time.monotonic()
+        self._last_fsync = time.monotonic()
+
+    def _write_sync(self, data: bytes, checkpoint_data: bytes, fsync: bool) -> None:
+        """
+        Записывает данные в файл, а затем хеши завершенных URL в контрольную точку
+        (выполняется в пуле потоков).
+
+        :param data: Закодированные строки.
+        :param checkpoint_data: Результат Checkpoint.drain.
+        :param fsync: Сбросить данные на диск после записи.
+        """
+
+        self._file.write(data)
+        self._file.flush()
+
+        if fsync:
+            os.fsync(self._fileno())
+        if self.checkpoint is not None:
+            self.checkpoint.write(checkpoint_data, fsync)
+
+    def _fileno(self) -> int:
+        """
+        Возвращает дескриптор файла на диске (под слоем сжатия).
+        """
+
+        if isinstance(self._file, gzip.GzipFile):
+            return self._file.fileobj.fileno()
+        return self._file.fileno()
+
+    async def flush(self, fsync: bool = False) -> None:
+        """
+        Записывает буфер в файл одним обращением к пулу потоков.
+
+        :param fsync: Принудительно вызвать fsync.
+        """
+
+        now = time.monotonic()
+        fsync = fsync or (
+            self.fsync_interval is not None
+            and now - self._last_fsync >= self.fsync_interval
+        )
+
+        checkpoint_data = self.checkpoint.drain() if self.checkpoint else b""
+
+        if self._buffer or checkpoint_data or fsync:
+            data = b"".join(self._buffer)
+            self._buffer.clear()
+            await asyncio.to_thread(self._write_sync, data, checkpoint_data, fsync)
+            self.lines_written += self._buffered_lines
+
+        if fsync:
+            self._last_fsync = now
+
+        self._buffered_bytes = 0
+        self._buffered_lines = 0
+        self._last_flush = now
+
+    def _append(self, item: typing.Any) -> None:
+        """
+        Кодирует результат и добавляет его в буфер.
+        """
+
+        line = encode_line(item)
+        self._buffer.append(line)
+        self._buffered_bytes += len(line)
+        self._buffered_lines += 1
+
+        if self.checkpoint is not None:
+            self.checkpoint.add(next(iter(item)))
+
+    async def run(self, queue: asyncio.Queue) -> None:
+        """
+        Читает результаты из очереди и записывает их в файл до получения None.
+
+        :param queue: Очередь результатов, None - сигнал завершения.
+        """
+
+        self._file = await asyncio.to_thread(
+            open_output, self.path, self.compression, self.append
+        )
+
+        try:
+            while True:
+                if self._buffer:
+                    timeout = self.flush_interval - (
+                        time.monotonic() - self._last_flush
+                    )
+
+                    try:
+                        item = await asyncio.wait_for(queue.get(), max(timeout, 0))
+                    except asyncio.TimeoutError:
+                        await self.flush()
+                        continue
+                else:
+                    item = await queue.get()
+
+                items = [item]
+
+                while len(items) < self.batch_size and not queue.empty():
+                    items.append(queue.get_nowait())
+
+                done = items[-1] is None
+
+                for item in items[:-1] if done else items:
+                    self._append(item)
+
+                if done:
+                    return
+
+                if (
+                    self._buffered_bytes >= self.flush_bytes
+                    or time.monotonic() - self._last_flush >= self.flush_interval
+                ):
+                    await self.flush()
+        finally:
+            await self.flush(fsync=self.fsync_interval is not None)
+            await asyncio.to_thread(self._file.close)
+
+
+async def _produce(queue: asyncio.Queue, lines: int) -> None:
+    """
+    Кладет в очередь lines результатов, похожих на ответы JSON API, и сигнал завершения.
+    """
+
+    for i in range(lines):
+        await queue.put(
+            {f"https://example.com/api/{i}": {"id": i, "name": f"item-{i}", "ok": True}}
+        )
+    await queue.put(None)
+
+
+async def _aiofiles_writer(path: str, queue: asyncio.Queue) -> None:
+    """
+    Прежний writer: одна запись через aiofiles на каждый результат.
+    """
+
+    async with aiofiles.open(path, "w") as file:
+        while True:
+            data = await queue.get()
+
+            if data is None:
+                return
+
+            await file.write(json.dumps(data) + "\n")
+
+
+async def performance_comparison(lines: int = 200_000, path: str = "bench.jsonl"):
+    """
+    Сравнивает пропускную способность (строк/с) прежнего writer и BatchedWriter.
+
+    :param lines: Количество записываемых результатов.
+    :param path: Путь к временному выходному файлу.
+    """
+
+    variants = {
+        "aiofiles_per_line": lambda queue: _aiofiles_writer(path, queue),
+        "batched": lambda queue: BatchedWriter(path).run(queue),
+        "batched_gzip": lambda queue: BatchedWriter(path, "gzip").run(queue),
+    }
+
+    if zstandard is not None:
+        variants["batched_zstd"] = lambda queue: BatchedWriter(path, "zstd").run(queue)
+
+    results = {}
+
+    try:
+        for name, make_writer in variants.items():
+            queue = asyncio.Queue(maxsize=1000)
+            start = time.perf_counter()
+            await asyncio.gather(_produce(queue, lines), make_writer(queue))
+            results[name] = lines / (time.perf_counter() - start)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+    for name, lines_per_second in results.items():
+        print(f"{name}: {lines_per_second:,.0f} строк/с")
+
+    return results
+
+
+if __name__ == "__main__":
+    asyncio.run(performance_comparison())
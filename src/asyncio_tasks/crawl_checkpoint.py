@@ -0,0 +1,309 @@
+"""
+Контрольные точки и дедупликация URL для возобновляемой загрузки.
+
+URL хранятся не строками, а 64-битными хешами (blake2b): 8 байт на URL в файле
+контрольной точки и в памяти (CompactHashSet) или ~1.2 байта на URL в BloomFilter.
+"""
+
+import array
+import bisect
+import hashlib
+import heapq
+import itertools
+import math
+import os
+import time
+import tracemalloc
+import typing
+
+
+def url_hash(url: str) -> int:
+    """
+    Возвращает 64-битный хеш URL. Вероятность коллизии при 10⁷ URL ~ 3·10⁻⁶.
+
+    :param url: URL-адрес.
+    """
+
+    return int.from_bytes(
+        hashlib.blake2b(url.encode(), digest_size=8).digest(), "little"
+    )
+
+
+class CompactHashSet:
+    """
+    Множество 64-битных хешей: отсортированные серии array('Q') плюс небольшое set недавних добавлений.
+
+    Недавние добавления (не больше RECENT_LIMIT) сортируются в новую серию, а серии близкого
+    размера сливаются через heapq.merge прямо в array, без списка Python-объектов.
+    Серий остается O(log n), каждый элемент участвует в O(log n) слияниях.
+
+    Память: 8 байт на элемент плюс постоянные ~5 МБ недавних добавлений (set[int] занимает
+    ~70 байт на элемент); на время слияния - еще 8 байт на элемент сливаемых серий.
+    """
+
+    # Максимальный размер set недавних добавлений
+    RECENT_LIMIT = 65_536
+    # Размер части при загрузке: часть сортируется списком, поэтому ограничивает пиковую память
+    LOAD_CHUNK = 1 << 18
+
+    def __init__(self, hashes: typing.Iterable[int] = ()):
+        self._runs: list[array.array] = []
+        self._recent: set[int] = set()
+
+        iterator = iter(hashes)
+        chunks = []
+
+        while chunk := sorted(itertools.islice(iterator, self.LOAD_CHUNK)):
+            chunks.append(array.array("Q", chunk))
+
+        if len(chunks) > 1:
+            self._runs.append(array.array("Q", heapq.merge(*chunks)))
+        else:
+            self._runs.extend(chunks)
+
+    def __len__(self) -> int:
+        return sum(map(len, self._runs)) + len(self._recent)
+
+    def __contains__(self, value: int) -> bool:
+        if value in self._recent:
+            return True
+
+        for run in self._runs:
+            index = bisect.bisect_left(run, value)
+
+            if index < len(run) and run[index] == value:
+                return True
+        return False
+
+    def add(self, value: int) -> None:
+        """
+        Добавляет хеш в множество.
+
+        :param value: 64-битный хеш.
+        """
+
+        if value in self:
+            return
+
+        self._recent.add(value)
+
+        if len(self._recent) >= self.RECENT_LIMIT:
+            self._flush()
+
+    def _flush(self) -> None:
+        """
+        Переносит недавние добавления в новую серию и сливает серии близкого размера:
+        каждая следующая серия меньше предыдущей более чем вдвое.
+        """
+
+        runs = self._runs
+        runs.append(array.array("Q", sorted(self._recent)))
+        self._recent.clear()
+
+        while len(runs) > 1 and len(runs[-2]) <= 2 * len(runs[-1]):
+            last = runs.pop()
+            runs[-1] = array.array("Q", heapq.merge(runs[-1], last))
+
+
+class BloomFilter:
+    """
+    Фильтр Блума для 64-битных хешей: компактнее CompactHashSet, но с ложными срабатываниями
+    (URL, которого не было, с вероятностью error_rate считается уже виденным).
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """
+        :param capacity: Ожидаемое количество элементов.
+        :param error_rate: Допустимая вероятность ложного срабатывания.
+        """
+
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _positions(self, value: int) -> typing.Iterator[int]:
+        """
+        Позиции битов по схеме двойного хеширования Кирша-Митценмахера.
+        """
+
+        h1 = value & 0xFFFFFFFF
+        h2 = (value >> 32) | 1
+
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def __contains__(self, value: int) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+    def add(self, value: int) -> None:
+        """
+        Добавляет хеш в фильтр.
+
+        :param value: 64-битный хеш.
+        """
+
+        for pos in self._positions(value):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self._count += 1
+
+
+class Checkpoint:
+    """
+    Файл контрольной точки завершенных URL: поток 64-битных хешей (little-endian), только дописывание.
+
+    add вызывается из цикла событий, drain забирает еще не записанные хеши,
+    а write дописывает их в файл (можно вызывать в пуле потоков).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        resume: bool = True,
+        seen: typing.Union[CompactHashSet, BloomFilter, None] = None,
+    ):
+        """
+        :param path: Путь к файлу контрольной точки.
+        :param resume: Загрузить существующий файл. Иначе файл очищается.
+        :param seen: Пустое множество для завершенных URL в памяти, None - CompactHashSet.
+            BloomFilter(capacity) занимает ~1.2 байта на URL вместо 8, но с вероятностью
+            error_rate пропускает незавершенный URL. В файл всегда пишутся точные хеши
+            всех завершенных URL (с BloomFilter возможны повторы).
+        """
+
+        self.path = path
+        self._pending = array.array("Q")
+        self._done = seen if seen is not None else CompactHashSet()
+
+        if resume and os.path.exists(path):
+            loaded = array.array("Q")
+
+            with open(path, "rb") as file:
+                data = file.read()
+
+            # Недописанный при аварии хвост (меньше 8 байт) отбрасывается
+            loaded.frombytes(data[: len(data) - len(data) % 8])
+
+            if seen is None:
+                self._done = CompactHashSet(loaded)
+            else:
+                for value in loaded:
+                    seen.add(value)
+        else:
+            open(path, "wb").close()
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def __contains__(self, url: str) -> bool:
+        return url_hash(url) in self._done
+
+    def add(self, url: str) -> None:
+        """
+        Отмечает URL завершенным. На диск он попадет при следующем write.
+
+        :param url: URL-адрес.
+        """
+
+        value = url_hash(url)
+
+        # Положительный ответ BloomFilter может быть ложным: такой URL все равно пишется в файл
+        if value in self._done and not isinstance(self._done, BloomFilter):
+            return
+
+        self._done.add(value)
+        self._pending.append(value)
+
+    def drain(self) -> bytes:
+        """
+        Забирает хеши, еще не записанные в файл.
+        """
+
+        data = self._pending.tobytes()
+        self._pending = array.array("Q")
+        return data
+
+    def write(self, data: bytes, fsync: bool = False) -> None:
+        """
+        Дописывает хеши, полученные через drain, в файл.
+
+        :param data: Результат drain.
+        :param fsync: Сбросить файл на диск.
+        """
+
+        if not data and not fsync:
+            return
+
+        with open(self.path, "ab") as file:
+            file.write(data)
+
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+
+
+def measure_resume_overhead(
+    count: int = 10**7, path: str = "resume_bench.checkpoint", bloom: bool = False
+) -> dict:
+    """
+    Измеряет накладные расходы возобновления: загрузку контрольной точки из count хешей
+    и проверку count URL на завершенность (половина из них есть в контрольной точке).
+    Память множества завершенных URL измеряется tracemalloc при отдельной загрузке.
+
+    :param count: Количество URL в контрольной точке.
+    :param path: Путь к временному файлу контрольной точки.
+    :param bloom: Хранить завершенные URL в BloomFilter вместо CompactHashSet.
+    """
+
+    def load() -> Checkpoint:
+        seen = BloomFilter(count) if bloom else None
+        return Checkpoint(path, resume=True, seen=seen)
+
+    hashes = array.array(
+        "Q", (url_hash(f"https://example.com/{i}") for i in range(count))
+    )
+
+    with open(path, "wb") as file:
+        file.write(hashes.tobytes())
+    del hashes
+
+    try:
+        start = time.perf_counter()
+        checkpoint = load()
+        load_time = time.perf_counter() - start
+        del checkpoint
+
+        tracemalloc.start()
+        try:
+            checkpoint = load()
+            memory = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+
+        start = time.perf_counter()
+        found = sum(
+            f"https://example.com/{i}" in checkpoint
+            for i in range(count // 2, count + count // 2)
+        )
+        check_time = time.perf_counter() - start
+    finally:
+        os.remove(path)
+
+    results = {
+        "load_s": round(load_time, 2),
+        "check_s": round(check_time, 2),
+        "check_us_per_url": round(check_time / count * 1e6, 2),
+        "found": found,
+        "memory_mb": round(memory / 2**20, 1),
+    }
+    print(results)
+    return results
+
+
+if __name__ == "__main__":
+    measure_resume_overhead()
+    measure_resume_overhead(bloom=True)
@@ -0,0 +1,338 @@
+"""
+Ограничения по хостам для асинхронных загрузчиков URL.
+
+- create_connector - TCPConnector с общим и похостовым лимитом соединений, TTL-кэшем DNS и keepalive.
+- HostLimiter - семафор на каждый хост поверх общего: медленный хост занимает только свои слоты.
+- HostQueue - очередь URL, которая выдает URL по кругу между хостами с учетом похостового лимита.
+"""
+
+import asyncio
+import collections
+import contextlib
+import time
+import typing
+import urllib.parse
+
+import aiohttp
+
+
+def host_of(url: str) -> str:
+    """
+    Возвращает хост URL вместе с портом (как его различает пул соединений aiohttp).
+
+    :param url: URL-адрес.
+    """
+
+    return urllib.parse.urlsplit(url).netloc.lower()
+
+
+def create_connector(
+    limit: int = 100,
+    limit_per_host: int = 10,
+    ttl_dns_cache: int = 300,
+    keepalive_timeout: float = 30.0,
+) -> aiohttp.TCPConnector:
+    """
+    Создает коннектор aiohttp с настроенными лимитами, кэшем DNS и keepalive.
+
+    :param limit: Общее число одновременных соединений.
+    :param limit_per_host: Число одновременных соединений к одному хосту.
+    :param ttl_dns_cache: Время жизни записей кэша DNS в секундах.
+    :param keepalive_timeout: Сколько секунд держать простаивающее соединение открытым.
+    """
+
+    return aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        use_dns_cache=True,
+        ttl_dns_cache=ttl_dns_cache,
+        keepalive_timeout=keepalive_timeout,
+    )
+
+
+class HostLimiter:
+    """
+    Общий лимит одновременных запросов плюс лимит на каждый хост.
+
+    Сначала захватывается слот хоста, затем общий: задачи, ждущие медленный хост,
+    не держат общие слоты и не мешают запросам к другим хостам.
+    """
+
+    def __init__(self, limit: int, limit_per_host: int):
+        self._global = asyncio.Semaphore(limit)
+        self._limit_per_host = limit_per_host
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+        # Сколько задач сейчас используют семафор хоста, чтобы удалить его, когда он не нужен
+        self._users: dict[str, int] = collections.defaultdict(int)
+
+    @contextlib.asynccontextmanager
+    async def acquire(self, url: str) -> typing.AsyncIterator[None]:
+        """
+        Захватывает слот хоста URL и общий слот на время запроса.
+
+        :param url: URL-адрес запроса.
+        """
+
+        host = host_of(url)
+        semaphore = self._hosts.get(host)
+
+        if semaphore is None:
+            semaphore = self._hosts[host] = asyncio.Semaphore(self._limit_per_host)
+
+        self._users[host] += 1
+
+        try:
+            async with semaphore, self._global:
+                yield
+        finally:
+            self._users[host] -= 1
+
+            if not self._users[host]:
+                del self._users[host]
+                del self._hosts[host]
+
+
+class HostQueue:
+    """
+    Очередь URL для пула воркеров с похостовым лимитом и чередованием хостов.
+
+    get выдает URL только того хоста, у которого меньше limit_per_host URL в обработке,
+    обходя готовые хосты по кругу. Воркер, получивший URL, обязан вызвать release(url)
+    после обработки. После close() и опустошения очереди get возвращает None.
+    """
+
+    def __init__(self, limit_per_host: int, maxsize: int = 1000):
+        """
+        :param limit_per_host: Максимальное число URL одного хоста в обработке.
+        :param maxsize: Максимальное число URL в очереди (put ждет освобождения места).
+        """
+
+        self._limit_per_host = limit_per_host
+        self._maxsize = maxsize
+        self._queues: dict[str, collections.deque] = {}
+        self._active: dict[str, int] = {}
+        # Хосты, у которых есть URL в очереди и свободные слоты - в порядке обхода по кругу
+        self._ready: collections.deque[str] = collections.deque()
+        self._in_ready: set[str] = set()
+        self._size = 0
+        self._closed = False
+        self._getters: collections.deque[asyncio.Future] = collections.deque()
+        self._putters: collections.deque[asyncio.Future] = collections.deque()
+
+    def qsize(self) -> int:
+        """
+        Возвращает количество URL, ожидающих выдачи.
+        """
+
+        return self._size
+
+    @staticmethod
+    def _wakeup_next(waiters: collections.deque) -> None:
+        """
+        Будит первого ожидающего из списка.
+        """
+
+        while waiters:
+            waiter = waiters.popleft()
+
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+    @staticmethod
+    async def _wait(waiters: collections.deque) -> None:
+        """
+        Ждет пробуждения в списке ожидающих.
+        """
+
+        waiter = asyncio.get_running_loop().create_future()
+        waiters.append(waiter)
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with contextlib.suppress(ValueError):
+                waiters.remove(waiter)
+            raise
+
+    def _mark_ready(self, host: str) -> None:
+        """
+        Ставит хост в круг обхода, если у него есть URL и свободные слоты.
+        """
+
+        if (
+            host not in self._in_ready
+            and self._queues[host]
+            and self._active[host] < self._limit_per_host
+        ):
+            self._ready.append(host)
+            self._in_ready.add(host)
+            self._wakeup_next(self._getters)
+
+    def _forget_if_idle(self, host: str) -> None:
+        """
+        Удаляет состояние хоста, когда у него нет ни URL в очереди, ни URL в обработке.
+        """
+
+        if not self._queues[host] and not self._active[host]:
+            del self._queues[host]
+            del self._active[host]
+
+    async def put(self, url: str) -> None:
+        """
+        Добавляет URL в очередь его хоста, ожидая места, если очередь заполнена.
+
+        :param url: URL-адрес.
+        """
+
+        while self._size >= self._maxsize:
+            await self._wait(self._putters)
+
+        host = host_of(url)
+
+        if host not in self._queues:
+            self._queues[host] = collections.deque()
+            self._active[host] = 0
+
+        self._queues[host].append(url)
+        self._size += 1
+        self._mark_ready(host)
+
+    async def get(self) -> typing.Optional[str]:
+        """
+        Возвращает следующий URL хоста со свободным слотом или None, если очередь закрыта и пуста.
+        """
+
+        while not self._ready:
+            if self._closed and not self._size:
+                self._wakeup_next(self._getters)
+                return None
+            await self._wait(self._getters)
+
+        host = self._ready.popleft()
+        url = self._queues[host].popleft()
+        self._active[host] += 1
+        self._size -= 1
+        self._in_ready.discard(host)
+        self._mark_ready(host)
+        self._wakeup_next(self._putters)
+
+        # Пробуждение следующего, если осталось что выдавать или пора завершаться
+        if self._ready or (self._closed and not self._size):
+            self._wakeup_next(self._getters)
+
+        return url
+
+    def release(self, url: str) -> None:
+        """
+        Отмечает, что обработка URL, полученного через get, завершена.
+
+        :param url: URL-адрес.
+        """
+
+        host = host_of(url)
+        self._active[host] -= 1
+        self._mark_ready(host)
+        self._forget_if_idle(host)
+
+    def close(self) -> None:
+        """
+        Сообщает, что новых URL не будет: после выдачи оставшихся get возвращает None.
+        """
+
+        self._closed = True
+
+        while self._getters:
+            self._wakeup_next(self._getters)
+
+
+async def _fetch_all(
+    session: aiohttp.ClientSession,
+    urls: list[str],
+    workers: int,
+    queue: typing.Union[asyncio.Queue, HostQueue],
+) -> dict[str, float]:
+    """
+    Прогоняет URL через пул воркеров и возвращает время завершения последнего запроса к каждому хосту.
+    """
+
+    start = time.perf_counter()
+    finished: dict[str, float] = {}
+
+    async def worker() -> None:
+        while (url := await queue.get()) is not None:
+            try:
+                async with session.get(url) as response:
+                    await response.read()
+            finally:
+                finished[host_of(url)] = time.perf_counter() - start
+
+                if isinstance(queue, HostQueue):
+                    queue.release(url)
+
+    tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+
+    for url in urls:
+        await queue.put(url)
+
+    if isinstance(queue, HostQueue):
+        queue.close()
+    else:
+        for _ in range(workers):
+            await queue.put(None)
+
+    await asyncio.gather(*tasks)
+    return finished
+
+
+async def performance_comparison(workers: int = 10, limit_per_host: int = 3) -> dict:
+    """
+    Сравнивает общую FIFO-очередь с сессией по умолчанию (как было) и HostQueue с настроенным коннектором
+    на трех локальных серверах: один медленный (300 мс) и два быстрых (5 мс).
+    URL отсортированы по хостам, как это обычно бывает во входных файлах краулера: сначала медленный.
+
+    :param workers: Количество воркеров (общий лимит одновременных запросов).
+    :param limit_per_host: Похостовый лимит для HostQueue.
+    :return: Время (с) завершения каждого хоста для обоих вариантов.
+    """
+
+    from src.asyncio_tasks.local_servers import latency_app, start_app
+
+    delays = {8781: 0.3, 8782: 0.005, 8783: 0.005}
+    counts = {8781: 50, 8782: 500, 8783: 500}
+    runners = [
+        await start_app(latency_app(delay), port) for port, delay in delays.items()
+    ]
+    urls = [
+        f"http://127.0.0.1:{port}/item/{i}"
+        for port, count in counts.items()
+        for i in range(count)
+    ]
+    results = {}
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            results["fifo_queue"] = await _fetch_all(
+                session, urls, workers, asyncio.Queue(maxsize=1000)
+            )
+
+        connector = create_connector(limit=workers, limit_per_host=limit_per_host)
+
+        async with aiohttp.ClientSession(connector=connector) as session:
+            results["host_queue"] = await _fetch_all(
+                session, urls, workers, HostQueue(limit_per_host, maxsize=1000)
+            )
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+    print("Время завершения запросов к хосту, с:")
+    for name, finished in results.items():
+        hosts = ", ".join(f"{host}={t:.2f}" for host, t in sorted(finished.items()))
+        print(f"{name}: {hosts}; всего {max(finished.values()):.2f}")
+
+    return results
+
+
+if __name__ == "__main__":
+    asyncio.run(performance_comparison())
@@ -0,0 +1,334 @@
+"""
+Инструментирование цикла событий для asyncio-конвейеров.
+
+LoopMonitor периодически (раз в report_interval) собирает отчет:
+- задержка цикла событий (на сколько позже запланированного просыпается таймер);
+- количество живых задач по именам;
+- глубина очередей (все, у чего есть qsize());
+- пропускная способность стадий конвейера (событий в секунду и всего);
+- блокировки цикла дольше slow_callback_threshold со стеком вызова, который его держал.
+
+Блокировки ловит поток-сторож: если таймер цикла не срабатывал дольше порога,
+он снимает стек потока цикла через sys._current_frames(). Это дешевле режима отладки asyncio,
+который замеряет каждый колбэк.
+"""
+
+import asyncio
+import collections
+import contextlib
+import json
+import logging
+import re
+import sys
+import threading
+import time
+import traceback
+import typing
+
+logger = logging.getLogger(__name__)
+
+# Суффикс имен задач по умолчанию (Task-12) и пронумерованных задач (worker-3)
+_TASK_SUFFIX = re.compile(r"-\d+$")
+
+
+class LoopMonitor:
+    """
+    Периодические отчеты о состоянии цикла событий, задач, очередей и стадий конвейера.
+
+    Использование::
+
+        async with LoopMonitor(report_path="loop_stats.jsonl") as monitor:
+            monitor.watch_queue("queue_in", queue_in)
+            monitor.count("fetched")
+    """
+
+    def __init__(
+        self,
+        report_interval: float = 5.0,
+        lag_interval: float = 0.01,
+        slow_callback_threshold: float = 0.1,
+        report_path: typing.Optional[str] = None,
+        log_reports: bool = True,
+        max_slow_callbacks: int = 20,
+    ):
+        """
+        :param report_interval: Период отчетов в секундах.
+        :param lag_interval: Период замера задержки цикла в секундах.
+        :param slow_callback_threshold: Длительность блокировки цикла (с), о которой нужно сообщить.
+        :param report_path: JSONL-файл для отчетов, None - не записывать.
+        :param log_reports: Выводить отчеты в лог (уровень INFO).
+        :param max_slow_callbacks: Максимальное количество блокировок в одном отчете.
+        """
+
+        self.report_interval = report_interval
+        self.lag_interval = lag_interval
+        self.slow_callback_threshold = slow_callback_threshold
+        self.report_path = report_path
+        self.log_reports = log_reports
+        self.max_slow_callbacks = max_slow_callbacks
+
+        self.last_report: typing.Optional[dict] = None
+        self._queues: dict[str, typing.Any] = {}
+        self._totals: collections.Counter[str] = collections.Counter()
+        self._total_sources: dict[str, typing.Callable[[], int]] = {}
+        self._previous_totals: dict[str, int] = {}
+        self._lags: list[float] = []
+        self._slow_callbacks: list[dict] = []
+        # Стеки, снятые сторожем во время текущей блокировки: метка такта -> стек
+        self._blocked_stacks: dict[float, list[str]] = {}
+
+        self._tasks: list[asyncio.Task] = []
+        self._watchdog: typing.Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop_thread_id = 0
+        self._heartbeat = time.monotonic()
+        self._last_report_time = time.monotonic()
+
+    def watch_queue(self, name: str, queue: typing.Any) -> None:
+        """
+        Добавляет очередь в отчеты: ее глубина берется через qsize().
+
+        :param name: Имя очереди в отчете.
+        :param queue: asyncio.Queue, HostQueue или другой объект с qsize().
+        """
+
+        self._queues[name] = queue
+
+    def watch_total(self, name: str, func: typing.Callable[[], int]) -> None:
+        """
+        Добавляет стадию, счетчик которой ведет сам компонент (например, BatchedWriter.lines_written).
+
+        :param name: Имя стадии в отчете.
+        :param func: Функция, возвращающая накопленное количество событий стадии.
+        """
+
+        self._total_sources[name] = func
+
+    def count(self, stage: str, n: int = 1) -> None:
+        """
+        Учитывает n событий стадии конвейера.
+
+        :param stage: Имя стадии.
+        :param n: Количество событий.
+        """
+
+        self._totals[stage] += n
+
+    async def _sample_lag(self) -> None:
+        """
+        Замеряет задержку цикла и определяет длительность блокировок.
+        """
+
+        while True:
+            start = time.monotonic()
+            self._heartbeat = start
+            await asyncio.sleep(self.lag_interval)
+            now = time.monotonic()
+            lag = now - start - self.lag_interval
+            self._lags.append(lag)
+
+            if lag >= self.slow_callback_threshold:
+                stack = self._blocked_stacks.pop(start, None)
+
+                if len(self._slow_callbacks) < self.max_slow_callbacks:
+                    self._slow_callbacks.append(
+                        {"duration_ms": round(lag * 1000, 1), "stack": stack or []}
+                    )
+
+            self._blocked_stacks.clear()
+
+    def _watch(self) -> None:
+        """
+        Поток-сторож: снимает стек потока цикла, если таймер не срабатывал дольше порога.
+        """
+
+        while not self._stopped.wait(self.slow_callback_threshold / 2):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self.lag_interval
+
+            if (
+                blocked < self.slow_callback_threshold
+                or heartbeat in self._blocked_stacks
+            ):
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+
+            if frame is not None:
+                self._blocked_stacks[heartbeat] = [
+                    f"{entry.filename}:{entry.lineno} {entry.name}"
+                    for entry in traceback.extract_stack(frame, limit=8)
+                ]
+
+    def _task_counts(self) -> dict[str, int]:
+        """
+        Считает живые задачи по именам без числового суффикса.
+        """
+
+        counts = collections.Counter(
+            _TASK_SUFFIX.sub("", task.get_name()) for task in asyncio.all_tasks()
+        )
+
+        for task in self._tasks:
+            counts[_TASK_SUFFIX.sub("", task.get_name())] -= 1
+        return {name: count for name, count in counts.most_common() if count > 0}
+
+    def report(self) -> dict:
+        """
+        Собирает отчет за время с предыдущего отчета и сбрасывает накопленные замеры.
+        """
+
+        now = time.monotonic()
+        elapsed = max(now - self._last_report_time, 1e-9)
+        self._last_report_time = now
+
+        totals = dict(self._totals)
+        totals.update({name: func() for name, func in self._total_sources.items()})
+        throughput = {
+            name: round((total - self._previous_totals.get(name, 0)) / elapsed, 1)
+            for name, total in totals.items()
+        }
+        self._previous_totals = totals
+
+        lags = sorted(self._lags)
+        self._lags = []
+
+        report = {
+            "time": round(time.time(), 3),
+            "lag_ms": {
+                "max": round(lags[-1] * 1000, 1) if lags else None,
+                "p50": round(lags[len(lags) // 2] * 1000, 1) if lags else None,
+                "p99": round(lags[int(len(lags) * 0.99)] * 1000, 1) if lags else None,
+            },
+            "tasks": self._task_counts(),
+            "queues": {name: queue.qsize() for name, queue in self._queues.items()},
+            "throughput_per_s": throughput,
+            "totals": totals,
+            "slow_callbacks": self._slow_callbacks,
+        }
+        self._slow_callbacks = []
+        self.last_report = report
+        return report
+
+    def _emit(self, report: dict) -> None:
+        """
+        Выводит отчет в лог и/или дописывает его в report_path.
+        Вызывается в пуле потоков, чтобы запись в файл не блокировала цикл событий.
+        """
+
+        line = json.dumps(report, ensure_ascii=False)
+
+        if self.log_reports:
+            logger.info("Состояние цикла событий: %s", line)
+        if self.report_path is not None:
+            with open(self.report_path, "a", encoding="utf-8") as file:
+                file.write(line + "\n")
+
+    async def _report_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.report_interval)
+            await asyncio.to_thread(self._emit, self.report())
+
+    @property
+    def running(self) -> bool:
+        """
+        Замеры запущены (start вызван, stop еще нет).
+        """
+
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        """
+        Запускает замеры в текущем цикле событий. Повторный вызов у запущенного монитора
+        ничего не делает: иначе первые задачи замеров и поток-сторож остались бы без остановки.
+        """
+
+        if self.running:
+            return
+
+        self._loop_thread_id = threading.get_ident()
+        self._last_report_time = time.monotonic()
+        self._stopped.clear()
+        self._tasks = [
+            asyncio.create_task(self._sample_lag(), name="monitor-lag"),
+            asyncio.create_task(self._report_periodically(), name="monitor-report"),
+        ]
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> dict:
+        """
+        Останавливает замеры и выводит итоговый отчет.
+        """
+
+        self._stopped.set()
+
+        for task in self._tasks:
+            task.cancel()
+
+        for task in self._tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+        self._tasks = []
+
+        # stop без start: сторож не запускался
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+        report = self.report()
+        await asyncio.to_thread(self._emit, report)
+        return report
+
+    async def __aenter__(self) -> "LoopMonitor":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+
+async def demo() -> dict:
+    """
+    Конвейер producer -> очередь -> медленные consumers с одной блокирующей операцией
+    (time.sleep на 0.3 с) под LoopMonitor: в отчетах видны рост очереди, пропускная способность
+    стадий и стек блокировки.
+    """
+
+    queue = asyncio.Queue(maxsize=100)
+
+    async def producer() -> None:
+        for i in range(300):
+            await queue.put(i)
+            monitor.count("produced")
+
+            if i == 150:
+                time.sleep(0.3)
+
+    async def consumer() -> None:
+        while True:
+            await queue.get()
+            await asyncio.sleep(0.02)
+            monitor.count("consumed")
+            queue.task_done()
+
+    async with LoopMonitor(report_interval=0.5) as monitor:
+        monitor.watch_queue("queue", queue)
+        consumers = [
+            asyncio.create_task(consumer(), name=f"consumer-{i}") for i in range(5)
+        ]
+        await producer()
+        await queue.join()
+
+        for task in consumers:
+            task.cancel()
+
+    return monitor.last_report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(demo())
@@ -0,0 +1,248 @@
+"""
+Потоковое чтение и разбор JSON-ответов aiohttp.
+
+response.json() читает все тело в память и разбирает его в потоке цикла событий:
+один ответ в несколько МБ останавливает все остальные воркеры на время разбора.
+JsonParser читает тело частями с ограничением размера, небольшие ответы разбирает сразу,
+а большие - в пуле потоков или процессов, опционально оставляя только нужные поля.
+"""
+
+import asyncio
+import concurrent.futures
+import contextlib
+import json
+import statistics
+import time
+import typing
+
+import aiohttp
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Максимальный размер тела ответа по умолчанию
+MAX_BODY_SIZE = 10 * 2**20
+# Размер тела, начиная с которого разбор выполняется вне цикла событий
+OFFLOAD_THRESHOLD = 256 * 2**10
+CHUNK_SIZE = 64 * 2**10
+
+
+class ResponseTooLarge(ValueError):
+    """
+    Тело ответа больше допустимого размера.
+    """
+
+
+def project(obj: typing.Any, fields: typing.Collection[str]) -> typing.Any:
+    """
+    Оставляет в объекте (или в каждом объекте списка) только ключи из fields.
+
+    :param obj: Результат разбора JSON.
+    :param fields: Ключи, которые нужно оставить.
+    """
+
+    if isinstance(obj, dict):
+        return {key: obj[key] for key in fields if key in obj}
+    if isinstance(obj, list):
+        return [project(item, fields) for item in obj]
+    return obj
+
+
+def parse_json(
+    data: bytes, fields: typing.Optional[typing.Collection[str]] = None
+) -> typing.Any:
+    """
+    Разбирает JSON (через orjson, если он установлен) и применяет проекцию полей.
+    Функция уровня модуля, чтобы ее можно было выполнить в ProcessPoolExecutor.
+
+    :param data: Тело ответа.
+    :param fields: Ключи, которые нужно оставить, None - все.
+    """
+
+    obj = orjson.loads(data) if orjson is not None else json.loads(data)
+    return obj if fields is None else project(obj, fields)
+
+
+async def read_body(response: aiohttp.ClientResponse, max_size: int) -> bytes:
+    """
+    Читает тело ответа частями, прерывая чтение, как только оно превысит max_size.
+
+    :param response: Ответ aiohttp.
+    :param max_size: Максимальный размер тела в байтах.
+    :raises ResponseTooLarge: Тело (или заявленный Content-Length) больше max_size.
+    """
+
+    if response.content_length is not None and response.content_length > max_size:
+        raise ResponseTooLarge(
+            f"Content-Length {response.content_length} больше {max_size}"
+        )
+
+    body = bytearray()
+
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        body += chunk
+
+        if len(body) > max_size:
+            raise ResponseTooLarge(f"Тело ответа больше {max_size}")
+
+    return bytes(body)
+
+
+class JsonParser:
+    """
+    Чтение и разбор JSON-ответов с ограничением размера и разбором больших тел вне цикла событий.
+
+    Пул потоков почти не уменьшает задержку цикла: json и orjson держат GIL все время разбора,
+    а сборка мусора созданных объектов все равно идет в основном процессе. Пул процессов
+    разбирает тело параллельно, но результат передается обратно через pickle,
+    поэтому лучше всего он работает вместе с проекцией полей.
+    """
+
+    def __init__(
+        self,
+        max_body_size: int = MAX_BODY_SIZE,
+        offload_threshold: typing.Optional[int] = OFFLOAD_THRESHOLD,
+        fields: typing.Optional[typing.Collection[str]] = None,
+        executor: typing.Optional[concurrent.futures.Executor] = None,
+    ):
+        """
+        :param max_body_size: Максимальный размер тела ответа в байтах.
+        :param offload_threshold: Размер тела, начиная с которого разбор выполняется в executor,
+            None - всегда разбирать в цикле событий.
+        :param fields: Ключи, которые нужно оставить в результате, None - все.
+        :param executor: Пул для разбора больших тел, None - пул потоков по умолчанию.
+        """
+
+        self.max_body_size = max_body_size
+        self.offload_threshold = offload_threshold
+        self.fields = tuple(fields) if fields is not None else None
+        self.executor = executor
+
+    async def parse(self, data: bytes) -> typing.Any:
+        """
+        Разбирает тело ответа: небольшое - сразу, большое - в executor.
+
+        :param data: Тело ответа.
+        """
+
+        if self.offload_threshold is None or len(data) < self.offload_threshold:
+            return parse_json(data, self.fields)
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, parse_json, data, self.fields
+        )
+
+    async def read(self, response: aiohttp.ClientResponse) -> typing.Any:
+        """
+        Читает тело ответа с ограничением размера и разбирает его.
+
+        :param response: Ответ aiohttp.
+        :raises ResponseTooLarge: Тело больше max_body_size.
+        :raises ValueError: Тело не является корректным JSON.
+        """
+
+        return await self.parse(await read_body(response, self.max_body_size))
+
+
+async def _measure_lag(
+    samples: list[float], interval: float = 0.001
+) -> typing.NoReturn:
+    """
+    Записывает в samples, на сколько позже запланированного просыпается цикл событий.
+    """
+
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+
+async def _run_mixed(
+    session: aiohttp.ClientSession,
+    base_url: str,
+    parser: typing.Optional[JsonParser],
+    large: int,
+    small: int,
+) -> dict:
+    """
+    Загружает large больших и small маленьких ответов параллельно, измеряя задержку цикла событий.
+    parser=None - прежний вариант через response.json().
+    """
+
+    async def fetch(path: str) -> typing.Any:
+        async with session.get(base_url + path) as response:
+            if parser is None:
+                return await response.json()
+            return await parser.read(response)
+
+    samples: list[float] = []
+    monitor = asyncio.create_task(_measure_lag(samples))
+    paths = ["/large"] * large + [f"/small/{i}" for i in range(small)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(fetch(path) for path in paths))
+    elapsed = time.perf_counter() - start
+
+    monitor.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await monitor
+
+    samples.sort()
+    return {
+        "total_s": round(elapsed, 2),
+        "lag_max_ms": round(samples[-1] * 1000, 1),
+        "lag_p99_ms": round(samples[int(len(samples) * 0.99)] * 1000, 1),
+        "lag_mean_ms": round(statistics.mean(samples) * 1000, 2),
+    }
+
+
+async def performance_comparison(large: int = 8, small: int = 400) -> dict:
+    """
+    Сравнивает задержку цикла событий при смешанной загрузке больших (~4 МБ) и маленьких
+    JSON-ответов: response.json(), разбор в пуле потоков, в пуле процессов
+    и в пуле процессов с проекцией полей.
+
+    :param large: Количество больших ответов.
+    :param small: Количество маленьких ответов.
+    """
+
+    from src.asyncio_tasks.local_servers import json_payload_app, start_app
+
+    runner = await start_app(json_payload_app(), 8785)
+    base_url = "http://127.0.0.1:8785"
+    results = {}
+
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=4) as processes:
+            variants = {
+                "response_json": None,
+                "thread": JsonParser(),
+                "process": JsonParser(executor=processes),
+                "process_projection": JsonParser(
+                    executor=processes, fields=("id", "price")
+                ),
+            }
+
+            # Прогрев пула процессов, чтобы не учитывать время их запуска
+            await asyncio.get_running_loop().run_in_executor(
+                processes, parse_json, b"{}"
+            )
+
+            async with aiohttp.ClientSession() as session:
+                for name, parser in variants.items():
+                    results[name] = await _run_mixed(
+                        session, base_url, parser, large, small
+                    )
+    finally:
+        await runner.cleanup()
+
+    for name, stats in results.items():
+        print(f"{name}: {stats}")
+
+    return results
+
+
+if __name__ == "__main__":
+    asyncio.run(performance_comparison())
@@ -0,0 +1,139 @@
+"""
+Локальные aiohttp-серверы для бенчмарков асинхронных загрузчиков URL.
+
+Каждый сервер слушает свой порт, поэтому для клиента это отдельный хост (host:port).
+"""
+
+import asyncio
+import json
+import random
+
+from aiohttp import web
+
+
+def latency_app(delay: float) -> web.Application:
+    """
+    Приложение, отвечающее JSON-ом с фиксированной задержкой.
+
+    :param delay: Задержка ответа в секундах.
+    """
+
+    async def handler(request: web.Request) -> web.Response:
+        await asyncio.sleep(delay)
+        return web.json_response({"path": request.path_qs, "delay": delay})
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+    return app
+
+
+async def start_app(
+    app: web.Application, port: int, host: str = "127.0.0.1"
+) -> web.AppRunner:
+    """
+    Запускает приложение в текущем цикле событий.
+
+    :param app: aiohttp-приложение.
+    :param port: Порт для прослушивания.
+    :param host: Адрес для прослушивания.
+    :return: AppRunner, который нужно остановить через cleanup().
+    """
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def degrading_app(capacity: int, delay: float = 0.01) -> web.Application:
+    """
+    Приложение, которое деградирует под нагрузкой: при числе одновременных запросов
+    больше capacity задержка растет квадратично от перегрузки, а при двукратной перегрузке
+    сервер отвечает 503.
+
+    :param capacity: Число одновременных запросов, которое сервер обслуживает без деградации.
+    :param delay: Задержка ответа без перегрузки в секундах.
+    """
+
+    in_flight = 0
+
+    async def handler(request: web.Request) -> web.Response:
+        nonlocal in_flight
+
+        in_flight += 1
+
+        try:
+            if in_flight > 2 * capacity:
+                return web.json_response({"error": "overloaded"}, status=503)
+
+            await asyncio.sleep(delay * max(1.0, in_flight / capacity) ** 2)
+            return web.json_response({"path": request.path_qs})
+        finally:
+            in_flight -= 1
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+    return app
+
+
+def json_payload_app(large_items: int = 50_000) -> web.Application:
+    """
+    Приложение с JSON-ответами разного размера: /large - список из large_items объектов
+    (несколько МБ), остальные пути - небольшой объект.
+
+    :param large_items: Количество объектов в большом ответе.
+    """
+
+    large_body = json.dumps(
+        [
+            {"id": i, "name": f"item-{i}", "price": i * 1.5, "tags": ["a", "b", "c"]}
+            for i in range(large_items)
+        ]
+    ).encode()
+
+    async def handler(request: web.Request) -> web.Response:
+        if request.path == "/large":
+            return web.Response(body=large_body, content_type="application/json")
+        return web.json_response({"id": 0, "name": request.path, "price": 1.0})
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+    return app
+
+
+def faulty_app(
+    error_rate: float = 0.3,
+    reset_rate: float = 0.1,
+    hang: bool = False,
+    seed: int = 0,
+) -> web.Application:
+    """
+    Приложение с внедрением сбоев: с вероятностью error_rate отвечает 503,
+    с вероятностью reset_rate обрывает соединение без ответа, иначе отвечает JSON-ом.
+    С hang=True не отвечает вовсе (имитация зависшего хоста).
+
+    :param error_rate: Доля ответов 503.
+    :param reset_rate: Доля оборванных соединений.
+    :param hang: Никогда не отвечать.
+    :param seed: Начальное значение генератора случайных чисел.
+    """
+
+    rng = random.Random(seed)
+
+    async def handler(request: web.Request) -> web.Response:
+        if hang:
+            await asyncio.sleep(3600)
+
+        roll = rng.random()
+
+        if roll < error_rate:
+            return web.json_response({"error": "unavailable"}, status=503)
+        if roll < error_rate + reset_rate:
+            request.transport.close()
+            return web.Response()
+
+        return web.json_response({"path": request.path_qs})
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+    return app
@@ -0,0 +1,482 @@
+"""
+Повторы запросов и автоматические выключатели (circuit breaker) для асинхронных загрузчиков URL.
+
+- RetryPolicy - число повторов и пауза между ними: экспоненциальная с полным разбросом (full jitter),
+  чтобы повторы многих воркеров не приходили на upstream одновременно.
+- RetryBudget - доля повторов от общего числа запросов: при массовых сбоях повторы
+  не умножают нагрузку на upstream.
+- CircuitBreaker - после серии сбоев хоста запросы к нему сразу завершаются ошибкой,
+  а через recovery_timeout пробный запрос проверяет, восстановился ли хост.
+"""
+
+import asyncio
+import collections
+import random
+import time
+import typing
+
+import aiohttp
+
+from src.asyncio_tasks.adaptive_limiter import OVERLOAD_STATUSES
+from src.asyncio_tasks.host_scheduling import host_of
+
+T = typing.TypeVar("T")
+
+
+class CircuitOpenError(aiohttp.ClientError):
+    """
+    Запрос не выполнялся: выключатель хоста разомкнут.
+    """
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Проверяет, имеет ли смысл повторить запрос после ошибки: таймауты, сетевые ошибки,
+    оборванные ответы и статусы из OVERLOAD_STATUSES.
+
+    :param error: Исключение, возникшее при запросе.
+    """
+
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in OVERLOAD_STATUSES
+    return isinstance(
+        error,
+        (
+            asyncio.TimeoutError,
+            aiohttp.ClientConnectionError,
+            aiohttp.ClientPayloadError,
+        ),
+    )
+
+
+class RetryPolicy:
+    """
+    Количество повторов и паузы между ними.
+    """
+
+    def __init__(
+        self, retries: int = 3, base_delay: float = 0.1, max_delay: float = 5.0
+    ):
+        """
+        :param retries: Количество повторов после первой попытки.
+        :param base_delay: Базовая пауза в секундах.
+        :param max_delay: Максимальная пауза в секундах.
+        """
+
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """
+        Пауза перед повтором номер attempt (с 0): случайная от 0 до base_delay * 2**attempt.
+
+        :param attempt: Номер повтора.
+        """
+
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+class RetryBudget:
+    """
+    Бюджет повторов: каждый запрос добавляет ratio токена, каждый повтор тратит один.
+    Кроме того, бюджет пополняется на min_per_second токенов в секунду,
+    чтобы при малом числе запросов повторы оставались возможны.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.2,
+        min_per_second: float = 10.0,
+        max_tokens: float = 100.0,
+    ):
+        """
+        :param ratio: Доля повторов от числа запросов.
+        :param min_per_second: Гарантированное количество повторов в секунду.
+        :param max_tokens: Максимальный запас токенов.
+        """
+
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+
+        self._tokens = max_tokens
+        self._updated = time.monotonic()
+        self.exhausted = 0
+
+    def _refill(self, amount: float = 0.0) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.max_tokens,
+            self._tokens + amount + (now - self._updated) * self.min_per_second,
+        )
+        self._updated = now
+
+    def record_request(self) -> None:
+        """
+        Учитывает новый запрос (не повтор).
+        """
+
+        self._refill(self.ratio)
+
+    def try_retry(self) -> bool:
+        """
+        Тратит токен на повтор. Возвращает False, если бюджет исчерпан.
+        """
+
+        self._refill()
+
+        if self._tokens < 1:
+            self.exhausted += 1
+            return False
+
+        self._tokens -= 1
+        return True
+
+
+class CircuitBreaker:
+    """
+    Выключатель одного хоста.
+
+    closed - запросы выполняются; если среди последних window попыток (но не меньше min_calls)
+    доля сбоев достигает failure_rate, выключатель размыкается. Доля, а не число сбоев подряд:
+    нестабильный хост с частыми ошибками продолжает обслуживаться с повторами.
+    open - запросы сразу завершаются ошибкой, через recovery_timeout выключатель становится half_open.
+    half_open - выполняется не больше half_open_max_calls пробных запросов:
+    успех замыкает выключатель, сбой снова размыкает.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        window: int = 50,
+        min_calls: int = 20,
+        recovery_timeout: float = 10.0,
+        half_open_max_calls: int = 1,
+    ):
+        """
+        :param failure_rate: Доля сбоев, размыкающая выключатель.
+        :param window: Количество последних попыток, по которым считается доля сбоев.
+        :param min_calls: Минимальное количество попыток для размыкания.
+        :param recovery_timeout: Время (с) в состоянии open до пробного запроса.
+        :param half_open_max_calls: Количество одновременных пробных запросов.
+        """
+
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = self.CLOSED
+        # Исходы последних попыток: True - сбой
+        self._outcomes: collections.deque[bool] = collections.deque(maxlen=window)
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+    @property
+    def state(self) -> str:
+        """
+        Текущее состояние: closed, open или half_open.
+        """
+
+        if (
+            self._state == self.OPEN
+            and time.monotonic() - self._opened_at >= self.recovery_timeout
+        ):
+            self._state = self.HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def allow(self) -> bool:
+        """
+        Проверяет, можно ли выполнить запрос. В состоянии half_open занимает слот пробного запроса,
+        который освобождается в record_success, record_failure или release.
+        """
+
+        state = self.state
+
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and self._probes < self.half_open_max_calls:
+            self._probes += 1
+            return True
+        return False
+
+    def _record(self, failed: bool) -> None:
+        """
+        Добавляет исход попытки в окно.
+        """
+
+        if len(self._outcomes) == self._outcomes.maxlen:
+            self._failures -= self._outcomes[0]
+        self._outcomes.append(failed)
+        self._failures += failed
+
+    def record_success(self) -> None:
+        """
+        Учитывает успешную попытку. Успешный пробный запрос замыкает выключатель.
+        """
+
+        if self._state == self.HALF_OPEN:
+            self._state = self.CLOSED
+            self._outcomes.clear()
+            self._failures = 0
+        elif self._state == self.CLOSED:
+            self._record(False)
+
+    def record_failure(self) -> None:
+        """
+        Учитывает сбой: размыкает выключатель при доле сбоев не ниже failure_rate
+        или после неудачного пробного запроса.
+        """
+
+        if self._state == self.HALF_OPEN:
+            self._open()
+        elif self._state == self.CLOSED:
+            self._record(True)
+
+            if len(
+                self._outcomes
+            ) >= self.min_calls and self._failures >= self.failure_rate * len(
+                self._outcomes
+            ):
+                self._open()
+
+    def _open(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self._failures = 0
+
+    def release(self) -> None:
+        """
+        Освобождает слот пробного запроса, завершившегося без результата (например, отмененного).
+        """
+
+        if self._state == self.HALF_OPEN and self._probes:
+            self._probes -= 1
+
+
+class CircuitBreakers:
+    """
+    Выключатели по хостам.
+    """
+
+    def __init__(self, **breaker_options):
+        """
+        :param breaker_options: Параметры CircuitBreaker.
+        """
+
+        self._options = breaker_options
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, url: str) -> CircuitBreaker:
+        """
+        Возвращает выключатель хоста URL.
+
+        :param url: URL-адрес.
+        """
+
+        host = host_of(url)
+        breaker = self._breakers.get(host)
+
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(**self._options)
+        return breaker
+
+    def states(self) -> dict[str, str]:
+        """
+        Возвращает состояния выключателей по хостам.
+        """
+
+        return {host: breaker.state for host, breaker in self._breakers.items()}
+
+
+async def call_with_retries(
+    url: str,
+    func: typing.Callable[[], typing.Awaitable[T]],
+    policy: typing.Optional[RetryPolicy] = None,
+    budget: typing.Optional[RetryBudget] = None,
+    breakers: typing.Optional[CircuitBreakers] = None,
+) -> T:
+    """
+    Выполняет запрос к URL с повторами по policy в пределах budget через выключатель хоста.
+
+    :param url: URL-адрес (по нему выбирается выключатель).
+    :param func: Функция без аргументов, возвращающая корутину одной попытки запроса.
+    :param policy: Политика повторов, None - без повторов.
+    :param budget: Общий бюджет повторов, None - без ограничения.
+    :param breakers: Выключатели по хостам, None - без выключателя.
+    :raises CircuitOpenError: Выключатель хоста разомкнут.
+    :return: Результат первой успешной попытки. Ошибка последней попытки пробрасывается.
+    """
+
+    breaker = breakers.get(url) if breakers is not None else None
+    retries = policy.retries if policy is not None else 0
+    attempt = 0
+
+    if budget is not None:
+        budget.record_request()
+
+    while True:
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError(f"Выключатель хоста {host_of(url)} разомкнут")
+
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            if breaker is not None:
+                breaker.release()
+            raise
+        except Exception as e:
+            retryable = is_retryable(e)
+
+            if breaker is not None:
+                # Ошибки, не связанные с доступностью хоста, не размыкают выключатель
+                if retryable:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+
+            if (
+                not retryable
+                or attempt >= retries
+                or (budget is not None and not budget.try_retry())
+            ):
+                raise
+
+            await asyncio.sleep(policy.delay(attempt))
+            attempt += 1
+        else:
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+
+class Retrier:
+    """
+    Общие для пула воркеров политика повторов, бюджет и выключатели хостов.
+    """
+
+    def __init__(
+        self,
+        policy: typing.Optional[RetryPolicy] = None,
+        budget: typing.Optional[RetryBudget] = None,
+        breakers: typing.Optional[CircuitBreakers] = None,
+    ):
+        """
+        :param policy: Политика повторов, None - RetryPolicy() по умолчанию.
+        :param budget: Бюджет повторов, None - RetryBudget() по умолчанию.
+        :param breakers: Выключатели по хостам, None - CircuitBreakers() по умолчанию.
+        """
+
+        self.policy = policy if policy is not None else RetryPolicy()
+        self.budget = budget if budget is not None else RetryBudget()
+        self.breakers = breakers if breakers is not None else CircuitBreakers()
+
+    async def call(self, url: str, func: typing.Callable[[], typing.Awaitable[T]]) -> T:
+        """
+        Выполняет call_with_retries с настройками Retrier.
+
+        :param url: URL-адрес.
+        :param func: Функция без аргументов, возвращающая корутину одной попытки запроса.
+        """
+
+        return await call_with_retries(
+            url, func, self.policy, self.budget, self.breakers
+        )
+
+
+async def _run_load(
+    session: aiohttp.ClientSession,
+    urls: list[str],
+    workers: int,
+    policy: typing.Optional[RetryPolicy],
+    budget: typing.Optional[RetryBudget],
+    breakers: typing.Optional[CircuitBreakers],
+) -> dict:
+    """
+    Загружает URL пулом воркеров через call_with_retries и считает исходы.
+    """
+
+    remaining = iter(urls)
+    stats = {"ok": 0, "failed": 0, "circuit_open": 0, "attempts": 0}
+    timeout = aiohttp.ClientTimeout(total=1)
+
+    async def worker() -> None:
+        for url in remaining:
+
+            async def attempt() -> None:
+                stats["attempts"] += 1
+
+                async with session.get(
+                    url, timeout=timeout, raise_for_status=True
+                ) as response:
+                    await response.read()
+
+            try:
+                await call_with_retries(url, attempt, policy, budget, breakers)
+                stats["ok"] += 1
+            except CircuitOpenError:
+                stats["circuit_open"] += 1
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                stats["failed"] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    stats["total_s"] = round(time.perf_counter() - start, 2)
+    return stats
+
+
+async def performance_comparison(workers: int = 20) -> dict:
+    """
+    Сравнивает загрузку без повторов, с повторами и с повторами и выключателем
+    на двух локальных серверах: нестабильном (20% ответов 503, 5% обрывов соединения)
+    и зависшем (не отвечает, каждый запрос ждет таймаута 1 с).
+
+    :param workers: Количество воркеров.
+    """
+
+    from src.asyncio_tasks.local_servers import faulty_app, start_app
+
+    runners = [
+        await start_app(faulty_app(error_rate=0.2, reset_rate=0.05), 8786),
+        await start_app(faulty_app(hang=True), 8787),
+    ]
+    urls = [f"http://127.0.0.1:8786/item/{i}" for i in range(500)]
+    # Зависший хост встречается во входных данных наравне с остальными
+    urls[::5] = [f"http://127.0.0.1:8787/item/{i}" for i in range(100)]
+    variants = {
+        "no_retries": lambda: (None, None, None),
+        "retries": lambda: (RetryPolicy(retries=3), RetryBudget(), None),
+        "retries_breaker": lambda: (
+            RetryPolicy(retries=3),
+            RetryBudget(),
+            CircuitBreakers(recovery_timeout=2.0),
+        ),
+    }
+    results = {}
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            for name, make in variants.items():
+                results[name] = await _run_load(session, urls, workers, *make())
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+    for name, stats in results.items():
+        print(f"{name}: {stats}")
+
+    return results
+
+
+if __name__ == "__main__":
+    asyncio.run(performance_comparison())
@@ -0,0 +1,268 @@
+"""
+Запуск async_http_request_advanced.fetch_urls на uvloop и в нескольких процессах.
+
+Один цикл событий использует одно ядро: разбор JSON, сериализация и учет задач упираются в него.
+fetch_urls_sharded делит входной файл на диапазоны байтов по границам строк, каждый процесс
+обрабатывает свой диапазон в своем цикле событий со своим writer и контрольной точкой,
+а затем выходные файлы шардов склеиваются в один.
+
+async_http_request_advanced (и aiohttp) импортируется только там, где выполняется загрузка:
+родительский процесс fetch_urls_sharded только делит файл и склеивает результаты.
+"""
+
+import asyncio
+import concurrent.futures
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+import typing
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+def uvloop_available() -> bool:
+    """
+    Проверяет, установлен ли uvloop.
+    """
+
+    return uvloop is not None
+
+
+def run_event_loop(
+    coro: typing.Coroutine[typing.Any, typing.Any, typing.Any], use_uvloop: bool = True
+) -> typing.Any:
+    """
+    Выполняет корутину в новом цикле событий: uvloop, если он установлен и use_uvloop=True,
+    иначе стандартный asyncio.
+
+    :param coro: Корутина.
+    :param use_uvloop: Использовать uvloop, если он установлен.
+    """
+
+    loop_factory = uvloop.new_event_loop if use_uvloop and uvloop else None
+
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        return runner.run(coro)
+
+
+def byte_ranges(path: str, shards: int) -> list[tuple[int, int]]:
+    """
+    Делит файл на shards диапазонов байтов примерно равного размера по границам строк.
+
+    :param path: Путь к файлу.
+    :param shards: Количество диапазонов.
+    :return: Список непустых диапазонов [start, end).
+    """
+
+    size = os.path.getsize(path)
+    bounds = [0]
+
+    with open(path, "rb") as file:
+        for i in range(1, shards):
+            file.seek(max(size * i // shards, bounds[-1]))
+
+            # Граница переносится на начало следующей строки
+            if file.tell() > 0:
+                file.seek(file.tell() - 1)
+                file.readline()
+
+            bounds.append(min(file.tell(), size))
+
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+
+
+def merge_outputs(parts: list[str], output_file: str, append: bool = False) -> None:
+    """
+    Склеивает выходные файлы шардов в один и удаляет их.
+    Сжатые файлы тоже склеиваются побайтово: gzip-members и zstd-frames читаются подряд.
+
+    :param parts: Выходные файлы шардов.
+    :param output_file: Итоговый файл.
+    :param append: Дописывать в существующий итоговый файл.
+    """
+
+    with open(output_file, "ab" if append else "wb") as output:
+        for part in parts:
+            if not os.path.exists(part):
+                continue
+
+            with open(part, "rb") as file:
+                shutil.copyfileobj(file, output, 1 << 20)
+            os.remove(part)
+
+
+def _run_shard(
+    input_file: str,
+    output_file: str,
+    byte_range: tuple[int, int],
+    use_uvloop: bool,
+    options: dict,
+) -> None:
+    """
+    Точка входа процесса-шарда.
+    """
+
+    from src.asyncio_tasks.async_http_request_advanced import (
+        configure_logging,
+        fetch_urls,
+    )
+
+    configure_logging()
+    run_event_loop(
+        fetch_urls(input_file, output_file, byte_range=byte_range, **options),
+        use_uvloop,
+    )
+
+
+def fetch_urls_sharded(
+    input_file: str,
+    output_file: str,
+    processes: typing.Optional[int] = None,
+    use_uvloop: bool = True,
+    resume: bool = False,
+    **options,
+) -> None:
+    """
+    Загружает URL из input_file в processes процессах и склеивает результаты в output_file.
+
+    Каждый шард пишет в output_file.shardN с контрольной точкой output_file.shardN.checkpoint,
+    поэтому возобновление (resume=True) работает при том же количестве процессов.
+    Повторы URL отбрасываются только внутри шарда. Лимиты (max_concurrent, limit_per_host)
+    действуют в каждом процессе отдельно.
+
+    :param input_file: Имя файла с входными URL.
+    :param output_file: Имя итогового файла результатов.
+    :param processes: Количество процессов, None - количество ядер.
+    :param use_uvloop: Использовать uvloop, если он установлен.
+    :param resume: Продолжить прерванную загрузку по контрольным точкам шардов.
+    :param options: Остальные параметры fetch_urls (должны сериализоваться через pickle).
+    """
+
+    ranges = byte_ranges(input_file, processes or os.cpu_count() or 1)
+    parts = [f"{output_file}.shard{i}" for i in range(len(ranges))]
+
+    # spawn: дочерний процесс не наследует цикл событий и потоки родителя
+    with concurrent.futures.ProcessPoolExecutor(
+        len(ranges), mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        futures = [
+            executor.submit(
+                _run_shard,
+                input_file,
+                part,
+                byte_range,
+                use_uvloop,
+                {**options, "resume": resume},
+            )
+            for part, byte_range in zip(parts, ranges)
+        ]
+
+        for future in futures:
+            future.result()
+
+    merge_outputs(parts, output_file, append=resume)
+
+
+def _serve(ports: list[int], large_items: int) -> None:
+    """
+    Точка входа процесса с локальными серверами для бенчмарка.
+    """
+
+    from src.asyncio_tasks.local_servers import json_payload_app, start_app
+
+    async def serve() -> None:
+        for port in ports:
+            await start_app(json_payload_app(large_items), port)
+        await asyncio.Event().wait()
+
+    run_event_loop(serve())
+
+
+def performance_comparison(
+    total: int = 20_000,
+    shard_counts: typing.Sequence[int] = (1, 2, 4),
+    large_items: int = 200,
+) -> dict:
+    """
+    Сравнивает пропускную способность (URL/с) fetch_urls на asyncio и uvloop в одном процессе
+    и fetch_urls_sharded на нескольких процессах. Локальные серверы (4 порта) работают
+    в отдельном процессе и отдают JSON ~15 КБ, чтобы разбор нагружал клиент.
+
+    :param total: Количество URL.
+    :param shard_counts: Количества процессов для шардированного режима.
+    :param large_items: Количество объектов в ответе.
+    """
+
+    from src.asyncio_tasks.async_http_request_advanced import fetch_urls
+
+    ports = [8790, 8791, 8792, 8793]
+    input_file, output_file = "bench_urls.txt", "bench_results.jsonl"
+
+    with open(input_file, "w") as file:
+        file.writelines(
+            f"http://127.0.0.1:{ports[i % len(ports)]}/large?i={i}\n"
+            for i in range(total)
+        )
+
+    server = multiprocessing.get_context("spawn").Process(
+        target=_serve, args=(ports, large_items), daemon=True
+    )
+    server.start()
+    time.sleep(2)
+
+    options = {"max_concurrent": 50, "limit_per_host": 20}
+    variants: dict[str, typing.Callable[[], None]] = {
+        "asyncio_1": lambda: run_event_loop(
+            fetch_urls(input_file, output_file, **options), use_uvloop=False
+        ),
+    }
+
+    if uvloop_available():
+        variants["uvloop_1"] = lambda: run_event_loop(
+            fetch_urls(input_file, output_file, **options)
+        )
+
+    for shards in shard_counts:
+        if shards > 1:
+            variants[f"sharded_{shards}"] = lambda shards=shards: fetch_urls_sharded(
+                input_file, output_file, shards, **options
+            )
+
+    results = {}
+
+    try:
+        for name, run in variants.items():
+            start = time.perf_counter()
+            run()
+            results[name] = round(total / (time.perf_counter() - start))
+    finally:
+        server.terminate()
+
+        for path in (input_file, output_file, f"{output_file}.checkpoint"):
+            if os.path.exists(path):
+                os.remove(path)
+
+        for shards in shard_counts:
+            for i in range(shards):
+                path = f"{output_file}.shard{i}.checkpoint"
+                if os.path.exists(path):
+                    os.remove(path)
+
+    print(f"Ядер: {os.cpu_count()}, uvloop: {uvloop_available()}, Python {sys.version}")
+    for name, urls_per_second in results.items():
+        print(f"{name}: {urls_per_second} URL/с")
+
+    return results
+
+
+if __name__ == "__main__":
+    from src.asyncio_tasks.async_http_request_advanced import configure_logging
+
+    configure_logging()
+    performance_comparison()
@@ -0,0 +1,435 @@
+"""
+Утилиты для групп задач с ограниченной конкурентностью.
+
+Обобщают приемы из common_async_tasks_1_20 (семафор, asyncio.wait(FIRST_COMPLETED), очередь воркеров)
+так, чтобы память не росла с размером входных данных:
+
+- as_completed / bounded_map - не больше limit задач одновременно над (асинхронным) итератором,
+  результаты по мере готовности или по порядку входных данных;
+- hedged - запасной запрос, если первый не ответил за перцентиль задержки;
+- first_success - гонка альтернатив: первый успешный результат, остальные отменяются;
+- BoundedTaskGroup - asyncio.TaskGroup с лимитом одновременно работающих задач.
+
+При выходе из генераторов (в т.ч. по исключению или break внутри contextlib.aclosing)
+незавершенные задачи отменяются, и генератор дожидается их завершения.
+"""
+
+import asyncio
+import bisect
+import collections
+import contextlib
+import time
+import tracemalloc
+import typing
+
+T = typing.TypeVar("T")
+R = typing.TypeVar("R")
+
+AnyIterable = typing.Union[typing.Iterable[T], typing.AsyncIterable[T]]
+
+
+async def _aiter(items: AnyIterable[T]) -> typing.AsyncIterator[T]:
+    """
+    Приводит обычный или асинхронный итератор к асинхронному, не читая его целиком.
+    """
+
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def _cancel_and_wait(tasks: typing.Iterable[asyncio.Future]) -> None:
+    """
+    Отменяет задачи и дожидается их завершения, забирая исключения, чтобы asyncio не сообщал о них.
+    """
+
+    tasks = list(tasks)
+
+    for task in tasks:
+        task.cancel()
+
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _result(task: asyncio.Future, return_exceptions: bool) -> typing.Any:
+    """
+    Возвращает результат задачи или, при return_exceptions=True, ее исключение.
+    """
+
+    try:
+        return task.result()
+    except Exception as e:
+        if return_exceptions:
+            return e
+        raise
+
+
+async def _bounded(
+    aws: AnyIterable[typing.Awaitable[T]],
+    limit: int,
+    ordered: bool,
+    return_exceptions: bool,
+) -> typing.AsyncIterator[T]:
+    """
+    Общая реализация as_completed и bounded_map: окно из limit задач над итератором awaitable.
+    В режиме ordered готовые результаты ждут своей очереди в буфере, который входит в то же окно.
+    """
+
+    iterator = _aiter(aws)
+    exhausted = False
+    pending: dict[asyncio.Future, int] = {}
+    # Завершенные задачи, ожидающие выдачи: номер во входных данных -> задача
+    ready: dict[int, asyncio.Future] = {}
+    index = next_index = 0
+
+    try:
+        while True:
+            while not exhausted and len(pending) + len(ready) < limit:
+                try:
+                    aw = await anext(iterator)
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+
+                pending[asyncio.ensure_future(aw)] = index
+                index += 1
+
+            if not pending:
+                return
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                ready[pending.pop(task)] = task
+
+            if ordered:
+                while next_index in ready:
+                    yield _result(ready.pop(next_index), return_exceptions)
+                    next_index += 1
+            else:
+                while ready:
+                    yield _result(ready.popitem()[1], return_exceptions)
+    finally:
+        await _cancel_and_wait(list(pending) + list(ready.values()))
+        await iterator.aclose()
+
+
+def as_completed(
+    aws: AnyIterable[typing.Awaitable[T]],
+    limit: int = 100,
+    return_exceptions: bool = False,
+) -> typing.AsyncIterator[T]:
+    """
+    Выполняет awaitable из (асинхронного) итератора, не больше limit одновременно,
+    и выдает результаты по мере готовности. Итератор читается по мере освобождения окна,
+    поэтому корутины стоит передавать генератором, а не списком.
+
+    Первое исключение отменяет остальные задачи и пробрасывается,
+    при return_exceptions=True исключения выдаются как результаты.
+
+    :param aws: Итератор корутин, задач или future.
+    :param limit: Максимальное количество одновременно выполняемых задач.
+    :param return_exceptions: Выдавать исключения как результаты.
+    """
+
+    return _bounded(aws, limit, False, return_exceptions)
+
+
+async def bounded_map(
+    func: typing.Callable[[T], typing.Awaitable[R]],
+    items: AnyIterable[T],
+    limit: int = 100,
+    ordered: bool = False,
+    return_exceptions: bool = False,
+) -> typing.AsyncIterator[R]:
+    """
+    Асинхронный map с ограничением конкурентности: func(item) для каждого элемента items,
+    не больше limit одновременно. Память - O(limit) независимо от размера items.
+
+    :param func: Асинхронная функция одного аргумента.
+    :param items: Итерируемый (в т.ч. асинхронно) объект с аргументами.
+    :param limit: Размер окна: одновременные задачи плюс готовые результаты, ждущие очереди.
+    :param ordered: Выдавать результаты в порядке items.
+    :param return_exceptions: Выдавать исключения как результаты.
+    """
+
+    aws = (func(item) async for item in _aiter(items))
+
+    async with contextlib.aclosing(
+        _bounded(aws, limit, ordered, return_exceptions)
+    ) as results:
+        async for result in results:
+            yield result
+
+
+class LatencyTracker:
+    """
+    Скользящее окно последних задержек для вычисления перцентилей.
+    """
+
+    def __init__(self, window: int = 1000):
+        """
+        :param window: Количество последних замеров в окне.
+        """
+
+        self._window: collections.deque[float] = collections.deque(maxlen=window)
+        self._sorted: list[float] = []
+
+    def __len__(self) -> int:
+        return len(self._window)
+
+    def record(self, latency: float) -> None:
+        """
+        Добавляет замер задержки.
+
+        :param latency: Задержка в секундах.
+        """
+
+        if len(self._window) == self._window.maxlen:
+            oldest = self._window[0]
+            del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+
+        self._window.append(latency)
+        bisect.insort(self._sorted, latency)
+
+    def percentile(self, p: float) -> typing.Optional[float]:
+        """
+        Возвращает перцентиль задержки или None, если замеров нет.
+
+        :param p: Перцентиль от 0 до 1.
+        """
+
+        if not self._sorted:
+            return None
+        return self._sorted[min(int(len(self._sorted) * p), len(self._sorted) - 1)]
+
+
+async def hedged(
+    func: typing.Callable[[], typing.Awaitable[T]],
+    delay: typing.Optional[float] = None,
+    tracker: typing.Optional[LatencyTracker] = None,
+    percentile: float = 0.95,
+    min_samples: int = 20,
+    max_attempts: int = 2,
+) -> T:
+    """
+    Хеджированный запрос: если попытка не завершилась за delay, параллельно запускается следующая.
+    Возвращается первый успешный результат, остальные попытки отменяются.
+    Ошибка попытки сразу запускает следующую, если попытки еще остались.
+
+    :param func: Функция без аргументов, возвращающая корутину одной попытки.
+    :param delay: Задержка перед запасной попыткой в секундах.
+    :param tracker: Задержки успешных попыток: при delay=None задержка берется как percentile из него.
+    :param percentile: Перцентиль задержки для запуска запасной попытки.
+    :param min_samples: Сколько замеров нужно в tracker, прежде чем хеджировать.
+    :param max_attempts: Максимальное количество попыток, включая первую.
+    :return: Результат первой успешной попытки. Если все попытки неудачны, пробрасывается ошибка последней.
+    """
+
+    if delay is None and tracker is not None and len(tracker) >= min_samples:
+        delay = tracker.percentile(percentile)
+
+    loop = asyncio.get_running_loop()
+    started: dict[asyncio.Future, float] = {}
+    attempts = 0
+
+    def launch() -> None:
+        nonlocal attempts
+        attempts += 1
+        started[asyncio.ensure_future(func())] = loop.time()
+
+    launch()
+
+    try:
+        while True:
+            can_hedge = delay is not None and attempts < max_attempts
+            done, _ = await asyncio.wait(
+                started,
+                timeout=delay if can_hedge else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+
+            if not done:
+                launch()
+                continue
+
+            for task in done:
+                start = started.pop(task)
+
+                if task.exception() is None:
+                    if tracker is not None:
+                        tracker.record(loop.time() - start)
+                    return task.result()
+
+                error = task.exception()
+
+            if not started:
+                if attempts >= max_attempts:
+                    raise error
+                launch()
+            elif attempts < max_attempts:
+                launch()
+    finally:
+        await _cancel_and_wait(started)
+
+
+async def first_success(*funcs: typing.Callable[[], typing.Awaitable[T]]) -> T:
+    """
+    Запускает все альтернативы одновременно и возвращает первый успешный результат,
+    отменяя остальные.
+
+    :param funcs: Функции без аргументов, возвращающие корутины.
+    :raises ValueError: Не передано ни одной альтернативы.
+    :raises ExceptionGroup: Все альтернативы завершились ошибкой.
+    """
+
+    if not funcs:
+        raise ValueError("first_success требует хотя бы одну альтернативу")
+
+    pending = {asyncio.ensure_future(func()) for func in funcs}
+    errors = []
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                errors.append(task.exception())
+    finally:
+        await _cancel_and_wait(pending)
+
+    raise ExceptionGroup("Все альтернативы завершились ошибкой", errors)
+
+
+class BoundedTaskGroup:
+    """
+    asyncio.TaskGroup с ограничением одновременно работающих задач.
+
+    spawn ждет свободного слота до создания задачи, поэтому цикл, порождающий задачи,
+    не создает их больше limit. Ошибка задачи отменяет остальные (семантика TaskGroup),
+    выход из async with дожидается всех задач.
+    """
+
+    def __init__(self, limit: int):
+        """
+        :param limit: Максимальное количество одновременно работающих задач.
+        """
+
+        self._group = asyncio.TaskGroup()
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def __aenter__(self) -> "BoundedTaskGroup":
+        await self._group.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info) -> typing.Optional[bool]:
+        return await self._group.__aexit__(*exc_info)
+
+    async def spawn(
+        self,
+        coro: typing.Coroutine[typing.Any, typing.Any, T],
+        name: typing.Optional[str] = None,
+    ) -> "asyncio.Task[T]":
+        """
+        Ждет свободного слота и запускает корутину в группе.
+
+        :param coro: Корутина.
+        :param name: Имя задачи.
+        """
+
+        try:
+            await self._semaphore.acquire()
+        except BaseException:
+            coro.close()
+            raise
+
+        try:
+            task = self._group.create_task(coro, name=name)
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+        task.add_done_callback(lambda _: self._semaphore.release())
+        return task
+
+
+async def _work(i: int) -> int:
+    await asyncio.sleep(0)
+    return i
+
+
+async def _run_gather(count: int, limit: int) -> None:
+    await asyncio.gather(*(_work(i) for i in range(count)))
+
+
+async def _run_task_group(count: int, limit: int) -> None:
+    async with asyncio.TaskGroup() as group:
+        for i in range(count):
+            group.create_task(_work(i))
+
+
+async def _run_as_completed(count: int, limit: int) -> None:
+    async for _ in as_completed((_work(i) for i in range(count)), limit):
+        pass
+
+
+async def _run_bounded_map(count: int, limit: int) -> None:
+    async for _ in bounded_map(_work, range(count), limit, ordered=True):
+        pass
+
+
+async def _run_bounded_task_group(count: int, limit: int) -> None:
+    async with BoundedTaskGroup(limit) as group:
+        for i in range(count):
+            await group.spawn(_work(i))
+
+
+async def performance_comparison(count: int = 100_000, limit: int = 1000) -> dict:
+    """
+    Измеряет накладные расходы на задачу (мкс) и пиковую память (МБ)
+    для gather, TaskGroup и утилит модуля на count тривиальных корутин.
+
+    :param count: Количество задач.
+    :param limit: Ограничение конкурентности для утилит модуля.
+    """
+
+    variants = {
+        "gather": _run_gather,
+        "TaskGroup": _run_task_group,
+        "as_completed": _run_as_completed,
+        "bounded_map_ordered": _run_bounded_map,
+        "BoundedTaskGroup": _run_bounded_task_group,
+    }
+    results = {}
+
+    for name, run in variants.items():
+        start = time.perf_counter()
+        await run(count, limit)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        await run(count, limit)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results[name] = {
+            "us_per_task": round(elapsed / count * 1e6, 2),
+            "peak_mb": round(peak / 2**20, 1),
+        }
+
+    for name, stats in results.items():
+        print(f"{name}: {stats}")
+
+    return results
+
+
+if __name__ == "__main__":
+    asyncio.run(performance_comparison())
@@ -1,25 +1,38 @@
+import abc
+import bisect
+import random
+import time
+import typing
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 sorted_list = [1, 2, 3, 45, 356, 569, 600, 705, 923]
 
 
-def search(number: id) -> bool:
+def search(number: int, items: typing.Optional[typing.Sequence[int]] = None) -> bool:
     """
     Функция поиска числа в отсортированном списке.
 
     :param number: Искомое число
+    :param items: Отсортированная последовательность, по умолчанию sorted_list
     :return: True, если число найдено в списке, False - если нет
     """
 
-    left, right = 0, len(sorted_list) - 1
+    if items is None:
+        items = sorted_list
+
+    # Для пустого списка right = -1, и цикл не выполняется ни разу
+    left, right = 0, len(items) - 1
 
     while left <= right:
         middle = (left + right) // 2
 
-        if not sorted_list:
-            return False
-
-        if sorted_list[middle] == number:
+        if items[middle] == number:
             return True
-        elif sorted_list[middle] < number:
+        elif items[middle] < number:
             left = middle + 1
         else:
             right = middle - 1
@@ -27,6 +40,184 @@ def search(number: id) -> bool:
     return False
 
 
+class SearchIndex(abc.ABC):
+    """
+    Общий интерфейс индексов для поиска в отсортированных данных.
+    """
+
+    @abc.abstractmethod
+    def __len__(self) -> int: ...
+
+    @abc.abstractmethod
+    def __contains__(self, number: int) -> bool: ...
+
+    def contains_many(
+        self, queries: typing.Sequence[int]
+    ) -> typing.Union[list[bool], "np.ndarray"]:
+        """
+        Проверяет наличие каждого из запросов.
+
+        :param queries: Искомые числа.
+        :return: bool для каждого запроса в порядке запросов.
+        """
+
+        return [number in self for number in queries]
+
+
+class SortedIndex(SearchIndex):
+    """
+    Индекс над отсортированной последовательностью (list, array, range, numpy.ndarray)
+    для одиночного и пакетного поиска.
+
+    - одиночный поиск (in) - bisect на C вместо двоичного поиска в цикле Python;
+    - contains_many для отсортированных запросов - проход слиянием: каждый следующий поиск
+      начинается с позиции предыдущего найденного;
+    - contains_many для массивов numpy - векторизованный numpy.searchsorted.
+    """
+
+    def __init__(self, values: typing.Sequence[int]):
+        """
+        :param values: Последовательность, отсортированная по возрастанию (не копируется).
+        """
+
+        self.values = values
+
+    @classmethod
+    def from_unsorted(cls, values: typing.Iterable[int]) -> "SortedIndex":
+        """
+        Создает индекс из неотсортированных значений.
+
+        :param values: Значения в любом порядке.
+        """
+
+        if np is not None and isinstance(values, np.ndarray):
+            return cls(np.sort(values))
+        return cls(sorted(values))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __contains__(self, number: int) -> bool:
+        index = bisect.bisect_left(self.values, number)
+        return index < len(self.values) and self.values[index] == number
+
+    def _is_numpy(self, queries: typing.Any) -> bool:
+        return np is not None and (
+            isinstance(self.values, np.ndarray) or isinstance(queries, np.ndarray)
+        )
+
+    def _contains_numpy(self, queries: typing.Any) -> "np.ndarray":
+        """
+        Векторизованная проверка: позиции вставки через searchsorted и сравнение значений на них.
+        """
+
+        values = np.asarray(self.values)
+        queries = np.asarray(queries)
+
+        if not len(values):
+            return np.zeros(len(queries), dtype=bool)
+
+        positions = np.searchsorted(values, queries)
+        found = values[np.minimum(positions, len(values) - 1)] == queries
+        return found & (positions < len(values))
+
+    def _contains_sorted(self, queries: typing.Sequence[int]) -> list[bool]:
+        """
+        Проход слиянием по отсортированным запросам: нижняя граница поиска только растет.
+        """
+
+        values, size = self.values, len(self.values)
+        result = []
+        low = 0
+
+        for number in queries:
+            low = bisect.bisect_left(values, number, low)
+            result.append(low < size and values[low] == number)
+
+        return result
+
+    def contains_many(
+        self, queries: typing.Sequence[int], assume_sorted: bool = False
+    ) -> typing.Union[list[bool], "np.ndarray"]:
+        """
+        Проверяет наличие каждого из запросов.
+
+        :param queries: Искомые числа.
+        :param assume_sorted: Запросы отсортированы по возрастанию (проход слиянием).
+        :return: Список bool (numpy-массив bool, если значения или запросы - массивы numpy)
+            в порядке запросов.
+        """
+
+        if self._is_numpy(queries):
+            return self._contains_numpy(queries)
+        if assume_sorted:
+            return self._contains_sorted(queries)
+        return [number in self for number in queries]
+
+
+def _queries_per_second(func: typing.Callable[[], typing.Any], count: int) -> float:
+    start = time.perf_counter()
+    func()
+    return count / (time.perf_counter() - start)
+
+
+def performance_comparison(
+    sizes: typing.Sequence[int] = (10**3, 10**4, 10**5, 10**6, 10**7, 10**8),
+    queries: int = 100_000,
+) -> dict:
+    """
+    Сравнивает количество запросов в секунду: search, SortedIndex (in), contains_many
+    с отсортированными запросами и contains_many на массивах numpy.
+
+    Значения - четные числа 0..2n: для Python-вариантов это range (не занимает памяти даже при 10⁸),
+    для numpy - numpy.arange (800 МБ при 10⁸). Половина запросов попадает в значения.
+
+    :param sizes: Количества элементов.
+    :param queries: Количество запросов.
+    """
+
+    results = {}
+
+    for size in sizes:
+        values = range(0, 2 * size, 2)
+        numbers = [random.randrange(2 * size) for _ in range(queries)]
+        sorted_numbers = sorted(numbers)
+        index = SortedIndex(values)
+
+        stats = {
+            "search": _queries_per_second(
+                lambda: [search(number, values) for number in numbers], queries
+            ),
+            "index_in": _queries_per_second(
+                lambda: [number in index for number in numbers], queries
+            ),
+            "contains_many_sorted": _queries_per_second(
+                lambda: index.contains_many(sorted_numbers, assume_sorted=True),
+                queries,
+            ),
+        }
+
+        if np is not None:
+            numpy_index = SortedIndex(np.arange(0, 2 * size, 2))
+            numpy_numbers = np.array(numbers)
+            stats["contains_many_numpy"] = _queries_per_second(
+                lambda: numpy_index.contains_many(numpy_numbers), queries
+            )
+            del numpy_index
+
+        results[size] = {name: round(qps) for name, qps in stats.items()}
+
+    print("Запросов в секунду:")
+    for size, stats in results.items():
+        print(f"n={size:.0e}: {stats}")
+
+    return results
+
+
+if __name__ == "__main__":
+    performance_comparison()
+
+
 # Пример использования
 # print(search(356))  # Output: True
 # print(search(1000))  # Output: False
@@ -0,0 +1,376 @@
+"""
+Изменяемый отсортированный контейнер SortedList.
+
+Элементы хранятся в списке отсортированных подсписков длиной от load / 2 до 2 * load
+и списке их максимумов. Вставка и удаление - двоичный поиск подсписка по максимумам
+и insort/del внутри подсписка длиной O(load) вместо сдвига всех n элементов, как у bisect.insort.
+Позиционный индекс - дерево Фенвика над длинами подсписков: ранг и доступ по номеру за O(log n).
+Дерево обновляется при вставке и удалении и перестраивается лениво после разбиения
+или слияния подсписков.
+"""
+
+import bisect
+import random
+import time
+import typing
+
+from src.big_o.searching_item_in_ordered_list import SearchIndex, search
+
+
+class SortedList(SearchIndex):
+    """
+    Отсортированный список с вставкой, удалением, проверкой наличия, рангом и диапазонными запросами.
+
+    Совместим с search: поддерживает len() и доступ по номеру (items[i]),
+    поэтому search(number, sorted_list) работает без изменений (O(log² n) за счет доступа по номеру).
+    """
+
+    def __init__(
+        self, values: typing.Optional[typing.Iterable[int]] = None, load: int = 1000
+    ):
+        """
+        :param values: Начальные значения в любом порядке.
+        :param load: Целевая длина подсписка.
+        """
+
+        self._load = load
+        self._lists: list[list[int]] = []
+        self._maxes: list[int] = []
+        self._size = 0
+        # Дерево Фенвика над длинами подсписков, None - нужно перестроить
+        self._index: typing.Optional[list[int]] = None
+
+        if values is not None:
+            self.update(values)
+
+    def update(self, values: typing.Iterable[int]) -> None:
+        """
+        Добавляет значения пакетом: сортировка всех элементов и разбиение на подсписки заново.
+
+        :param values: Значения в любом порядке.
+        """
+
+        items = sorted(values)
+
+        if self._size:
+            items = sorted(list(self) + items)
+
+        self._lists = [
+            items[i : i + self._load] for i in range(0, len(items), self._load)
+        ]
+        self._maxes = [sublist[-1] for sublist in self._lists]
+        self._size = len(items)
+        self._index = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> typing.Iterator[int]:
+        for sublist in self._lists:
+            yield from sublist
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self)!r})"
+
+    def __contains__(self, number: int) -> bool:
+        pos = bisect.bisect_left(self._maxes, number)
+
+        if pos == len(self._maxes):
+            return False
+
+        sublist = self._lists[pos]
+        return sublist[bisect.bisect_left(sublist, number)] == number
+
+    def add(self, number: int) -> None:
+        """
+        Вставляет значение (повторы допускаются).
+
+        :param number: Значение.
+        """
+
+        if not self._maxes:
+            self._lists.append([number])
+            self._maxes.append(number)
+            self._size = 1
+            self._index = None
+            return
+
+        pos = bisect.bisect_right(self._maxes, number)
+
+        if pos == len(self._maxes):
+            pos -= 1
+            self._lists[pos].append(number)
+            self._maxes[pos] = number
+        else:
+            bisect.insort(self._lists[pos], number)
+
+        self._size += 1
+
+        if len(self._lists[pos]) > 2 * self._load:
+            self._split(pos)
+        elif self._index is not None:
+            self._index_update(pos, 1)
+
+    def discard(self, number: int) -> bool:
+        """
+        Удаляет одно вхождение значения, если оно есть.
+
+        :param number: Значение.
+        :return: True, если значение было удалено.
+        """
+
+        pos = bisect.bisect_left(self._maxes, number)
+
+        if pos == len(self._maxes):
+            return False
+
+        sublist = self._lists[pos]
+        i = bisect.bisect_left(sublist, number)
+
+        if sublist[i] != number:
+            return False
+
+        del sublist[i]
+        self._size -= 1
+
+        if not sublist:
+            del self._lists[pos], self._maxes[pos]
+            self._index = None
+        else:
+            self._maxes[pos] = sublist[-1]
+
+            if len(sublist) < self._load // 2 and len(self._lists) > 1:
+                self._merge(pos)
+            elif self._index is not None:
+                self._index_update(pos, -1)
+
+        return True
+
+    def remove(self, number: int) -> None:
+        """
+        Удаляет одно вхождение значения.
+
+        :param number: Значение.
+        :raises ValueError: Значения нет в списке.
+        """
+
+        if not self.discard(number):
+            raise ValueError(f"{number!r} отсутствует в SortedList")
+
+    def _split(self, pos: int) -> None:
+        """
+        Делит переполненный подсписок пополам.
+        """
+
+        sublist = self._lists[pos]
+        half = len(sublist) // 2
+        self._lists[pos : pos + 1] = [sublist[:half], sublist[half:]]
+        self._maxes[pos : pos + 1] = [sublist[half - 1], sublist[-1]]
+        self._index = None
+
+    def _merge(self, pos: int) -> None:
+        """
+        Сливает короткий подсписок с соседним и снова делит, если результат переполнен.
+        """
+
+        if pos == len(self._lists) - 1:
+            pos -= 1
+
+        self._lists[pos : pos + 2] = [self._lists[pos] + self._lists[pos + 1]]
+        self._maxes[pos : pos + 2] = [self._lists[pos][-1]]
+        self._index = None
+
+        if len(self._lists[pos]) > 2 * self._load:
+            self._split(pos)
+
+    def _build_index(self) -> list[int]:
+        """
+        Строит дерево Фенвика (нумерация с 1) над длинами подсписков за O(m).
+        """
+
+        tree = [0] + [len(sublist) for sublist in self._lists]
+
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+
+        self._index = tree
+        return tree
+
+    def _index_update(self, pos: int, delta: int) -> None:
+        tree = self._index
+        i = pos + 1
+
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, pos: int) -> int:
+        """
+        Количество элементов в подсписках до pos (не включая).
+        """
+
+        tree = self._index if self._index is not None else self._build_index()
+        total = 0
+
+        while pos > 0:
+            total += tree[pos]
+            pos -= pos & -pos
+
+        return total
+
+    def _locate(self, index: int) -> tuple[int, int]:
+        """
+        Находит подсписок и смещение в нем для номера элемента спуском по дереву Фенвика.
+        """
+
+        tree = self._index if self._index is not None else self._build_index()
+        pos = 0
+        step = 1 << (len(tree) - 1).bit_length()
+
+        while step:
+            if pos + step < len(tree) and tree[pos + step] <= index:
+                pos += step
+                index -= tree[pos]
+            step >>= 1
+
+        return pos, index
+
+    def __getitem__(self, index: int) -> int:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("индекс SortedList вне диапазона")
+
+        pos, offset = self._locate(index)
+        return self._lists[pos][offset]
+
+    def rank(self, number: int) -> int:
+        """
+        Количество элементов меньше number (позиция вставки слева, как bisect_left).
+
+        :param number: Значение.
+        """
+
+        pos = bisect.bisect_left(self._maxes, number)
+
+        if pos == len(self._maxes):
+            return self._size
+        return self._prefix(pos) + bisect.bisect_left(self._lists[pos], number)
+
+    def count_range(self, low: int, high: int) -> int:
+        """
+        Количество элементов в диапазоне [low, high].
+
+        :param low: Нижняя граница (включительно).
+        :param high: Верхняя граница (включительно).
+        """
+
+        pos = bisect.bisect_right(self._maxes, high)
+
+        if pos == len(self._maxes):
+            upper = self._size
+        else:
+            upper = self._prefix(pos) + bisect.bisect_right(self._lists[pos], high)
+
+        return max(upper - self.rank(low), 0)
+
+    def irange(self, low: int, high: int) -> typing.Iterator[int]:
+        """
+        Элементы из диапазона [low, high] по возрастанию без копирования всего списка.
+
+        :param low: Нижняя граница (включительно).
+        :param high: Верхняя граница (включительно).
+        """
+
+        pos = bisect.bisect_left(self._maxes, low)
+
+        if pos == len(self._maxes):
+            return
+
+        start = bisect.bisect_left(self._lists[pos], low)
+
+        for sublist in self._lists[pos:]:
+            if sublist[-1] <= high:
+                yield from sublist[start:]
+            else:
+                yield from sublist[start : bisect.bisect_right(sublist, high)]
+                return
+            start = 0
+
+
+def _remove_sorted(items: list[int], number: int) -> None:
+    """
+    Удаление из отсортированного list: поиск за O(log n), сдвиг хвоста за O(n).
+    """
+
+    del items[bisect.bisect_left(items, number)]
+
+
+def _elapsed(func: typing.Callable[[], typing.Any]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def performance_comparison(
+    sizes: typing.Sequence[int] = (10**4, 10**5, 10**6, 10**7),
+    operations: int = 10_000,
+) -> dict:
+    """
+    Сравнивает время операции (мкс) для list + bisect.insort и SortedList
+    на наборах из size случайных чисел: вставка, удаление, проверка наличия,
+    ранг и search по SortedList.
+
+    :param sizes: Количества элементов.
+    :param operations: Количество операций каждого вида.
+    """
+
+    results = {}
+
+    for size in sizes:
+        values = [random.randrange(size * 10) for _ in range(size)]
+        numbers = [random.randrange(size * 10) for _ in range(operations)]
+
+        plain = sorted(values)
+        sorted_list = SortedList(values)
+        del values
+
+        def per_operation(seconds: float) -> float:
+            return round(seconds / operations * 1e6, 2)
+
+        stats = {
+            "insort_insert": per_operation(
+                _elapsed(lambda: [bisect.insort(plain, n) for n in numbers])
+            ),
+            "sorted_list_insert": per_operation(
+                _elapsed(lambda: [sorted_list.add(n) for n in numbers])
+            ),
+            "list_remove": per_operation(
+                _elapsed(lambda: [_remove_sorted(plain, n) for n in numbers])
+            ),
+            "sorted_list_remove": per_operation(
+                _elapsed(lambda: [sorted_list.remove(n) for n in numbers])
+            ),
+            "sorted_list_contains": per_operation(
+                _elapsed(lambda: [n in sorted_list for n in numbers])
+            ),
+            "sorted_list_rank": per_operation(
+                _elapsed(lambda: [sorted_list.rank(n) for n in numbers])
+            ),
+            "search_over_sorted_list": per_operation(
+                _elapsed(lambda: [search(n, sorted_list) for n in numbers])
+            ),
+        }
+        results[size] = stats
+
+    print("Время операции, мкс:")
+    for size, stats in results.items():
+        print(f"n={size:.0e}: {stats}")
+
+    return results
+
+
+if __name__ == "__main__":
+    performance_comparison()
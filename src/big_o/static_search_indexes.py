@@ -0,0 +1,449 @@
+"""
+Статические индексы для поиска в отсортированных данных с общим интерфейсом SearchIndex.
+
+- EytzingerIndex - элементы в порядке обхода дерева в ширину (как в двоичной куче): первые уровни
+  дерева, по которым проходит каждый поиск, лежат рядом в памяти. Пакетный поиск на numpy
+  спускается по дереву без ветвлений: k = 2k + (tree[k] < x) для всех запросов сразу.
+- InterpolationIndex - интерполяционный поиск: O(log log n) для равномерно распределенных ключей.
+  Если шаг интерполяции не сокращает диапазон вдвое, следующий шаг - двоичный, поэтому
+  худший случай остается O(log n).
+- PiecewiseLinearIndex - простой обученный индекс: кусочно-линейная модель "ключ -> позиция"
+  с ошибкой не больше max_error, после предсказания - двоичный поиск в окне ±max_error.
+
+choose_index строит все индексы на данных и выбирает самый быстрый на выборке запросов.
+"""
+
+import bisect
+import math
+import random
+import time
+import typing
+
+from src.big_o.searching_item_in_ordered_list import SearchIndex, SortedIndex
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class EytzingerIndex(SearchIndex):
+    """
+    Отсортированные значения в раскладке Эйтцингера (BFS-порядок полного двоичного дерева).
+
+    Дерево дополняется до совершенного (2^h - 1 узлов) значением-ограничителем,
+    поэтому все пути поиска имеют одинаковую длину h. Ограничитель не считается найденным:
+    для найденного узла проверяется его ранг (позиция в исходных данных) < n.
+    """
+
+    def __init__(self, values: typing.Sequence[int]):
+        """
+        :param values: Последовательность, отсортированная по возрастанию.
+        """
+
+        self._size = len(values)
+        self._height = self._size.bit_length()
+        nodes = (1 << self._height) - 1
+
+        if np is not None:
+            values = np.asarray(values)
+            sentinel = (
+                np.iinfo(values.dtype).max
+                if np.issubdtype(values.dtype, np.integer)
+                else np.inf
+            )
+            ranks = self._ranks_numpy(np.arange(1, nodes + 1))
+            tree = np.full(nodes + 1, sentinel, dtype=values.dtype)
+            inside = ranks < self._size
+            tree[1:][inside] = values[ranks[inside]]
+            self._tree = tree
+            self._tree_list: typing.Optional[list] = None
+        else:
+            tree = [math.inf] * (nodes + 1)
+
+            for node in range(1, nodes + 1):
+                rank = self._rank(node)
+
+                if rank < self._size:
+                    tree[node] = values[rank]
+
+            self._tree = self._tree_list = tree
+
+    def _rank(self, node: int) -> int:
+        """
+        Позиция узла node (нумерация с 1) при симметричном обходе совершенного дерева высоты h.
+        """
+
+        depth = node.bit_length() - 1
+        return ((2 * (node - (1 << depth)) + 1) << (self._height - 1 - depth)) - 1
+
+    def _ranks_numpy(self, nodes: "np.ndarray") -> "np.ndarray":
+        """
+        Векторизованный _rank. frexp возвращает показатель e, для которого node = m * 2^e, 0.5 <= m < 1,
+        то есть длину node в битах.
+        """
+
+        depth = np.frexp(nodes)[1].astype(np.int64) - 1
+        offset = nodes - (np.int64(1) << depth)
+        return ((2 * offset + 1) << (self._height - 1 - depth)) - 1
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, number: int) -> bool:
+        if self._tree_list is None:
+            # Одиночный поиск по списку быстрее, чем обращение к элементам numpy-массива
+            self._tree_list = self._tree.tolist()
+
+        tree, nodes = self._tree_list, len(self._tree_list) - 1
+        node = 1
+
+        while node <= nodes:
+            value = tree[node]
+
+            if value == number:
+                return self._rank(node) < self._size
+
+            node = 2 * node + 1 if value < number else 2 * node
+
+        return False
+
+    def contains_many(
+        self, queries: typing.Sequence[int]
+    ) -> typing.Union[list[bool], "np.ndarray"]:
+        """
+        Пакетный поиск: спуск без ветвлений по всем запросам сразу (h шагов numpy),
+        затем переход к узлу нижней границы: отбрасываются младшие единичные биты номера и еще один.
+
+        :param queries: Искомые числа.
+        """
+
+        if np is None:
+            return super().contains_many(queries)
+
+        queries = np.asarray(queries)
+
+        if not self._size:
+            return np.zeros(len(queries), dtype=bool)
+
+        tree = self._tree
+        nodes = np.ones(len(queries), dtype=np.int64)
+
+        for _ in range(self._height):
+            nodes = 2 * nodes + (tree[nodes] < queries)
+
+        # Младший нулевой бит номера: его позиция + 1 - на сколько сдвинуть номер вправо
+        lowest_zero = ~nodes & (nodes + 1)
+        nodes >>= np.frexp(lowest_zero)[1].astype(np.int64)
+
+        found = nodes > 0
+        candidates = np.where(found, nodes, 1)
+        found &= tree[candidates] == queries
+        found &= self._ranks_numpy(candidates) < self._size
+        return found
+
+
+class InterpolationIndex(SearchIndex):
+    """
+    Интерполяционный поиск с переходом на двоичный шаг, если интерполяция не сокращает
+    диапазон хотя бы вдвое.
+    """
+
+    def __init__(self, values: typing.Sequence[int]):
+        """
+        :param values: Последовательность, отсортированная по возрастанию.
+        """
+
+        self.values = (
+            values.tolist()
+            if np is not None and isinstance(values, np.ndarray)
+            else values
+        )
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __contains__(self, number: int) -> bool:
+        values = self.values
+        low, high = 0, len(values) - 1
+        interpolate = True
+
+        while low <= high:
+            first, last = values[low], values[high]
+
+            if number < first or number > last:
+                return False
+            if first == last:
+                return first == number
+
+            if interpolate:
+                position = low + int((number - first) * (high - low) / (last - first))
+                position = min(max(position, low), high)
+            else:
+                position = (low + high) // 2
+
+            value = values[position]
+
+            if value == number:
+                return True
+
+            size = high - low
+
+            if value < number:
+                low = position + 1
+            else:
+                high = position - 1
+
+            interpolate = high - low <= size // 2
+
+        return False
+
+
+class PiecewiseLinearIndex(SearchIndex):
+    """
+    Кусочно-линейная модель позиции ключа с ошибкой не больше max_error.
+
+    Сегменты строятся жадно за один проход (алгоритм сужающегося конуса): точка добавляется
+    в сегмент, пока существует наклон, при котором все точки сегмента предсказываются
+    с ошибкой <= max_error. Для повторяющихся ключей модель предсказывает позицию первого из них.
+    """
+
+    def __init__(self, values: typing.Sequence[int], max_error: int = 64):
+        """
+        :param values: Последовательность, отсортированная по возрастанию.
+        :param max_error: Максимальная ошибка предсказания позиции.
+        """
+
+        self.values = values
+        self.max_error = max_error
+
+        keys: list = []
+        positions: list[int] = []
+        slopes: list[float] = []
+        start_key = previous = None
+        start = 0
+        low, high = -math.inf, math.inf
+
+        for position, key in enumerate(
+            values.tolist() if np and isinstance(values, np.ndarray) else values
+        ):
+            if key == previous:
+                continue
+            previous = key
+
+            if start_key is not None:
+                dx = key - start_key
+                slope = (position - start) / dx
+
+                if low <= slope <= high:
+                    low = max(low, (position - max_error - start) / dx)
+                    high = min(high, (position + max_error - start) / dx)
+                    continue
+
+                slopes.append((low + high) / 2 if high != math.inf else 0.0)
+
+            keys.append(key)
+            positions.append(position)
+            start_key, start = key, position
+            low, high = -math.inf, math.inf
+
+        if start_key is not None:
+            slopes.append((low + high) / 2 if high != math.inf else 0.0)
+
+        self._keys = keys
+        self._positions = positions
+        self._slopes = slopes
+        # Позиция, с которой начинается следующий сегмент: предсказание не выходит за нее
+        self._ends = positions[1:] + [len(values)]
+
+        if np is not None:
+            self._np_values = np.asarray(values)
+            self._np_keys = np.asarray(keys)
+            self._np_positions = np.asarray(positions, dtype=np.int64)
+            self._np_slopes = np.asarray(slopes, dtype=np.float64)
+            self._np_ends = np.asarray(self._ends, dtype=np.int64)
+
+    @property
+    def segments(self) -> int:
+        """
+        Количество линейных сегментов модели.
+        """
+
+        return len(self._keys)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __contains__(self, number: int) -> bool:
+        segment = bisect.bisect_right(self._keys, number) - 1
+
+        if segment < 0:
+            return False
+
+        start = self._positions[segment]
+        predicted = start + int(self._slopes[segment] * (number - self._keys[segment]))
+        predicted = min(max(predicted, start), self._ends[segment])
+
+        size = len(self.values)
+        low = max(predicted - self.max_error - 1, 0)
+        high = min(predicted + self.max_error + 2, size)
+        index = bisect.bisect_left(self.values, number, low, high)
+        return index < size and self.values[index] == number
+
+    def contains_many(
+        self, queries: typing.Sequence[int]
+    ) -> typing.Union[list[bool], "np.ndarray"]:
+        """
+        Пакетный поиск: сегменты через searchsorted, предсказание позиций и двоичный поиск
+        в окне ±max_error одновременно для всех запросов.
+
+        :param queries: Искомые числа.
+        """
+
+        if np is None or not len(self.values):
+            return super().contains_many(queries)
+
+        queries = np.asarray(queries)
+        values, size = self._np_values, len(self._np_values)
+
+        segments = np.searchsorted(self._np_keys, queries, side="right") - 1
+        valid = segments >= 0
+        segments = np.maximum(segments, 0)
+
+        starts = self._np_positions[segments]
+        predicted = starts + (
+            self._np_slopes[segments] * (queries - self._np_keys[segments])
+        ).astype(np.int64)
+        predicted = np.clip(predicted, starts, self._np_ends[segments])
+
+        low = np.clip(predicted - self.max_error - 1, 0, size)
+        high = np.clip(predicted + self.max_error + 2, 0, size)
+
+        for _ in range((2 * self.max_error + 3).bit_length()):
+            middle = (low + high) // 2
+            active = low < high
+            go_right = values[np.minimum(middle, size - 1)] < queries
+            low = np.where(active & go_right, middle + 1, low)
+            high = np.where(active & ~go_right, middle, high)
+
+        return valid & (low < size) & (values[np.minimum(low, size - 1)] == queries)
+
+
+INDEX_TYPES: dict[str, typing.Callable[[typing.Sequence[int]], SearchIndex]] = {
+    "sorted": SortedIndex,
+    "eytzinger": EytzingerIndex,
+    "interpolation": InterpolationIndex,
+    "piecewise_linear": PiecewiseLinearIndex,
+}
+
+
+def choose_index(
+    values: typing.Sequence[int],
+    queries: typing.Optional[typing.Sequence[int]] = None,
+    batch: bool = True,
+    candidates: typing.Optional[dict] = None,
+    sample: int = 20_000,
+) -> tuple[SearchIndex, dict]:
+    """
+    Строит индексы-кандидаты на данных и выбирает самый быстрый на выборке запросов.
+
+    :param values: Отсортированные значения.
+    :param queries: Типичные запросы, None - половина из values, половина случайных в диапазоне.
+    :param batch: Выбирать по скорости contains_many (иначе - по одиночному поиску in).
+    :param candidates: Имя -> конструктор индекса, по умолчанию INDEX_TYPES.
+    :param sample: Размер выборки запросов.
+    :return: Лучший индекс и статистика по всем кандидатам (время построения и запросов в секунду).
+    """
+
+    candidates = candidates or INDEX_TYPES
+
+    if queries is None:
+        low, high = values[0], values[-1]
+        queries = [
+            int(values[random.randrange(len(values))]) for _ in range(sample // 2)
+        ]
+        queries += [random.randint(int(low), int(high)) for _ in range(sample // 2)]
+    else:
+        queries = list(queries)[:sample]
+
+    batch_queries = np.asarray(queries) if np is not None else queries
+    stats, built = {}, {}
+
+    for name, make_index in candidates.items():
+        start = time.perf_counter()
+        index = make_index(values)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for number in queries:
+            number in index  # noqa: B015
+        single = len(queries) / (time.perf_counter() - start)
+
+        # Лучший из трех прогонов: первый платит за прогрев кэшей и выделение памяти
+        batch_time = math.inf
+
+        for _ in range(3):
+            start = time.perf_counter()
+            index.contains_many(batch_queries)
+            batch_time = min(batch_time, time.perf_counter() - start)
+
+        many = len(queries) / batch_time
+
+        built[name] = index
+        stats[name] = {
+            "build_s": round(build_time, 3),
+            "single_qps": round(single),
+            "batch_qps": round(many),
+        }
+
+    key = "batch_qps" if batch else "single_qps"
+    best = max(stats, key=lambda name: stats[name][key])
+    return built[best], {"best": best, "candidates": stats}
+
+
+def _dataset(distribution: str, size: int) -> list[int]:
+    """
+    Отсортированные ключи: uniform - равномерные, lognormal - с тяжелым хвостом,
+    clustered - плотные кластеры с большими промежутками.
+    """
+
+    if distribution == "uniform":
+        keys = (random.randrange(size * 10) for _ in range(size))
+    elif distribution == "lognormal":
+        keys = (int(random.lognormvariate(10, 2)) for _ in range(size))
+    else:
+        keys = (
+            random.randrange(100) * 10**9 + random.randrange(size) for _ in range(size)
+        )
+    return sorted(keys)
+
+
+def performance_comparison(
+    sizes: typing.Sequence[int] = (10**4, 10**6),
+    distributions: typing.Sequence[str] = ("uniform", "lognormal", "clustered"),
+) -> dict:
+    """
+    Для каждого набора данных выбирает лучший индекс через choose_index и печатает статистику.
+
+    :param sizes: Количества элементов.
+    :param distributions: Распределения ключей: uniform, lognormal, clustered.
+    """
+
+    results = {}
+
+    for size in sizes:
+        for distribution in distributions:
+            keys = _dataset(distribution, size)
+            values = np.asarray(keys) if np is not None else keys
+            _, stats = choose_index(values)
+            results[(distribution, size)] = stats
+
+            print(f"{distribution}, n={size:.0e}: лучший - {stats['best']}")
+            for name, candidate in stats["candidates"].items():
+                print(f"  {name}: {candidate}")
+
+    return results
+
+
+if __name__ == "__main__":
+    performance_comparison()
@@ -1,9 +1,19 @@
 """
 Написать мета класс, который автоматически добавляет атрибут created_at с текущей датой и временем
 к любому классу, который его использует.
+
+Метакласс MetaClassSlots создает компактные классы данных: __slots__ из аннотаций вместо __dict__
+у каждого экземпляра, сгенерированные __init__, __eq__ и __repr__, необязательное интернирование
+повторяющихся строк. RecordArray хранит такие записи упакованными в одном bytearray.
 """
 
+import dataclasses
 import datetime
+import struct
+import sys
+import time
+import tracemalloc
+import typing
 
 
 class MetaClassCreatedAt(type):
@@ -33,5 +43,404 @@ class MetaClassAttributes(metaclass=MetaClassCreatedAt):
     pass
 
 
-# Выводит текущее время создания класса
-print(MetaClassAttributes.created_at)
+_MISSING = object()
+
+
+class MetaClassSlots(type):
+    """
+    Метакласс компактных классов данных.
+
+    Поля берутся из аннотаций класса (кроме typing.ClassVar) и его баз-моделей и становятся __slots__,
+    поэтому у экземпляров нет __dict__. Значения по умолчанию берутся из атрибутов класса.
+    __init__, __eq__ и __repr__ генерируются под конкретные поля, без цикла по полям при вызове.
+    Строковые поля из intern_fields интернируются (sys.intern): одинаковые значения
+    из разных источников хранятся одним объектом.
+
+    Использование::
+
+        class User(SlotsModel, intern_fields=("country",)):
+            id: int
+            country: str
+            score: float = 0.0
+    """
+
+    def __new__(cls, name, bases, namespace, intern_fields: typing.Iterable[str] = ()):
+        """
+        Переопределяем метод __new__ для создания __slots__ и методов по аннотациям.
+        :param cls: Метакласс.
+        :param name: Имя нового класса.
+        :param bases: Базовые классы нового класса.
+        :param namespace: Словарь атрибутов и методов нового класса.
+        :param intern_fields: Строковые поля, значения которых интернируются.
+        :return: Новый класс.
+        """
+
+        field_types: dict[str, typing.Any] = {}
+        defaults: dict[str, typing.Any] = {}
+        interned = set(intern_fields)
+
+        for base in reversed(bases):
+            field_types.update(getattr(base, "_field_types", {}))
+            defaults.update(getattr(base, "_defaults", {}))
+            interned.update(getattr(base, "_intern_fields", ()))
+
+        annotations = cls._namespace_annotations(namespace)
+        own_fields = [
+            field
+            for field, annotation in annotations.items()
+            if not cls._is_class_var(annotation)
+        ]
+
+        for field in own_fields:
+            field_types[field] = annotations[field]
+            default = namespace.pop(field, _MISSING)
+
+            if isinstance(default, (list, dict, set)):
+                raise ValueError(
+                    f"Изменяемое значение по умолчанию для поля {field!r} недопустимо"
+                )
+            if default is not _MISSING:
+                defaults[field] = default
+
+        fields = tuple(field_types)
+        unknown = interned - set(fields)
+
+        if unknown:
+            raise ValueError(f"Неизвестные поля в intern_fields: {sorted(unknown)}")
+
+        namespace["__slots__"] = tuple(own_fields)
+        namespace["__match_args__"] = fields
+        namespace["_fields"] = fields
+        namespace["_field_types"] = field_types
+        namespace["_defaults"] = defaults
+        namespace["_intern_fields"] = frozenset(interned)
+        # Изменяемые объекты с __eq__ не хешируются, как dataclass(eq=True)
+        namespace.setdefault("__hash__", None)
+
+        for method in cls._generate_methods(name, fields, defaults, interned):
+            namespace.setdefault(method.__name__, method)
+
+        return super().__new__(cls, name, bases, namespace)
+
+    def __init__(cls, name, bases, namespace, intern_fields: typing.Iterable[str] = ()):
+        super().__init__(name, bases, namespace)
+
+    @staticmethod
+    def _namespace_annotations(namespace: dict) -> dict[str, typing.Any]:
+        """
+        Аннотации из пространства имен создаваемого класса.
+
+        До Python 3.14 (и с from __future__ import annotations) они лежат в __annotations__.
+        С 3.14 (PEP 649) там только ленивая функция __annotate__: аннотации вычисляются через
+        annotationlib, неизвестные пока имена остаются ForwardRef.
+        """
+
+        if "__annotations__" in namespace:
+            return namespace["__annotations__"]
+
+        try:
+            import annotationlib
+        except ImportError:
+            return {}
+
+        annotate = annotationlib.get_annotate_from_class_namespace(namespace)
+
+        if annotate is None:
+            return {}
+        return annotationlib.call_annotate_function(
+            annotate, annotationlib.Format.FORWARDREF
+        )
+
+    @staticmethod
+    def _is_class_var(annotation: typing.Any) -> bool:
+        if isinstance(annotation, str):
+            return annotation.startswith(("ClassVar", "typing.ClassVar"))
+        return (
+            annotation is typing.ClassVar
+            or typing.get_origin(annotation) is typing.ClassVar
+        )
+
+    @staticmethod
+    def _generate_methods(
+        name: str,
+        fields: tuple[str, ...],
+        defaults: dict[str, typing.Any],
+        interned: set[str],
+    ) -> list[typing.Callable]:
+        """
+        Генерирует исходный код __init__, __eq__ и __repr__ для полей и компилирует его.
+        """
+
+        parameters = ["self"]
+
+        for field in fields:
+            if field in defaults:
+                parameters.append(f"{field}=_defaults[{field!r}]")
+            elif len(parameters) > 1 and "=" in parameters[-1]:
+                raise TypeError(
+                    f"Поле без значения по умолчанию {field!r} после поля со значением"
+                )
+            else:
+                parameters.append(field)
+
+        assignments = [
+            f"    self.{field} = _intern({field}) if {field}.__class__ is str else {field}"
+            if field in interned
+            else f"    self.{field} = {field}"
+            for field in fields
+        ]
+        values = "".join(f"self.{field}, " for field in fields)
+        other_values = "".join(f"other.{field}, " for field in fields)
+        representation = ", ".join(f"{field}={{self.{field}!r}}" for field in fields)
+
+        source = "\n".join(
+            [
+                f"def __init__({', '.join(parameters)}):",
+                *(assignments or ["    pass"]),
+                "def __eq__(self, other):",
+                "    if other.__class__ is not self.__class__:",
+                "        return NotImplemented",
+                f"    return ({values}) == ({other_values})",
+                "def __repr__(self):",
+                f"    return f'{name}({representation})'",
+            ]
+        )
+        scope = {"_defaults": defaults, "_intern": sys.intern}
+        exec(source, scope)
+        return [scope["__init__"], scope["__eq__"], scope["__repr__"]]
+
+
+class SlotsModel(metaclass=MetaClassSlots):
+    """
+    Базовый класс компактных моделей: поля объявляются аннотациями в наследниках.
+    """
+
+
+class RecordArray:
+    """
+    Массив структур: записи модели MetaClassSlots упакованы подряд в один bytearray
+    по формату struct, выведенному из аннотаций (int - int64, float - double, bool - 1 байт).
+    Строки хранятся номером в общей таблице строк, поэтому повторяющиеся значения не дублируются.
+
+    Запись при обращении (records[i], итерация) распаковывается в экземпляр модели.
+    """
+
+    _formats = {"int": "q", "float": "d", "bool": "?", "str": "I"}
+
+    def __init__(
+        self, model: MetaClassSlots, records: typing.Iterable[typing.Any] = ()
+    ):
+        """
+        :param model: Класс записи, созданный MetaClassSlots.
+        :param records: Начальные записи.
+        """
+
+        self.model = model
+        kinds = []
+
+        for field, annotation in model._field_types.items():
+            kind = getattr(annotation, "__name__", annotation)
+
+            if kind not in self._formats:
+                raise TypeError(
+                    f"Тип поля {field!r} ({annotation!r}) не поддерживается RecordArray"
+                )
+            kinds.append(kind)
+
+        self._struct = struct.Struct("<" + "".join(self._formats[k] for k in kinds))
+        self._string_fields = [i for i, kind in enumerate(kinds) if kind == "str"]
+        self._data = bytearray()
+        self._strings: list[str] = []
+        self._string_ids: dict[str, int] = {}
+
+        self.extend(records)
+
+    def _string_id(self, value: str) -> int:
+        string_id = self._string_ids.get(value)
+
+        if string_id is None:
+            string_id = self._string_ids[value] = len(self._strings)
+            self._strings.append(value)
+        return string_id
+
+    def append(self, record: typing.Any) -> None:
+        """
+        Добавляет запись в конец массива.
+
+        :param record: Экземпляр модели.
+        """
+
+        values = [getattr(record, field) for field in self.model._fields]
+
+        for i in self._string_fields:
+            values[i] = self._string_id(values[i])
+
+        self._data += self._struct.pack(*values)
+
+    def extend(self, records: typing.Iterable[typing.Any]) -> None:
+        """
+        Добавляет записи в конец массива.
+
+        :param records: Экземпляры модели.
+        """
+
+        for record in records:
+            self.append(record)
+
+    def _materialize(self, values: tuple) -> typing.Any:
+        if self._string_fields:
+            values = list(values)
+
+            for i in self._string_fields:
+                values[i] = self._strings[values[i]]
+
+        return self.model(*values)
+
+    def __len__(self) -> int:
+        return len(self._data) // self._struct.size
+
+    def __getitem__(self, index: int) -> typing.Any:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("индекс RecordArray вне диапазона")
+
+        return self._materialize(
+            self._struct.unpack_from(self._data, index * self._struct.size)
+        )
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        for values in self._struct.iter_unpack(self._data):
+            yield self._materialize(values)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Размер упакованных данных в байтах (без таблицы строк).
+        """
+
+        return len(self._data)
+
+
+class _PlainUser:
+    def __init__(self, id, name, country, score):
+        self.id = id
+        self.name = name
+        self.country = country
+        self.score = score
+
+
+@dataclasses.dataclass
+class _DataclassUser:
+    id: int
+    name: str
+    country: str
+    score: float
+
+
+@dataclasses.dataclass(slots=True)
+class _DataclassSlotsUser:
+    id: int
+    name: str
+    country: str
+    score: float
+
+
+class _SlotsUser(SlotsModel):
+    id: int
+    name: str
+    country: str
+    score: float
+
+
+class _InternedSlotsUser(SlotsModel, intern_fields=("country",)):
+    id: int
+    name: str
+    country: str
+    score: float
+
+
+def _measure(build: typing.Callable[[], typing.Any]) -> tuple[float, float]:
+    """
+    Возвращает время построения (с) без трассировки и занятую память (МБ) по tracemalloc
+    при повторном построении.
+    """
+
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    del result
+
+    tracemalloc.start()
+    result = build()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+
+    return elapsed, memory / 2**20
+
+
+def performance_comparison(count: int = 1_000_000) -> dict:
+    """
+    Сравнивает время создания count объектов (с) и занятую ими память (МБ),
+    а также время count сравнений == (с) для обычного класса, dataclass, dataclass(slots=True),
+    SlotsModel, SlotsModel с интернированием поля country и RecordArray.
+    У обычного класса == сравнивает идентичность объектов.
+
+    Строки country собираются заново для каждой записи (как при разборе входных данных),
+    поэтому без интернирования каждая запись хранит свою копию.
+
+    :param count: Количество объектов.
+    """
+
+    countries = ["Russia", "Kazakhstan", "Belarus", "Armenia", "Georgia"]
+
+    def rows() -> typing.Iterator[tuple]:
+        for i in range(count):
+            yield i, f"user{i}", "".join(countries[i % 5]), i * 0.5
+
+    variants = {
+        "plain": _PlainUser,
+        "dataclass": _DataclassUser,
+        "dataclass_slots": _DataclassSlotsUser,
+        "slots_model": _SlotsUser,
+        "slots_model_interned": _InternedSlotsUser,
+    }
+    results = {}
+
+    for name, model in variants.items():
+        created, memory = _measure(lambda: [model(*row) for row in rows()])
+
+        objects = [model(*row) for row in rows()]
+        copies = [model(*row) for row in rows()]
+        start = time.perf_counter()
+        for obj, copy in zip(objects, copies):
+            obj == copy
+        compared = time.perf_counter() - start
+        del objects, copies
+
+        results[name] = {
+            "memory_mb": round(memory, 1),
+            "create_s": round(created, 3),
+            "eq_s": round(compared, 3),
+        }
+
+    created, memory = _measure(
+        lambda: RecordArray(_SlotsUser, (_SlotsUser(*row) for row in rows()))
+    )
+    results["record_array"] = {
+        "memory_mb": round(memory, 1),
+        "create_s": round(created, 3),
+    }
+
+    for name, stats in results.items():
+        print(f"{name}: {stats}")
+
+    return results
+
+
+if __name__ == "__main__":
+    # Выводит текущее время создания класса
+    print(MetaClassAttributes.created_at)
+
+    performance_comparison()
@@ -1,8 +1,9 @@
-from singletone_as_default_module import person
+from src.classes.singletone_as_default_module import person
 
-bob = person
-alice = person
+if __name__ == "__main__":
+    bob = person
+    alice = person
 
-print(bob is alice)  # Output: True - это один и тот же экземпляр
-print(bob.name)  # Output: Bob
-print(alice.name)  # Output: Bob
+    print(bob is alice)  # Output: True - это один и тот же экземпляр
+    print(bob.name)  # Output: Bob
+    print(alice.name)  # Output: Bob
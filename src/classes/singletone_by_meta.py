@@ -6,25 +6,85 @@
 3. через механизм импортов
 """
 
+import threading
+import time
+import typing
+import weakref
+
 
 # Реализация синглтона с помощью метакласса
 class SingletoneMeta(type):
     """
     Метакласс для создания одного экземпляра класса.
+
+    Экземпляр создается лениво при первом вызове класса. Создание защищено блокировкой класса
+    с двойной проверкой: несколько потоков, одновременно вызвавших класс впервые,
+    получат один экземпляр, и __init__ выполнится один раз. После создания экземпляра
+    вызов класса блокировку не берет.
     """
 
     # словарь объектов
     _instances = {}
 
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        cls._singletone_lock = threading.Lock()
+
     def __call__(cls, *args, **kwargs):
         """
         При вызове класса создает или возвращает уже созданный экземпляр.
         """
-        if cls not in cls._instances:
-            cls._instances[cls] = super().__call__(*args, **kwargs)
+
+        # Быстрый путь: экземпляр уже создан
+        instance = cls._instances.get(cls)
+        if instance is not None:
+            return instance
+
+        with cls._singletone_lock:
+            # Повторная проверка: экземпляр мог создать другой поток, пока этот ждал блокировку
+            if cls not in cls._instances:
+                cls._instances[cls] = super().__call__(*args, **kwargs)
         return cls._instances[cls]
 
 
+class MultitoneMeta(type):
+    """
+    Метакласс реестра экземпляров по аргументам (мультитон): вызов с теми же аргументами
+    возвращает тот же экземпляр, пока на него есть ссылки.
+
+    Реестр хранит слабые ссылки (weakref.WeakValueDictionary), поэтому экземпляры,
+    которые больше никому не нужны, удаляются сборщиком мусора, и реестр не растет бесконечно.
+    Аргументы должны быть хешируемыми, экземпляры - поддерживать слабые ссылки
+    (классы с __slots__ должны включать в них __weakref__).
+    """
+
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        cls._multitone_instances = weakref.WeakValueDictionary()
+        cls._multitone_lock = threading.Lock()
+
+    def __call__(cls, *args, **kwargs):
+        """
+        Возвращает экземпляр для аргументов, создавая его при первом вызове.
+        """
+
+        key = (args, frozenset(kwargs.items())) if kwargs else args
+
+        # Быстрый путь: экземпляр уже создан и жив
+        instance = cls._multitone_instances.get(key)
+        if instance is not None:
+            return instance
+
+        with cls._multitone_lock:
+            instance = cls._multitone_instances.get(key)
+
+            if instance is None:
+                instance = super().__call__(*args, **kwargs)
+                cls._multitone_instances[key] = instance
+
+        return instance
+
+
 class SingletoneClass(metaclass=SingletoneMeta):
     """
     Класс синглтона.
@@ -34,9 +94,122 @@ class SingletoneClass(metaclass=SingletoneMeta):
         self.name = name
 
 
-bob = SingletoneClass("Bob")
-alice = SingletoneClass("Alice")
+class _UnsafeSingletoneMeta(type):
+    """
+    Прежняя реализация SingletoneMeta без блокировки: для сравнения в бенчмарке.
+    """
+
+    _instances = {}
+
+    def __call__(cls, *args, **kwargs):
+        if cls not in cls._instances:
+            cls._instances[cls] = super().__call__(*args, **kwargs)
+        return cls._instances[cls]
+
+
+class _LockedSingletoneMeta(type):
+    """
+    Синглтон, который берет блокировку при каждом вызове: для сравнения в бенчмарке.
+    """
+
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __call__(cls, *args, **kwargs):
+        with cls._lock:
+            if cls not in cls._instances:
+                cls._instances[cls] = super().__call__(*args, **kwargs)
+            return cls._instances[cls]
+
+
+def _heavy_class(metaclass: type, constructions: list) -> type:
+    """
+    Создает класс с медленным __init__, который считает свои вызовы в constructions.
+    """
+
+    def __init__(self, name="service"):
+        constructions.append(name)
+        time.sleep(0.01)
+        self.name = name
+
+    return metaclass("Service", (), {"__init__": __init__})
+
+
+def _run_threads(
+    target: typing.Callable[[], typing.Any], threads: int, calls: int
+) -> float:
+    """
+    Запускает threads потоков, одновременно стартующих с барьера, по calls вызовов target.
+    Возвращает время в секундах.
+    """
+
+    barrier = threading.Barrier(threads + 1)
+
+    def run() -> None:
+        barrier.wait()
+        for _ in range(calls):
+            target()
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+
+    for worker in workers:
+        worker.start()
+
+    start = time.perf_counter()
+    barrier.wait()
+
+    for worker in workers:
+        worker.join()
+
+    return time.perf_counter() - start
+
+
+def performance_comparison(threads: int = 8, calls: int = 100_000) -> dict:
+    """
+    Конкурентный бенчмарк: threads потоков одновременно вызывают класс calls раз.
+    Для каждого метакласса выводит количество вызовов __init__ и различных экземпляров (должно быть 1)
+    и количество вызовов класса в секунду после создания экземпляра.
+
+    :param threads: Количество потоков.
+    :param calls: Количество вызовов класса на поток.
+    """
+
+    variants = {
+        "unsafe": _UnsafeSingletoneMeta,
+        "always_locked": _LockedSingletoneMeta,
+        "double_checked": SingletoneMeta,
+        "multitone": MultitoneMeta,
+    }
+    results = {}
+
+    for name, metaclass in variants.items():
+        constructions = []
+        service = _heavy_class(metaclass, constructions)
+
+        # Первый вызов из всех потоков одновременно: гонка при создании экземпляра.
+        # Ссылки удерживаются, чтобы сборщик мусора не удалил экземпляр мультитона
+        instances = []
+        _run_threads(lambda: instances.append(service()), threads, 1)
+
+        elapsed = _run_threads(service, threads, calls)
+        results[name] = {
+            "constructions": len(constructions),
+            "distinct_instances": len(set(map(id, instances))),
+            "calls_per_s": round(threads * calls / elapsed),
+        }
+
+    for name, stats in results.items():
+        print(f"{name}: {stats}")
+
+    return results
+
+
+if __name__ == "__main__":
+    bob = SingletoneClass("Bob")
+    alice = SingletoneClass("Alice")
+
+    print(bob is alice)  # Output: True - это один и тот же экземпляр
+    print(bob.name)  # Output: Bob
+    print(alice.name)  # Output: Bob
 
-print(bob is alice)  # Output: True - это один и тот же экземпляр
-print(bob.name)  # Output: Bob
-print(alice.name)  # Output: Bob
+    performance_comparison()
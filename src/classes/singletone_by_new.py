@@ -6,29 +6,46 @@
 3. через механизм импортов
 """
 
+import threading
+
 
 class SingletoneClass:
     """
     Класс синглтона.
+
+    Python вызывает __init__ после __new__ при каждом SingletoneClass(...), даже если __new__
+    вернул уже созданный экземпляр, поэтому инициализация выполняется только при первом вызове.
+    Создание и инициализация защищены блокировкой с двойной проверкой.
     """
 
     _instance = None
+    _initialized = False
+    _lock = threading.Lock()
 
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
         return cls._instance
 
     def __init__(self, name):
-        self.name = name
+        if self._initialized:
+            return
+
+        with self._lock:
+            if self._initialized:
+                return
+
+            self.name = name
+            self._initialized = True
 
 
-bob = SingletoneClass("Bob")
-alice = SingletoneClass("Alice")
-tedd = SingletoneClass("Tedd")
+if __name__ == "__main__":
+    bob = SingletoneClass("Bob")
+    alice = SingletoneClass("Alice")
+    tedd = SingletoneClass("Tedd")
 
-print(bob is alice)  # Output: True - это один и тот же экземпляр
-print(
-    bob.name
-)  # Output: Alice (значение изменилось, так как это тот же экземпляр и объект Alice был создан последним)
-print(alice.name)  # Output: Alice
+    print(bob is alice)  # Output: True - это один и тот же экземпляр
+    print(bob.name)  # Output: Bob (повторные вызовы не инициализируют экземпляр заново)
+    print(alice.name)  # Output: Bob
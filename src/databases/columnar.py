@@ -0,0 +1,1038 @@
+"""
+Колоночное хранилище для аналитических (OLAP) запросов по файлам результатов.
+
+ingest_jsonl преобразует JSONL (результаты fetch_urls {url: data}, отчеты LoopMonitor и т.п.)
+в каталог колонок: каждая колонка - отдельный файл с массивом фиксированного типа
+(int64, float64, bool, строки - коды int32 в словаре строк), схема - в _schema.json.
+
+ColumnarTable открывает колонки через mmap: запрос читает только нужные ему колонки,
+а фильтр, group by и агрегаты выполняются векторно (numpy) частями по chunk_rows строк,
+поэтому память не зависит от размера таблицы. Без numpy запрос выполняется построчно.
+
+Пример::
+
+    table = ingest_jsonl("results.jsonl", "results.columns", key_column="url")
+    table.query(
+        where=[("status", "==", 200)],
+        group_by="host",
+        aggregates={"requests": ("count", None), "avg_elapsed": ("mean", "elapsed")},
+    )
+"""
+
+import array
+import gzip
+import itertools
+import json
+import math
+import mmap
+import operator
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import typing
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SCHEMA_FILE = "_schema.json"
+
+# Тип колонки -> код типа array (он же dtype numpy). Значения null: float64 - NaN,
+# bool (int8: 1, 0) - -1, str (номер строки в словаре) - -1. В int64 null не бывает:
+# колонка с пропусками хранится как float64
+_TYPECODES = {"int64": "q", "float64": "d", "bool": "b", "str": "i"}
+
+# Типы numpy задаются явно: "q" в numpy - long long, отдельный от int64 (long) тип,
+# и ufunc.at для него теряет быстрый путь
+_DTYPES = {"int64": "int64", "float64": "float64", "bool": "int8", "str": "int32"}
+
+_OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": None,
+}
+
+_AGGREGATES = ("count", "sum", "mean", "min", "max")
+
+# Накопитель агрегата -> ufunc, которым он обновляется
+_UFUNCS = {"sum": "add", "min": "minimum", "max": "maximum"}
+
+
+def _value_type(value: typing.Any) -> str:
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int64"
+    if isinstance(value, float):
+        return "float64"
+    return "str"
+
+
+def _merge_types(current: typing.Optional[str], new: str, column: str) -> str:
+    """
+    Общий тип колонки: int64 и float64 дают float64, остальные сочетания недопустимы.
+    """
+
+    if current is None or current == new:
+        return new
+    if {current, new} == {"int64", "float64"}:
+        return "float64"
+    raise TypeError(f"Колонка {column!r}: смешаны типы {current} и {new}")
+
+
+class _ColumnWriter:
+    """
+    Дописывает значения колонки в файл, определяя и при необходимости расширяя ее тип.
+    """
+
+    def __init__(self, path: str, name: str, rows_before: int):
+        """
+        :param path: Файл колонки.
+        :param name: Имя колонки.
+        :param rows_before: Количество строк до появления колонки (для них значения null).
+        """
+
+        self.path = path
+        self.name = name
+        self.type: typing.Optional[str] = None
+        self.dictionary: dict[str, int] = {}
+        self._pending_nulls = rows_before
+        self._file: typing.Optional[typing.BinaryIO] = None
+
+    def _start(self, column_type: str) -> None:
+        # Пропуски перед первым значением int64 хранятся как NaN
+        if column_type == "int64" and self._pending_nulls:
+            column_type = "float64"
+
+        self.type = column_type
+        self._file = open(self.path, "wb")
+        self._write([None] * self._pending_nulls)
+
+    def _promote(self) -> None:
+        """
+        Переводит записанную колонку int64 в float64.
+        """
+
+        self._file.close()
+        promoted = self.path + ".tmp"
+
+        with open(self.path, "rb") as source, open(promoted, "wb") as target:
+            while chunk := source.read(1 << 23):
+                values = array.array("q")
+                values.frombytes(chunk)
+                array.array("d", values).tofile(target)
+
+        os.replace(promoted, self.path)
+        self.type = "float64"
+        self._file = open(self.path, "ab")
+
+    def _write(self, values: list) -> None:
+        if self.type == "int64":
+            encoded = values
+        elif self.type == "float64":
+            encoded = [math.nan if value is None else value for value in values]
+        elif self.type == "bool":
+            encoded = [-1 if value is None else value for value in values]
+        else:
+            dictionary = self.dictionary
+            encoded = [
+                -1 if value is None else dictionary.setdefault(value, len(dictionary))
+                for value in values
+            ]
+
+        array.array(_TYPECODES[self.type], encoded).tofile(self._file)
+
+    def write(self, values: list) -> None:
+        """
+        Дописывает значения, None - null.
+
+        :param values: Значения колонки для очередной части строк.
+        """
+
+        column_type = None
+        has_nulls = False
+
+        for value in values:
+            if value is None:
+                has_nulls = True
+            else:
+                column_type = _merge_types(column_type, _value_type(value), self.name)
+
+        if column_type is None and self.type is None:
+            self._pending_nulls += len(values)
+            return
+
+        if self.type is None:
+            self._start(column_type)
+
+        if column_type is not None:
+            column_type = _merge_types(self.type, column_type, self.name)
+        if self.type == "int64" and (column_type == "float64" or has_nulls):
+            self._promote()
+
+        self._write(values)
+
+    def close(self) -> dict:
+        """
+        Закрывает файл и возвращает описание колонки для схемы.
+        """
+
+        if self.type is None:
+            # Колонка из одних null
+            self._start("float64")
+
+        self._file.close()
+        return {"name": self.name, "type": self.type}
+
+
+def _parse_line(line: bytes) -> typing.Any:
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+def _flatten(record: dict, obj: typing.Any, prefix: str = "") -> None:
+    """
+    Раскладывает вложенные объекты в колонки "a.b", списки сохраняются строкой JSON.
+    """
+
+    for key, value in obj.items():
+        name = f"{prefix}{key}"
+
+        if isinstance(value, dict):
+            _flatten(record, value, f"{name}.")
+        elif isinstance(value, list):
+            record[name] = json.dumps(value, ensure_ascii=False)
+        else:
+            record[name] = value
+
+
+def _to_record(obj: typing.Any, key_column: typing.Optional[str]) -> dict:
+    """
+    Строка JSONL -> {колонка: значение}.
+
+    С key_column строка имеет вид {ключ: данные} (как у fetch_urls): ключ попадает в колонку
+    key_column, данные-объект раскладываются в колонки, другие данные - в колонку value.
+    """
+
+    record: dict[str, typing.Any] = {}
+
+    if key_column is not None:
+        if not isinstance(obj, dict) or len(obj) != 1:
+            raise ValueError(
+                f"Ожидался объект с одним ключом для {key_column!r}: {obj!r}"
+            )
+
+        key, obj = next(iter(obj.items()))
+        record[key_column] = key
+
+    if isinstance(obj, dict):
+        _flatten(record, obj)
+    else:
+        _flatten(record, {"value": obj})
+
+    return record
+
+
+def _open_input(path: str) -> typing.BinaryIO:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def _write_schema(
+    directory: str, rows: int, columns: list[dict], dictionaries: dict[str, list[str]]
+) -> None:
+    """
+    Записывает словари строковых колонок и схему таблицы.
+
+    :param directory: Каталог таблицы.
+    :param rows: Количество строк.
+    :param columns: Описания колонок {"name", "type", "file"} в порядке колонок.
+    :param dictionaries: {имя строковой колонки: строки в порядке кодов}.
+    """
+
+    for column in columns:
+        if column["name"] in dictionaries:
+            column["dictionary"] = column["file"].replace(".bin", ".dict.json")
+
+            with open(
+                os.path.join(directory, column["dictionary"]), "w", encoding="utf-8"
+            ) as file:
+                json.dump(dictionaries[column["name"]], file, ensure_ascii=False)
+
+    with open(os.path.join(directory, SCHEMA_FILE), "w", encoding="utf-8") as file:
+        json.dump(
+            {"rows": rows, "byteorder": sys.byteorder, "columns": columns},
+            file,
+            ensure_ascii=False,
+            indent=2,
+        )
+
+
+def ingest_jsonl(
+    source: str,
+    directory: str,
+    key_column: typing.Optional[str] = None,
+    fields: typing.Optional[typing.Collection[str]] = None,
+    chunk_rows: int = 100_000,
+) -> "ColumnarTable":
+    """
+    Преобразует JSONL-файл в колоночную таблицу.
+
+    Типы колонок определяются по значениям: int, float, bool, str; int с float или с пропусками
+    дают float64, остальные смешения типов - TypeError. Колонки, которых нет в части строк,
+    заполняются null.
+
+    :param source: JSONL-файл, .gz - сжатый gzip.
+    :param directory: Каталог таблицы, существующая таблица перезаписывается.
+    :param key_column: Имя колонки для ключа строк вида {ключ: данные}, например "url"
+        для результатов fetch_urls. None - строки являются записями.
+    :param fields: Колонки, которые нужно сохранить, None - все.
+    :param chunk_rows: Количество строк, разбираемых до записи в файлы колонок.
+    :return: Открытая таблица.
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    writers: dict[str, _ColumnWriter] = {}
+    rows = 0
+
+    with _open_input(source) as file:
+        while True:
+            lines = list(itertools.islice(file, chunk_rows))
+
+            if not lines:
+                break
+
+            records = [
+                _to_record(_parse_line(line), key_column)
+                for line in lines
+                if line.strip()
+            ]
+            names = dict.fromkeys(writers)
+
+            for record in records:
+                names.update(dict.fromkeys(record))
+
+            for name in names:
+                if fields is not None and name not in fields:
+                    continue
+
+                writer = writers.get(name)
+
+                if writer is None:
+                    path = os.path.join(directory, f"{len(writers)}.bin")
+                    writer = writers[name] = _ColumnWriter(path, name, rows)
+
+                writer.write([record.get(name) for record in records])
+
+            rows += len(records)
+
+    columns = []
+    dictionaries = {}
+
+    for writer in writers.values():
+        column = writer.close()
+        column["file"] = os.path.basename(writer.path)
+        columns.append(column)
+
+        if writer.type == "str":
+            dictionaries[writer.name] = list(writer.dictionary)
+
+    _write_schema(directory, rows, columns, dictionaries)
+    return ColumnarTable(directory)
+
+
+def _grow(arrays: dict[str, "np.ndarray"], size: int, dtype: typing.Any) -> None:
+    """
+    Расширяет накопители count, sum, min и max до size групп.
+    """
+
+    integer = np.issubdtype(dtype, np.integer)
+    fills = {
+        "count": 0,
+        "sum": 0,
+        "min": np.iinfo(dtype).max if integer else np.inf,
+        "max": np.iinfo(dtype).min if integer else -np.inf,
+    }
+
+    for key, fill in fills.items():
+        current = arrays.get(key)
+
+        if current is None or len(current) < size:
+            extended = np.full(size, fill, dtype=np.int64 if key == "count" else dtype)
+            if current is not None:
+                extended[: len(current)] = current
+            arrays[key] = extended
+
+
+def _not_null(values: "np.ndarray", column_type: str) -> typing.Optional["np.ndarray"]:
+    """
+    Маска значений не null, None - в колонке int64 null не бывает.
+    """
+
+    if column_type == "float64":
+        return ~np.isnan(values)
+    if column_type in ("bool", "str"):
+        return values >= 0
+    return None
+
+
+class ColumnarTable:
+    """
+    Колоночная таблица, созданная ingest_jsonl. Колонки отображаются в память при первом обращении.
+    """
+
+    def __init__(self, directory: str):
+        """
+        :param directory: Каталог таблицы.
+        """
+
+        self.directory = directory
+
+        with open(os.path.join(directory, SCHEMA_FILE), encoding="utf-8") as file:
+            schema = json.load(file)
+
+        if schema["byteorder"] != sys.byteorder:
+            raise ValueError(
+                f"Таблица записана с порядком байтов {schema['byteorder']}, "
+                f"текущий - {sys.byteorder}"
+            )
+
+        self.rows: int = schema["rows"]
+        self.columns: dict[str, dict] = {
+            column["name"]: column for column in schema["columns"]
+        }
+        self._arrays: dict[str, typing.Any] = {}
+        self._dictionaries: dict[str, list[str]] = {}
+        self._codes: dict[str, dict[str, int]] = {}
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def _info(self, name: str) -> dict:
+        try:
+            return self.columns[name]
+        except KeyError:
+            raise KeyError(f"Нет колонки {name!r}") from None
+
+    def column(self, name: str) -> typing.Any:
+        """
+        Значения колонки без декодирования: numpy.memmap или memoryview без numpy.
+        Строковые колонки возвращаются кодами словаря (см. dictionary).
+
+        :param name: Имя колонки.
+        """
+
+        values = self._arrays.get(name)
+
+        if values is None:
+            info = self._info(name)
+            typecode = _TYPECODES[info["type"]]
+            path = os.path.join(self.directory, info["file"])
+
+            if np is not None:
+                dtype = _DTYPES[info["type"]]
+                values = (
+                    np.memmap(path, dtype=dtype, mode="r", shape=(self.rows,))
+                    if self.rows
+                    else np.empty(0, dtype=dtype)
+                )
+            elif self.rows:
+                with open(path, "rb") as file:
+                    mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                values = memoryview(mapped).cast(typecode)
+            else:
+                values = memoryview(array.array(typecode))
+
+            self._arrays[name] = values
+
+        return values
+
+    def dictionary(self, name: str) -> list[str]:
+        """
+        Словарь строковой колонки: значение с кодом i - dictionary(name)[i].
+
+        :param name: Имя строковой колонки.
+        """
+
+        if name not in self._dictionaries:
+            info = self._info(name)
+
+            if info["type"] != "str":
+                raise TypeError(f"Колонка {name!r} не строковая")
+
+            with open(
+                os.path.join(self.directory, info["dictionary"]), encoding="utf-8"
+            ) as file:
+                self._dictionaries[name] = json.load(file)
+
+        return self._dictionaries[name]
+
+    def _decode(self, name: str, value: typing.Any) -> typing.Any:
+        """
+        Значение колонки в хранении -> значение Python (None для null).
+        """
+
+        column_type = self.columns[name]["type"]
+
+        if column_type == "str":
+            return None if value < 0 else self.dictionary(name)[value]
+        if column_type == "bool":
+            return None if value < 0 else bool(value)
+        if column_type == "float64" and value != value:
+            return None
+        return value
+
+    def _condition(self, name: str, op: str, value: typing.Any) -> tuple:
+        """
+        Переводит условие в условие над хранимыми значениями: строки заменяются кодами словаря.
+        """
+
+        if op not in _OPERATORS:
+            raise ValueError(f"Неизвестный оператор: {op}")
+
+        if self._info(name)["type"] != "str":
+            return name, op, set(value) if op == "in" else value
+
+        if op not in ("==", "!=", "in"):
+            raise ValueError(f"Для строковой колонки {name!r} допустимы ==, != и in")
+
+        if name not in self._codes:
+            self._codes[name] = {
+                string: code for code, string in enumerate(self.dictionary(name))
+            }
+
+        # Строки, которых нет в словаре, не совпадают ни с одним кодом
+        codes = self._codes[name]
+        if op == "in":
+            return name, op, {codes.get(item, -2) for item in value}
+        return name, op, codes.get(value, -2)
+
+    def _matches(
+        self, name: str, op: str, value: typing.Any, stored: typing.Any
+    ) -> bool:
+        """
+        Проверяет условие для одного хранимого значения, null не удовлетворяет условию.
+        """
+
+        if self._decode(name, stored) is None:
+            return False
+        if op == "in":
+            return stored in value
+        return _OPERATORS[op](stored, value)
+
+    def query(
+        self,
+        where: typing.Iterable[tuple[str, str, typing.Any]] = (),
+        group_by: typing.Optional[str] = None,
+        aggregates: typing.Optional[dict[str, tuple[str, typing.Optional[str]]]] = None,
+        chunk_rows: int = 1 << 22,
+    ) -> dict:
+        """
+        Фильтр, группировка и агрегаты за один проход по таблице.
+
+        :param where: Условия (колонка, оператор, значение), объединяемые через И.
+            Операторы: ==, !=, <, <=, >, >=, in (значение - коллекция).
+            Для строковых колонок - только ==, != и in. null не удовлетворяет ни одному
+            условию, в том числе != (как в SQL): ("b", "!=", True) не выбирает строки с null в b.
+        :param group_by: Колонка группировки, None - без группировки. null образует группу None.
+        :param aggregates: {имя результата: (функция, колонка)}, функции: count, sum, mean, min, max.
+            count с колонкой None считает строки, с колонкой - значения не null.
+            null в остальных функциях пропускаются. По умолчанию {"count": ("count", None)}.
+        :param chunk_rows: Количество строк, обрабатываемых за один векторный шаг.
+        :return: Без group_by - {имя: значение}, с group_by - {значение группы: {имя: значение}}.
+        """
+
+        aggregates = aggregates or {"count": ("count", None)}
+
+        for result_name, (function, name) in aggregates.items():
+            if function not in _AGGREGATES:
+                raise ValueError(f"Неизвестная агрегатная функция: {function}")
+            if name is None and function != "count":
+                raise ValueError(f"Для {function} ({result_name!r}) нужна колонка")
+            if name is not None and function != "count":
+                if self._info(name)["type"] == "str":
+                    raise TypeError(
+                        f"{function} не применим к строковой колонке {name!r}"
+                    )
+
+        if group_by is not None:
+            self._info(group_by)
+
+        conditions = [self._condition(*condition) for condition in where]
+
+        if np is None:
+            return self._query_python(conditions, group_by, aggregates)
+        return self._query_numpy(conditions, group_by, aggregates, chunk_rows)
+
+    @staticmethod
+    def _group_slots(
+        values: "np.ndarray", column_type: str, labels: list, slots: dict
+    ) -> "np.ndarray":
+        """
+        Номера групп для значений колонки группировки.
+
+        У строковых и bool колонок номер - код со сдвигом на 1 (0 - null), у числовых
+        номера выдаются новым значениям по мере появления и добавляются в labels и slots.
+        """
+
+        if column_type in ("str", "bool"):
+            return values.astype(np.intp) + 1
+
+        unique, inverse = np.unique(values, return_inverse=True)
+        lookup = np.empty(len(unique), dtype=np.intp)
+
+        for i, value in enumerate(unique.tolist()):
+            key = None if value != value else value
+            slot = slots.get(key)
+
+            if slot is None:
+                slot = slots[key] = len(labels)
+                labels.append(key)
+            lookup[i] = slot
+
+        return lookup[inverse]
+
+    def _query_numpy(
+        self,
+        conditions: list[tuple],
+        group_by: typing.Optional[str],
+        aggregates: dict[str, tuple[str, typing.Optional[str]]],
+        chunk_rows: int,
+    ) -> dict:
+        labels: list = [None]
+        slots: dict = {}
+        group_type = self.columns[group_by]["type"] if group_by is not None else None
+
+        if group_type == "str":
+            labels = [None, *self.dictionary(group_by)]
+        elif group_type == "bool":
+            labels = [None, False, True]
+        elif group_type is not None:
+            labels = []
+
+        # Накопители по колонкам агрегатов: количество не null и нужные запросу сумма, минимум
+        # и максимум по группам. Колонка None - количество строк в группе
+        state: dict[typing.Optional[str], dict[str, "np.ndarray"]] = {None: {}}
+        statistics: dict[typing.Optional[str], set[str]] = {None: set()}
+
+        for function, name in aggregates.values():
+            state[name] = {}
+            statistics.setdefault(name, set())
+
+            if function != "count":
+                statistics[name].add("sum" if function == "mean" else function)
+
+        for start in range(0, self.rows, chunk_rows):
+            stop = min(start + chunk_rows, self.rows)
+            mask = None
+
+            for name, op, value in conditions:
+                values = self.column(name)[start:stop]
+                matched = (
+                    np.isin(values, list(value))
+                    if op == "in"
+                    else _OPERATORS[op](values, value)
+                )
+
+                # Сравнение идет по хранимым значениям: null (-1, NaN) исключается явно
+                not_null = _not_null(values, self.columns[name]["type"])
+                if not_null is not None:
+                    matched &= not_null
+
+                mask = matched if mask is None else mask & matched
+
+            group = None
+            if group_by is not None:
+                values = self.column(group_by)[start:stop]
+                group = self._group_slots(
+                    values if mask is None else values[mask], group_type, labels, slots
+                )
+
+            for name, arrays in state.items():
+                values = valid = None
+
+                if name is not None:
+                    values = np.asarray(self.column(name)[start:stop])
+                    if mask is not None:
+                        values = values[mask]
+
+                    valid = _not_null(values, self.columns[name]["type"])
+                    if valid is not None:
+                        values = values[valid]
+
+                dtype = (
+                    np.float64
+                    if values is not None and values.dtype.kind == "f"
+                    else np.int64
+                )
+                _grow(arrays, len(labels), dtype)
+
+                if values is not None:
+                    # ufunc.at быстр, только если тип значений совпадает с типом накопителя
+                    values = values.astype(dtype, copy=False)
+
+                if group is None:
+                    arrays["count"][0] += (
+                        len(values)
+                        if values is not None
+                        else stop - start
+                        if mask is None
+                        else int(mask.sum())
+                    )
+
+                    if values is not None and len(values):
+                        for statistic in statistics[name]:
+                            ufunc = getattr(np, _UFUNCS[statistic])
+                            arrays[statistic][0] = ufunc(
+                                arrays[statistic][0], ufunc.reduce(values)
+                            )
+                    continue
+
+                selected = group if valid is None else group[valid]
+                arrays["count"] += np.bincount(selected, minlength=len(labels))
+
+                for statistic in statistics[name]:
+                    getattr(np, _UFUNCS[statistic]).at(
+                        arrays[statistic], selected, values
+                    )
+
+        for arrays in state.values():
+            _grow(arrays, len(labels), np.int64)
+
+        return self._results(labels, group_by, aggregates, state)
+
+    def _results(
+        self,
+        labels: list,
+        group_by: typing.Optional[str],
+        aggregates: dict[str, tuple[str, typing.Optional[str]]],
+        state: dict,
+    ) -> dict:
+        """
+        Собирает результат из накопителей.
+        """
+
+        rows = state[None]["count"]
+        results = {}
+
+        for slot, label in enumerate(labels):
+            values = {}
+
+            for result_name, (function, name) in aggregates.items():
+                arrays = state[name]
+                count = int(arrays["count"][slot])
+
+                if function == "count":
+                    value = count
+                elif not count:
+                    value = None
+                elif function == "mean":
+                    value = arrays["sum"][slot].item() / count
+                else:
+                    value = arrays[function][slot].item()
+
+                    if name is not None and self.columns[name]["type"] == "bool":
+                        value = value if function == "sum" else bool(value)
+
+                values[result_name] = value
+
+            if group_by is None:
+                return values
+            # Группа выводится, если в нее попала хотя бы одна строка
+            if rows[slot]:
+                results[label] = values
+
+        return results
+
+    def _query_python(
+        self,
+        conditions: list[tuple],
+        group_by: typing.Optional[str],
+        aggregates: dict[str, tuple[str, typing.Optional[str]]],
+    ) -> dict:
+        """
+        Построчное выполнение запроса без numpy.
+        """
+
+        columns = {name for _, name in aggregates.values()}
+        groups: dict[typing.Any, dict] = {}
+
+        for i in range(self.rows):
+            if not all(
+                self._matches(name, op, value, self.column(name)[i])
+                for name, op, value in conditions
+            ):
+                continue
+
+            label = (
+                self._decode(group_by, self.column(group_by)[i])
+                if group_by is not None
+                else None
+            )
+            group = groups.setdefault(label, {name: [] for name in columns})
+
+            for name in columns:
+                value = 1 if name is None else self._decode(name, self.column(name)[i])
+                if value is not None:
+                    group[name].append(value)
+
+        results = {}
+
+        for label, group in groups.items():
+            values = {}
+
+            for result_name, (function, name) in aggregates.items():
+                items = group[name]
+
+                if function == "count":
+                    values[result_name] = len(items)
+                elif not items:
+                    values[result_name] = None
+                elif function == "mean":
+                    values[result_name] = sum(items) / len(items)
+                else:
+                    values[result_name] = {"sum": sum, "min": min, "max": max}[
+                        function
+                    ](items)
+
+            results[label] = values
+
+        if group_by is None:
+            return results.get(
+                None,
+                {
+                    result_name: 0 if function == "count" else None
+                    for result_name, (function, _) in aggregates.items()
+                },
+            )
+        return results
+
+    def to_parquet(self, path: str, chunk_rows: int = 1 << 20) -> None:
+        """
+        Экспортирует таблицу в Parquet (строковые колонки - словарные), группами по chunk_rows строк.
+
+        :param path: Файл Parquet.
+        :param chunk_rows: Количество строк в группе строк Parquet.
+        """
+
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError(
+                "Для экспорта в Parquet установите пакет pyarrow"
+            ) from None
+
+        writer = None
+
+        try:
+            for start in range(0, self.rows, chunk_rows):
+                stop = min(start + chunk_rows, self.rows)
+                arrays = {}
+
+                for name, info in self.columns.items():
+                    values = np.asarray(self.column(name)[start:stop])
+
+                    if info["type"] == "str":
+                        arrays[name] = pyarrow.DictionaryArray.from_arrays(
+                            pyarrow.array(values, mask=values < 0),
+                            pyarrow.array(self.dictionary(name), pyarrow.string()),
+                        )
+                    elif info["type"] == "bool":
+                        arrays[name] = pyarrow.array(values == 1, mask=values < 0)
+                    else:
+                        arrays[name] = pyarrow.array(values)
+
+                batch = pyarrow.table(arrays)
+
+                if writer is None:
+                    writer = pyarrow.parquet.ParquetWriter(path, batch.schema)
+                writer.write_table(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+
+
+def _write_results_jsonl(path: str, rows: int, hosts: int) -> None:
+    """
+    Пишет JSONL в формате fetch_urls: {url: {"host", "status", "elapsed", "size"}}.
+    """
+
+    rnd = random.Random(0)
+    statuses = [200] * 8 + [404, 500]
+
+    with open(path, "w", encoding="utf-8") as file:
+        for i in range(rows):
+            host = f"host{i % hosts}.example.com"
+            data = {
+                "host": host,
+                "status": rnd.choice(statuses),
+                "elapsed": round(rnd.random(), 4),
+                "size": rnd.randrange(100, 100_000),
+            }
+            file.write(json.dumps({f"https://{host}/api/{i}": data}) + "\n")
+
+
+def _scan_jsonl(path: str) -> dict:
+    """
+    Тот же запрос, что в performance_comparison, построчным разбором JSONL.
+    """
+
+    groups: dict[str, list] = {}
+
+    with open(path, "rb") as file:
+        for line in file:
+            data = next(iter(_parse_line(line).values()))
+
+            if data["status"] == 200:
+                group = groups.setdefault(data["host"], [0, 0.0, 0])
+                group[0] += 1
+                group[1] += data["elapsed"]
+                group[2] = max(group[2], data["size"])
+
+    return {
+        host: {"requests": count, "avg_elapsed": total / count, "max_size": size}
+        for host, (count, total, size) in groups.items()
+    }
+
+
+def _write_synthetic(directory: str, rows: int, hosts: int) -> None:
+    """
+    Пишет таблицу с колонками host, status, elapsed, size напрямую из numpy частями по 2^22 строк.
+    """
+
+    generator = np.random.default_rng(0)
+    columns = [
+        {"name": "host", "type": "str", "file": "0.bin"},
+        {"name": "status", "type": "int64", "file": "1.bin"},
+        {"name": "elapsed", "type": "float64", "file": "2.bin"},
+        {"name": "size", "type": "int64", "file": "3.bin"},
+    ]
+    files = [open(os.path.join(directory, column["file"]), "wb") for column in columns]
+
+    try:
+        for start in range(0, rows, 1 << 22):
+            size = min(1 << 22, rows - start)
+            statuses = np.array([200, 404, 500])[
+                np.searchsorted([0.8, 0.9], generator.random(size), side="right")
+            ]
+
+            generator.integers(0, hosts, size, dtype=np.int32).tofile(files[0])
+            statuses.astype(np.int64).tofile(files[1])
+            generator.random(size).tofile(files[2])
+            generator.integers(100, 100_000, size, dtype=np.int64).tofile(files[3])
+    finally:
+        for file in files:
+            file.close()
+
+    _write_schema(
+        directory,
+        rows,
+        columns,
+        {"host": [f"host{i}.example.com" for i in range(hosts)]},
+    )
+
+
+def performance_comparison(
+    rows: int = 100_000_000, jsonl_rows: int = 1_000_000, hosts: int = 1000
+) -> dict:
+    """
+    Запрос "status == 200, group by host: count, mean(elapsed), max(size)":
+
+    - по JSONL из jsonl_rows строк: построчный разбор против ingest_jsonl + ColumnarTable.query;
+    - по синтетической колоночной таблице из rows строк (по умолчанию 10^8, около 2.8 ГБ
+      во временном каталоге).
+
+    Выводит время и строк в секунду.
+
+    :param rows: Количество строк синтетической таблицы.
+    :param jsonl_rows: Количество строк JSONL-файла.
+    :param hosts: Количество различных host.
+    """
+
+    if np is None:
+        raise RuntimeError("Для бенчмарка установите пакет numpy")
+
+    query = {
+        "where": [("status", "==", 200)],
+        "group_by": "host",
+        "aggregates": {
+            "requests": ("count", None),
+            "avg_elapsed": ("mean", "elapsed"),
+            "max_size": ("max", "size"),
+        },
+    }
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "results.jsonl")
+        _write_results_jsonl(source, jsonl_rows, hosts)
+
+        start = time.perf_counter()
+        expected = _scan_jsonl(source)
+        results["jsonl_scan_s"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        table = ingest_jsonl(
+            source, os.path.join(directory, "results"), key_column="url"
+        )
+        results["ingest_s"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        grouped = table.query(**query)
+        results["columnar_query_s"] = time.perf_counter() - start
+
+        assert grouped.keys() == expected.keys()
+        assert all(
+            grouped[host]["requests"] == stats["requests"]
+            and grouped[host]["max_size"] == stats["max_size"]
+            and math.isclose(grouped[host]["avg_elapsed"], stats["avg_elapsed"])
+            for host, stats in expected.items()
+        )
+
+        shutil.rmtree(table.directory)
+        del table, grouped
+
+        synthetic = os.path.join(directory, "synthetic")
+        os.makedirs(synthetic)
+        _write_synthetic(synthetic, rows, hosts)
+
+        table = ColumnarTable(synthetic)
+        start = time.perf_counter()
+        grouped = table.query(**query)
+        results["synthetic_query_s"] = time.perf_counter() - start
+        del table
+
+    print(f"JSONL, {jsonl_rows} строк:")
+    for name in ("jsonl_scan_s", "ingest_s", "columnar_query_s"):
+        print(
+            f"  {name}: {results[name]:.3f} с, "
+            f"{round(jsonl_rows / results[name])} строк/с"
+        )
+
+    print(
+        f"Колоночная таблица, {rows} строк, групп {len(grouped)}: "
+        f"{results['synthetic_query_s']:.2f} с, "
+        f"{round(rows / results['synthetic_query_s'])} строк/с"
+    )
+
+    return results
+
+
+if __name__ == "__main__":
+    performance_comparison()
@@ -0,0 +1,551 @@
+"""
+Слой доступа к данным для результатов загрузки URL: PostgreSQL (psycopg2) или SQLite.
+
+- create_engine_from_env - движок SQLAlchemy с настроенным пулом соединений;
+  адрес берется из переменных окружения DB_*, без них используется файл SQLite;
+- bulk_insert - пакетная вставка: COPY или execute_values для PostgreSQL,
+  executemany (insertmanyvalues SQLAlchemy) для остальных баз;
+- stream_rows - чтение больших выборок частями через серверный курсор (stream_results),
+  память не зависит от размера выборки;
+- AsyncDatabase - асинхронный вариант: операции выполняются в пуле потоков поверх того же пула
+  соединений (асинхронных драйверов в зависимостях проекта нет);
+- DatabaseWriter - приемник результатов для async_http_request_advanced.fetch_urls
+  (параметр writer_factory) вместо JSONL-файла.
+"""
+
+import asyncio
+import concurrent.futures
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+import typing
+
+import sqlalchemy
+from sqlalchemy.dialects.postgresql import JSONB
+
+from src.asyncio_tasks.crawl_checkpoint import Checkpoint
+
+metadata = sqlalchemy.MetaData()
+
+results_table = sqlalchemy.Table(
+    "results",
+    metadata,
+    sqlalchemy.Column(
+        "id",
+        sqlalchemy.BigInteger().with_variant(sqlalchemy.Integer, "sqlite"),
+        primary_key=True,
+    ),
+    sqlalchemy.Column("url", sqlalchemy.Text, nullable=False),
+    sqlalchemy.Column("data", sqlalchemy.JSON().with_variant(JSONB, "postgresql")),
+)
+
+
+def database_url() -> str:
+    """
+    Собирает адрес базы из переменных окружения.
+
+    DB_URL - полный адрес SQLAlchemy; иначе при заданном DB_HOST - PostgreSQL
+    из DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD; иначе файл SQLite DB_SQLITE_PATH.
+    """
+
+    if os.getenv("DB_URL"):
+        return os.environ["DB_URL"]
+
+    if os.getenv("DB_HOST"):
+        return sqlalchemy.URL.create(
+            "postgresql+psycopg2",
+            username=os.getenv("DB_USER", "postgres"),
+            password=os.getenv("DB_PASSWORD"),
+            host=os.environ["DB_HOST"],
+            port=int(os.getenv("DB_PORT", "5432")),
+            database=os.getenv("DB_NAME", "postgres"),
+        ).render_as_string(hide_password=False)
+
+    return f"sqlite:///{os.getenv('DB_SQLITE_PATH', 'results.db')}"
+
+
+def _sqlite_pragmas(
+    dbapi_connection: typing.Any, connection_record: typing.Any
+) -> None:
+    """
+    WAL и synchronous=NORMAL: запись не ждет fsync на каждую транзакцию, чтение не блокирует запись.
+    """
+
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def create_engine_from_env(
+    url: typing.Optional[str] = None,
+    pool_size: int = 10,
+    max_overflow: int = 10,
+    pool_timeout: float = 5.0,
+    pool_recycle: int = 1800,
+    echo: bool = False,
+) -> sqlalchemy.Engine:
+    """
+    Создает движок с пулом соединений.
+
+    :param url: Адрес базы, None - database_url().
+    :param pool_size: Количество постоянно открытых соединений.
+        pool_size, max_overflow и pool_timeout применяются только к QueuePool.
+    :param max_overflow: Сколько соединений можно открыть сверх pool_size при пиковой нагрузке.
+    :param pool_timeout: Сколько секунд ждать свободного соединения, прежде чем выдать ошибку.
+    :param pool_recycle: Через сколько секунд переоткрывать соединение
+        (раньше, чем его закроет сервер или балансировщик).
+    :param echo: Выводить SQL-запросы в лог.
+    """
+
+    url = sqlalchemy.make_url(url or database_url())
+    options: dict[str, typing.Any] = {
+        "pool_recycle": pool_recycle,
+        # Проверка соединения перед выдачей из пула: разорванные соединения переоткрываются
+        "pool_pre_ping": True,
+        "echo": echo,
+    }
+
+    # Размер пула настраивается только у QueuePool: SQLite в памяти использует
+    # SingletonThreadPool, который не принимает max_overflow и pool_timeout
+    if issubclass(url.get_dialect().get_pool_class(url), sqlalchemy.pool.QueuePool):
+        options.update(
+            pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout
+        )
+
+    if url.get_backend_name() == "postgresql":
+        # Строк в одном INSERT ... VALUES при executemany (insertmanyvalues)
+        options["insertmanyvalues_page_size"] = 5000
+
+    engine = sqlalchemy.create_engine(url, **options)
+
+    if engine.dialect.name == "sqlite":
+        sqlalchemy.event.listen(engine, "connect", _sqlite_pragmas)
+
+    return engine
+
+
+def create_tables(engine: sqlalchemy.Engine) -> None:
+    """
+    Создает таблицы, если их нет.
+
+    :param engine: Движок.
+    """
+
+    metadata.create_all(engine)
+
+
+def _json_columns(table: sqlalchemy.Table, columns: list[str]) -> list[bool]:
+    """
+    Отмечает колонки JSON/JSONB: их значения сериализуются по типу колонки, а не по типу значения -
+    ответ может быть любым JSON (строка, число, true), а не только объектом или списком.
+    """
+
+    return [isinstance(table.c[name].type, sqlalchemy.JSON) for name in columns]
+
+
+def _copy_rows(
+    connection: sqlalchemy.Connection, table: sqlalchemy.Table, rows: list[dict]
+) -> None:
+    """
+    COPY FROM STDIN в формате CSV: один поток данных вместо отдельного запроса на пачку строк.
+    """
+
+    columns = list(rows[0])
+    json_columns = _json_columns(table, columns)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    for row in rows:
+        # None пишется пустым полем без кавычек - в CSV-режиме COPY это NULL
+        writer.writerow(
+            json.dumps(value) if is_json and value is not None else value
+            for value, is_json in zip(row.values(), json_columns)
+        )
+
+    buffer.seek(0)
+    cursor = connection.connection.cursor()
+
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def _execute_values(
+    connection: sqlalchemy.Connection,
+    table: sqlalchemy.Table,
+    rows: list[dict],
+    page_size: int,
+) -> None:
+    """
+    psycopg2.extras.execute_values: INSERT ... VALUES с page_size строками в одном запросе.
+    """
+
+    from psycopg2.extras import Json, execute_values
+
+    columns = list(rows[0])
+    json_columns = _json_columns(table, columns)
+    cursor = connection.connection.cursor()
+
+    try:
+        execute_values(
+            cursor,
+            f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES %s",
+            [
+                tuple(
+                    Json(value) if is_json and value is not None else value
+                    for value, is_json in zip(row.values(), json_columns)
+                )
+                for row in rows
+            ],
+            page_size=page_size,
+        )
+    finally:
+        cursor.close()
+
+
+def bulk_insert(
+    engine: sqlalchemy.Engine,
+    rows: typing.Iterable[dict],
+    table: sqlalchemy.Table = results_table,
+    method: typing.Optional[str] = None,
+    batch_size: int = 10_000,
+) -> int:
+    """
+    Вставляет строки пачками по batch_size, каждая пачка - отдельная транзакция.
+
+    :param engine: Движок.
+    :param rows: Строки: {колонка: значение}, у всех строк одинаковые ключи.
+    :param table: Таблица.
+    :param method: "copy", "execute_values" (только PostgreSQL) или "executemany",
+        None - "copy" для PostgreSQL, "executemany" для остальных баз.
+    :param batch_size: Размер пачки.
+    :return: Количество вставленных строк.
+    """
+
+    postgres = engine.dialect.name == "postgresql"
+    method = method or ("copy" if postgres else "executemany")
+
+    if method in ("copy", "execute_values") and not postgres:
+        raise ValueError(f"Метод {method} поддерживается только для PostgreSQL")
+
+    inserted = 0
+    batch: list[dict] = []
+    iterator = iter(rows)
+
+    while True:
+        batch = [row for _, row in zip(range(batch_size), iterator)]
+
+        if not batch:
+            return inserted
+
+        with engine.begin() as connection:
+            if method == "copy":
+                _copy_rows(connection, table, batch)
+            elif method == "execute_values":
+                _execute_values(connection, table, batch, page_size=batch_size)
+            elif method == "executemany":
+                connection.execute(table.insert(), batch)
+            else:
+                raise ValueError(f"Неизвестный метод вставки: {method}")
+
+        inserted += len(batch)
+
+
+def stream_rows(
+    engine: sqlalchemy.Engine,
+    statement: sqlalchemy.Executable,
+    chunk_size: int = 10_000,
+) -> typing.Iterator[list[sqlalchemy.Row]]:
+    """
+    Читает результат запроса частями через серверный курсор (для PostgreSQL - именованный курсор
+    psycopg2), поэтому в памяти одновременно не больше chunk_size строк.
+
+    :param engine: Движок.
+    :param statement: Запрос, например sqlalchemy.select(results_table).
+    :param chunk_size: Количество строк в части.
+    :return: Итератор списков строк.
+    """
+
+    with engine.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True, yield_per=chunk_size
+        ).execute(statement)
+
+        for partition in result.partitions():
+            yield partition
+
+
+class AsyncDatabase:
+    """
+    Асинхронный интерфейс к движку: запросы выполняются в потоках, число одновременно
+    занятых соединений ограничено пулом движка.
+    """
+
+    def __init__(self, engine: sqlalchemy.Engine):
+        """
+        :param engine: Движок, например create_engine_from_env().
+        """
+
+        self.engine = engine
+
+    async def bulk_insert(
+        self,
+        rows: typing.Iterable[dict],
+        table: sqlalchemy.Table = results_table,
+        method: typing.Optional[str] = None,
+        batch_size: int = 10_000,
+    ) -> int:
+        """
+        Асинхронный bulk_insert.
+
+        :param rows: Строки: {колонка: значение}.
+        :param table: Таблица.
+        :param method: Метод вставки, см. bulk_insert.
+        :param batch_size: Размер пачки.
+        :return: Количество вставленных строк.
+        """
+
+        return await asyncio.to_thread(
+            bulk_insert, self.engine, rows, table, method, batch_size
+        )
+
+    async def stream_rows(
+        self, statement: sqlalchemy.Executable, chunk_size: int = 10_000
+    ) -> typing.AsyncIterator[list[sqlalchemy.Row]]:
+        """
+        Асинхронный stream_rows. Все части читаются в одном выделенном потоке,
+        так как курсор нельзя передавать между потоками.
+
+        :param statement: Запрос.
+        :param chunk_size: Количество строк в части.
+        """
+
+        loop = asyncio.get_running_loop()
+        chunks = stream_rows(self.engine, statement, chunk_size)
+
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            try:
+                while True:
+                    chunk = await loop.run_in_executor(executor, next, chunks, None)
+
+                    if chunk is None:
+                        return
+                    yield chunk
+            finally:
+                await loop.run_in_executor(executor, chunks.close)
+
+    async def dispose(self) -> None:
+        """
+        Закрывает соединения пула.
+        """
+
+        await asyncio.to_thread(self.engine.dispose)
+
+
+class DatabaseWriter:
+    """
+    Приемник результатов fetch_urls ({url: data} из очереди) в таблицу results.
+
+    Как BatchedWriter: результаты забираются из очереди пачками, вставляются одной транзакцией
+    в потоке по размеру пачки или по таймеру, а хеши URL записываются в контрольную точку
+    после вставки.
+
+    Использование::
+
+        engine = create_engine_from_env()
+        await fetch_urls(
+            "urls.txt",
+            "results",
+            writer_factory=lambda checkpoint: DatabaseWriter(engine, checkpoint=checkpoint),
+        )
+    """
+
+    def __init__(
+        self,
+        engine: sqlalchemy.Engine,
+        table: sqlalchemy.Table = results_table,
+        batch_size: int = 5000,
+        flush_interval: float = 1.0,
+        checkpoint: typing.Optional[Checkpoint] = None,
+    ):
+        """
+        :param engine: Движок.
+        :param table: Таблица с колонками url и data.
+        :param batch_size: Максимальное количество строк в одной транзакции.
+        :param flush_interval: Максимальное время (с) нахождения результата в буфере.
+        :param checkpoint: Контрольная точка для URL записанных результатов.
+        """
+
+        self.engine = engine
+        self.table = table
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.checkpoint = checkpoint
+
+        self.lines_written = 0
+        self._rows: list[dict] = []
+        self._last_flush = time.monotonic()
+
+    def _insert_sync(self, rows: list[dict], checkpoint_data: bytes) -> None:
+        if rows:
+            bulk_insert(self.engine, rows, self.table, batch_size=len(rows))
+        if self.checkpoint is not None:
+            self.checkpoint.write(checkpoint_data, False)
+
+    async def flush(self) -> None:
+        """
+        Вставляет накопленные строки одной транзакцией и записывает контрольную точку.
+        """
+
+        rows, self._rows = self._rows, []
+        checkpoint_data = self.checkpoint.drain() if self.checkpoint else b""
+
+        if rows or checkpoint_data:
+            await asyncio.to_thread(self._insert_sync, rows, checkpoint_data)
+            self.lines_written += len(rows)
+
+        self._last_flush = time.monotonic()
+
+    def _append(self, item: dict) -> None:
+        for url, data in item.items():
+            self._rows.append({"url": url, "data": data})
+
+            if self.checkpoint is not None:
+                self.checkpoint.add(url)
+
+    async def run(self, queue: asyncio.Queue) -> None:
+        """
+        Читает результаты из очереди и вставляет их в таблицу до получения None.
+
+        :param queue: Очередь результатов, None - сигнал завершения.
+        """
+
+        await asyncio.to_thread(self.table.create, self.engine, checkfirst=True)
+
+        try:
+            while True:
+                timeout = self.flush_interval - (time.monotonic() - self._last_flush)
+
+                try:
+                    item = await asyncio.wait_for(
+                        queue.get(), max(timeout, 0) if self._rows else None
+                    )
+                except asyncio.TimeoutError:
+                    await self.flush()
+                    continue
+
+                if item is None:
+                    return
+
+                self._append(item)
+
+                while len(self._rows) < self.batch_size and not queue.empty():
+                    item = queue.get_nowait()
+
+                    if item is None:
+                        return
+                    self._append(item)
+
+                if (
+                    len(self._rows) >= self.batch_size
+                    or time.monotonic() - self._last_flush >= self.flush_interval
+                ):
+                    await self.flush()
+        finally:
+            await self.flush()
+
+
+def _sample_rows(count: int) -> typing.Iterator[dict]:
+    for i in range(count):
+        yield {
+            "url": f"https://example.com/api/{i}",
+            "data": {"id": i, "name": f"item-{i}", "ok": True},
+        }
+
+
+def _rows_per_second(count: int, func: typing.Callable[[], typing.Any]) -> int:
+    start = time.perf_counter()
+    func()
+    return round(count / (time.perf_counter() - start))
+
+
+def performance_comparison(
+    rows: int = 100_000, url: typing.Optional[str] = None
+) -> dict:
+    """
+    Измеряет строк в секунду для вставки (по одной строке, executemany, для PostgreSQL -
+    execute_values и COPY) и чтения (fetchall и stream_rows).
+
+    Бенчмарк работает с отдельной таблицей results_benchmark, которая создается и удаляется
+    им самим; таблица results и переменные окружения DB_* не используются.
+
+    :param rows: Количество строк.
+    :param url: Адрес базы, None - временный файл SQLite.
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine_from_env(
+            url or f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        )
+        table = results_table.to_metadata(
+            sqlalchemy.MetaData(), name="results_benchmark"
+        )
+        results: dict[str, int] = {}
+
+        def reset() -> None:
+            table.drop(engine, checkfirst=True)
+            table.create(engine)
+
+        def row_by_row() -> None:
+            with engine.begin() as connection:
+                for row in _sample_rows(rows):
+                    connection.execute(table.insert(), row)
+
+        methods = ["executemany"]
+        if engine.dialect.name == "postgresql":
+            methods += ["execute_values", "copy"]
+
+        def fetch_all() -> None:
+            with engine.connect() as connection:
+                connection.execute(sqlalchemy.select(table)).fetchall()
+
+        def stream() -> None:
+            for _ in stream_rows(engine, sqlalchemy.select(table)):
+                pass
+
+        try:
+            reset()
+            results["insert_row_by_row"] = _rows_per_second(rows, row_by_row)
+
+            for method in methods:
+                reset()
+                results[f"insert_{method}"] = _rows_per_second(
+                    rows,
+                    lambda: bulk_insert(
+                        engine, _sample_rows(rows), table, method=method
+                    ),
+                )
+
+            results["read_fetchall"] = _rows_per_second(rows, fetch_all)
+            results["read_stream_rows"] = _rows_per_second(rows, stream)
+        finally:
+            table.drop(engine, checkfirst=True)
+            engine.dispose()
+
+    print(f"База: {engine.dialect.name}, строк: {rows}")
+    for name, rows_per_second in results.items():
+        print(f"{name}: {rows_per_second} строк/с")
+
+    return results
+
+
+if __name__ == "__main__":
+    performance_comparison()
@@ -0,0 +1,682 @@
+"""
+Минимальный HTTP/1.1-клиент на asyncio streams для заранее собранных запросов (например, raw_query.http).
+
+- load_request и build_request собирают байты запроса один раз, дальше они отправляются как есть;
+- HttpConnection держит keepalive-соединение и поддерживает конвейерную обработку (pipelining):
+  следующие запросы отправляются, не дожидаясь ответов на предыдущие, ответы приходят по порядку;
+- ResponseParser разбирает ответы по мере поступления данных: заголовки и тело ищутся
+  в общем буфере через memoryview без промежуточных срезов, тело с Content-Length копируется
+  из буфера один раз; поддерживаются также chunked и тело до закрытия соединения.
+
+Сжатие (Content-Encoding) не снимается: тело возвращается в том виде, в каком его отправил сервер.
+"""
+
+import asyncio
+import collections
+import multiprocessing
+import pathlib
+import re
+import time
+import typing
+
+RAW_QUERY_PATH = pathlib.Path(__file__).with_name("raw_query.http")
+
+# Максимальный размер стартовой строки и заголовков ответа
+MAX_HEADERS_SIZE = 64 * 1024
+
+
+class ProtocolError(Exception):
+    """
+    Ответ сервера не соответствует HTTP/1.1.
+    """
+
+
+def _serialize(
+    request_line: str, headers: list[tuple[str, str]], body: bytes = b""
+) -> bytes:
+    if body and not any(name.lower() == "content-length" for name, _ in headers):
+        headers = [*headers, ("Content-Length", str(len(body)))]
+
+    lines = [request_line, *(f"{name}: {value}" for name, value in headers)]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+def _override(
+    headers: list[tuple[str, str]],
+    overrides: typing.Optional[dict[str, typing.Optional[str]]],
+) -> list[tuple[str, str]]:
+    """
+    Заменяет заголовки на месте (без учета регистра имени), добавляет новые в конец,
+    значение None удаляет заголовок.
+    """
+
+    overrides = {
+        name.lower(): (name, value) for name, value in (overrides or {}).items()
+    }
+    result = []
+
+    for name, value in headers:
+        if name.lower() in overrides:
+            name, value = overrides.pop(name.lower())
+        if value is not None:
+            result.append((name, value))
+
+    result += [(name, value) for name, value in overrides.values() if value is not None]
+    return result
+
+
+def load_request(
+    path: typing.Union[str, pathlib.Path] = RAW_QUERY_PATH,
+    headers: typing.Optional[dict[str, typing.Optional[str]]] = None,
+) -> bytes:
+    """
+    Читает сырой HTTP-запрос из файла и приводит его к виду для отправки:
+    окончания строк CRLF, пустая строка после заголовков, Content-Length для тела.
+
+    :param path: Файл запроса, по умолчанию raw_query.http.
+    :param headers: Заголовки для замены, например {"Host": "127.0.0.1:8080",
+        "Connection": "keep-alive"}. None в значении удаляет заголовок.
+    :return: Байты запроса.
+    """
+
+    text = pathlib.Path(path).read_bytes()
+    head, *rest = re.split(rb"\r?\n\r?\n", text, maxsplit=1)
+    request_line, *lines = head.decode("latin-1").strip().splitlines()
+    parsed = []
+
+    for line in lines:
+        name, _, value = line.partition(":")
+        parsed.append((name.strip(), value.strip()))
+
+    return _serialize(
+        request_line.strip(), _override(parsed, headers), rest[0] if rest else b""
+    )
+
+
+def build_request(
+    method: str,
+    target: str,
+    host: str,
+    headers: typing.Optional[dict[str, typing.Optional[str]]] = None,
+    body: bytes = b"",
+) -> bytes:
+    """
+    Собирает HTTP/1.1-запрос.
+
+    :param method: Метод, например "GET".
+    :param target: Путь с параметрами, например "/api?id=1".
+    :param host: Значение заголовка Host.
+    :param headers: Дополнительные заголовки, None в значении удаляет заголовок.
+    :param body: Тело запроса.
+    :return: Байты запроса.
+    """
+
+    return _serialize(
+        f"{method} {target} HTTP/1.1", _override([("Host", host)], headers), body
+    )
+
+
+class Response:
+    """
+    Ответ HTTP: статус, заголовки (имена в нижнем регистре, повторы через ", ") и тело.
+    """
+
+    __slots__ = ("version", "status", "reason", "headers", "body")
+
+    def __init__(
+        self, version: str, status: int, reason: str, headers: dict[str, str], body
+    ):
+        self.version = version
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body: bytes = body
+
+    @property
+    def keep_alive(self) -> bool:
+        """
+        Можно ли отправлять следующие запросы в это же соединение.
+        """
+
+        connection = self.headers.get("connection", "").lower()
+
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    def __repr__(self) -> str:
+        return f"Response({self.status} {self.reason}, {len(self.body)} байт)"
+
+
+class ResponseParser:
+    """
+    Инкрементальный разбор потока ответов одного соединения.
+
+    Данные дописываются в буфер (feed), разобранная часть пропускается сдвигом смещения
+    и удаляется из начала буфера один раз за вызов feed. Для каждого отправленного запроса
+    нужно вызвать expect: ответы на HEAD не имеют тела, хотя и содержат Content-Length.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._offset = 0
+        self._expect_body: collections.deque[bool] = collections.deque()
+
+        # Ответ, тело которого еще не получено полностью
+        self._head: typing.Optional[tuple[str, int, str, dict[str, str]]] = None
+        self._length: typing.Optional[int] = None
+        self._chunked = False
+        self._chunks = bytearray()
+
+    def expect(self, has_body: bool = True) -> None:
+        """
+        Регистрирует отправленный запрос.
+
+        :param has_body: False для HEAD: ответ без тела.
+        """
+
+        self._expect_body.append(has_body)
+
+    def feed(self, data: bytes) -> list[Response]:
+        """
+        Добавляет полученные данные и возвращает полностью полученные ответы.
+
+        :param data: Данные из сокета.
+        """
+
+        self._buffer += data
+        responses = []
+
+        while (response := self._next()) is not None:
+            responses.append(response)
+
+        if self._offset:
+            del self._buffer[: self._offset]
+            self._offset = 0
+
+        return responses
+
+    def feed_eof(self) -> typing.Optional[Response]:
+        """
+        Сообщает о закрытии соединения: завершает ответ, тело которого читается до закрытия.
+        """
+
+        if self._head is not None and self._length is None and not self._chunked:
+            with memoryview(self._buffer) as view:
+                body = bytes(view[self._offset :])
+
+            self._buffer.clear()
+            self._offset = 0
+            return self._finish(body)
+
+        if self._head is not None or len(self._buffer) > self._offset:
+            raise ProtocolError("Соединение закрыто посреди ответа")
+        return None
+
+    def _finish(self, body: bytes) -> Response:
+        version, status, reason, headers = self._head
+        self._head = None
+        self._chunks = bytearray()
+        return Response(version, status, reason, headers, body)
+
+    def _parse_head(self, view: memoryview, end: int) -> None:
+        """
+        Разбирает стартовую строку и заголовки ответа, определяет способ чтения тела.
+        """
+
+        status_line, *lines = (
+            bytes(view[self._offset : end]).decode("latin-1").split("\r\n")
+        )
+        version, _, rest = status_line.partition(" ")
+        code, _, reason = rest.partition(" ")
+
+        if not version.startswith("HTTP/1.") or not code.isdigit():
+            raise ProtocolError(f"Некорректная стартовая строка: {status_line!r}")
+
+        headers: dict[str, str] = {}
+
+        for line in lines:
+            name, separator, value = line.partition(":")
+
+            if not separator:
+                raise ProtocolError(f"Некорректный заголовок: {line!r}")
+
+            name = name.strip().lower()
+            value = value.strip()
+            headers[name] = f"{headers[name]}, {value}" if name in headers else value
+
+        self._offset = end + 4
+        status = int(code)
+
+        # Промежуточный ответ (100 Continue): настоящий ответ на запрос будет следующим
+        if 100 <= status < 200:
+            return
+
+        self._head = (version, status, reason, headers)
+        self._chunked = False
+        self._length = None
+
+        if not self._expect_body.popleft() or status in (204, 304):
+            self._length = 0
+        elif "chunked" in headers.get("transfer-encoding", "").lower():
+            self._chunked = True
+        elif "content-length" in headers:
+            self._length = int(headers["content-length"])
+        else:
+            # Тело до закрытия соединения, соединение после ответа не переиспользуется
+            headers["connection"] = "close"
+
+    def _read_chunks(self, view: memoryview) -> bool:
+        """
+        Читает доступные части chunked-тела. Возвращает True, когда получена последняя часть.
+        """
+
+        buffer = self._buffer
+
+        while True:
+            line_end = buffer.find(b"\r\n", self._offset)
+
+            if line_end < 0:
+                return False
+
+            size_line = bytes(view[self._offset : line_end]).split(b";", 1)[0]
+
+            try:
+                size = int(size_line, 16)
+            except ValueError:
+                raise ProtocolError(
+                    f"Некорректный размер части: {size_line!r}"
+                ) from None
+
+            if not size:
+                # После последней части - необязательные трейлеры и пустая строка
+                if buffer.startswith(b"\r\n", line_end + 2):
+                    self._offset = line_end + 4
+                    return True
+
+                trailers_end = buffer.find(b"\r\n\r\n", line_end + 2)
+                if trailers_end < 0:
+                    return False
+
+                self._offset = trailers_end + 4
+                return True
+
+            data_start = line_end + 2
+            if len(buffer) < data_start + size + 2:
+                return False
+
+            self._chunks += view[data_start : data_start + size]
+            self._offset = data_start + size + 2
+
+    def _next(self) -> typing.Optional[Response]:
+        """
+        Разбирает следующий ответ из буфера, None - данных пока недостаточно.
+        """
+
+        with memoryview(self._buffer) as view:
+            while self._head is None:
+                end = self._buffer.find(b"\r\n\r\n", self._offset)
+
+                if end < 0:
+                    if len(self._buffer) - self._offset > MAX_HEADERS_SIZE:
+                        raise ProtocolError("Слишком большие заголовки ответа")
+                    return None
+
+                if not self._expect_body:
+                    raise ProtocolError("Ответ без отправленного запроса")
+                self._parse_head(view, end)
+
+            if self._chunked:
+                if not self._read_chunks(view):
+                    return None
+                return self._finish(bytes(self._chunks))
+
+            if self._length is None:
+                # Тело до закрытия соединения: завершается в feed_eof
+                return None
+
+            start = self._offset
+            if len(self._buffer) - start < self._length:
+                return None
+
+            self._offset = start + self._length
+            return self._finish(bytes(view[start : self._offset]))
+
+
+class HttpConnection:
+    """
+    Keepalive-соединение HTTP/1.1 с конвейерной отправкой запросов.
+
+    Соединение открывается при первом запросе и после ответа с Connection: close
+    закрывается; следующий запрос откроет новое.
+
+    Использование::
+
+        request = load_request(headers={"Host": "127.0.0.1:8080", "Connection": "keep-alive"})
+
+        async with HttpConnection("127.0.0.1", 8080) as connection:
+            response = await connection.request(request)
+            responses = await connection.pipeline([request] * 100)
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 80,
+        ssl: typing.Any = None,
+        read_size: int = 64 * 1024,
+    ):
+        """
+        :param host: Адрес сервера.
+        :param port: Порт сервера.
+        :param ssl: SSL-контекст или True для HTTPS.
+        :param read_size: Максимальный размер одного чтения из сокета.
+        """
+
+        self.host = host
+        self.port = port
+        self.ssl = ssl
+        self.read_size = read_size
+
+        self._reader: typing.Optional[asyncio.StreamReader] = None
+        self._writer: typing.Optional[asyncio.StreamWriter] = None
+        self._parser = ResponseParser()
+
+    async def connect(self) -> None:
+        """
+        Открывает соединение, если оно еще не открыто.
+        """
+
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(
+                self.host, self.port, ssl=self.ssl
+            )
+            self._parser = ResponseParser()
+
+    async def close(self) -> None:
+        """
+        Закрывает соединение.
+        """
+
+        writer, self._reader, self._writer = self._writer, None, None
+
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def __aenter__(self) -> "HttpConnection":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        await self.close()
+
+    async def request(self, request: bytes) -> Response:
+        """
+        Отправляет запрос и ждет ответ.
+
+        :param request: Байты запроса (load_request, build_request).
+        """
+
+        return (await self.pipeline([request]))[0]
+
+    async def pipeline(
+        self, requests: typing.Sequence[bytes], depth: int = 16
+    ) -> list[Response]:
+        """
+        Отправляет запросы конвейером: в соединении одновременно не больше depth запросов
+        без ответа, очередной запрос уходит по мере получения ответов.
+
+        Если сервер закрывает соединение (Connection: close) до ответа на все запросы,
+        выбрасывается ConnectionError: неотвеченные запросы нужно отправить заново.
+
+        :param requests: Байты запросов.
+        :param depth: Максимальное количество запросов без ответа.
+        :return: Ответы в порядке запросов.
+        """
+
+        if not requests:
+            return []
+
+        await self.connect()
+        reader, writer, parser = self._reader, self._writer, self._parser
+        responses: list[Response] = []
+        sent = 0
+
+        try:
+            while len(responses) < len(requests):
+                # Дополнение окна запросов одной записью в сокет
+                window = requests[sent : len(responses) + depth]
+
+                if window:
+                    for request in window:
+                        parser.expect(not request.startswith(b"HEAD "))
+                    writer.write(b"".join(window))
+                    sent += len(window)
+                    await writer.drain()
+
+                data = await reader.read(self.read_size)
+                received = parser.feed(data) if data else []
+
+                if not data:
+                    last = parser.feed_eof()
+                    if last is not None:
+                        received.append(last)
+
+                responses.extend(received)
+
+                # Первое чтение может не содержать целого ответа: received пуст
+                closed = not data or (received and not received[-1].keep_alive)
+
+                if closed and len(responses) < len(requests):
+                    raise ConnectionError(
+                        f"Сервер закрыл соединение, получено ответов: "
+                        f"{len(responses)} из {len(requests)}"
+                    )
+        except BaseException:
+            # Состояние конвейера неизвестно: соединение не переиспользуется
+            await self.close()
+            raise
+
+        if not responses[-1].keep_alive:
+            await self.close()
+
+        return responses
+
+
+_SMALL_BODY = b'{"ok": true}'
+_CHUNKS = (b'{"items": [', b"1, 2, 3", b"]}")
+# Тело больше размера одного чтения HttpConnection (64 КБ)
+_LARGE_BODY = b"x" * (256 * 1024)
+
+
+class _BenchmarkServer(asyncio.Protocol):
+    """
+    Сервер для бенчмарка: на каждый запрос отвечает маленьким JSON с Content-Length,
+    на /chunked - тем же телом частями, на /split - заголовками и через 50 мс
+    большим телом (ответ разбит между чтениями клиента). Конвейерные запросы обрабатываются пачкой,
+    /split отправляется отдельным запросом.
+    """
+
+    response = (
+        b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+        b"Content-Length: " + str(len(_SMALL_BODY)).encode() + b"\r\n\r\n" + _SMALL_BODY
+    )
+    chunked_response = (
+        b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+        b"Transfer-Encoding: chunked\r\n\r\n"
+        + b"".join(b"%x\r\n%s\r\n" % (len(chunk), chunk) for chunk in _CHUNKS)
+        + b"0\r\n\r\n"
+    )
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self.transport = transport
+        self.buffer = b""
+
+    def data_received(self, data: bytes) -> None:
+        *requests, self.buffer = (self.buffer + data).split(b"\r\n\r\n")
+
+        if requests and requests[0].startswith(b"GET /split "):
+            self.transport.write(
+                b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n" % len(_LARGE_BODY)
+            )
+            asyncio.get_running_loop().call_later(
+                0.05, self.transport.write, _LARGE_BODY
+            )
+            return
+
+        self.transport.write(
+            b"".join(
+                self.chunked_response
+                if request.startswith(b"GET /chunked ")
+                else self.response
+                for request in requests
+            )
+        )
+
+
+def _serve(port: int, ready: typing.Any) -> None:
+    async def main() -> None:
+        loop = asyncio.get_running_loop()
+        server = await loop.create_server(_BenchmarkServer, "127.0.0.1", port)
+        ready.set()
+
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+
+async def _raw_benchmark(
+    port: int, requests: int, depth: int
+) -> tuple[float, list[Response]]:
+    request = load_request(
+        headers={
+            "Host": f"127.0.0.1:{port}",
+            "Connection": "keep-alive",
+            "Accept-Encoding": None,
+        }
+    )
+
+    async with HttpConnection("127.0.0.1", port) as connection:
+        start = time.perf_counter()
+
+        if depth == 1:
+            responses = [await connection.request(request) for _ in range(requests)]
+        else:
+            responses = await connection.pipeline([request] * requests, depth)
+
+        return time.perf_counter() - start, responses
+
+
+async def _aiohttp_benchmark(port: int, requests: int, concurrency: int) -> float:
+    import aiohttp
+
+    url = f"http://127.0.0.1:{port}/"
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+
+        async def fetch(count: int) -> None:
+            for _ in range(count):
+                async with session.get(url) as response:
+                    await response.read()
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(fetch(requests // concurrency) for _ in range(concurrency))
+        )
+        return time.perf_counter() - start
+
+
+async def _httpx_benchmark(port: int, requests: int, concurrency: int) -> float:
+    import httpx
+
+    url = f"http://127.0.0.1:{port}/"
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits) as client:
+
+        async def fetch(count: int) -> None:
+            for _ in range(count):
+                await client.get(url)
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(fetch(requests // concurrency) for _ in range(concurrency))
+        )
+        return time.perf_counter() - start
+
+
+async def _compare(port: int, requests: int, concurrency: int, depth: int) -> dict:
+    results = {}
+
+    elapsed, responses = await _raw_benchmark(port, requests, 1)
+    assert all(response.body == _SMALL_BODY for response in responses)
+    results["raw_sequential"] = elapsed
+
+    elapsed, responses = await _raw_benchmark(port, requests, depth)
+    assert all(response.body == _SMALL_BODY for response in responses)
+    results[f"raw_pipeline_{depth}"] = elapsed
+
+    async with HttpConnection("127.0.0.1", port) as connection:
+        chunked = await connection.request(
+            build_request("GET", "/chunked", f"127.0.0.1:{port}")
+        )
+        split = await connection.request(
+            build_request("GET", "/split", f"127.0.0.1:{port}")
+        )
+    assert chunked.body == b"".join(_CHUNKS)
+    assert split.body == _LARGE_BODY
+
+    for name, benchmark in (
+        ("aiohttp", _aiohttp_benchmark),
+        ("httpx", _httpx_benchmark),
+    ):
+        results[f"{name}_sequential"] = await benchmark(port, requests, 1)
+        results[f"{name}_concurrent_{concurrency}"] = await benchmark(
+            port, requests, concurrency
+        )
+
+    return results
+
+
+def performance_comparison(
+    requests: int = 10_000, concurrency: int = 16, depth: int = 16, port: int = 8089
+) -> dict:
+    """
+    Запросов в секунду для маленьких ответов локального сервера (отдельный процесс):
+    HttpConnection последовательно и конвейером глубины depth против aiohttp и httpx
+    последовательно в одном соединении и concurrency задачами.
+
+    Запрос для HttpConnection - raw_query.http с Host локального сервера и Connection: keep-alive.
+
+    :param requests: Количество запросов для каждого клиента.
+    :param concurrency: Количество одновременных задач (соединений) aiohttp и httpx.
+    :param depth: Глубина конвейера HttpConnection.
+    :param port: Порт локального сервера.
+    """
+
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=_serve, args=(port, ready), daemon=True)
+    server.start()
+
+    try:
+        if not ready.wait(10):
+            raise RuntimeError("Сервер для бенчмарка не запустился")
+        results = asyncio.run(_compare(port, requests, concurrency, depth))
+    finally:
+        server.terminate()
+        server.join()
+
+    for name, elapsed in results.items():
+        print(f"{name}: {round(requests / elapsed)} запросов/с")
+
+    return results
+
+
+if __name__ == "__main__":
+    performance_comparison()
@@ -0,0 +1,258 @@
+"""
+Бенчмарк времени импорта модулей пакета src на основе python -X importtime.
+
+Каждый модуль импортируется в отдельном процессе repeats раз, берется минимальное время
+(первый запуск еще компилирует .pyc). Кроме времени, отчет показывает самые тяжелые прямые
+зависимости модуля и вывод в stdout при импорте - признак того, что модуль выполняет код при импорте.
+
+Время импорта сильно зависит от загрузки машины, поэтому вместе с модулями измеряется импорт
+эталонного модуля стандартной библиотеки (REFERENCE_MODULE), и при сравнении с базовой линией
+ее значения масштабируются на отношение текущего эталонного времени к сохраненному.
+
+Отслеживание регрессий::
+
+    python -m src.import_time --save-baseline import_times.json
+    python -m src.import_time --baseline import_times.json  # код выхода 1 при регрессии
+"""
+
+import argparse
+import json
+import pathlib
+import subprocess
+import sys
+import typing
+
+# Корень репозитория: каталог, из которого импортируется пакет src
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+# Эталон для поправки на скорость машины
+REFERENCE_MODULE = "asyncio"
+
+DEFAULT_MODULES = (
+    "src.asyncio_tasks.async_http_request",
+    "src.asyncio_tasks.async_http_request_advanced",
+    "src.asyncio_tasks.sharded_fetch",
+    "src.asyncio_tasks.task_groups",
+    "src.big_o.searching_item_in_ordered_list",
+    "src.classes.metaclass_attributes",
+    "src.classes.singletone_by_import",
+    "src.classes.singletone_by_meta",
+    "src.classes.singletone_by_new",
+    "src.redis_.distributed_lock",
+    "src.redis_.redis_queue",
+    "src.redis_.redis_stream_queue",
+    "src.threading_.threading_race_conditions",
+    "src.wsgi_asgi.asgi_wsgi_proxy_currency_rates",
+    "src.wsgi_asgi.http_client",
+)
+
+
+def parse_importtime(output: str) -> list[tuple[int, str, int, int]]:
+    """
+    Разбирает вывод -X importtime.
+
+    :param output: stderr процесса, запущенного с -X importtime.
+    :return: Список (глубина вложенности, модуль, собственное время мкс, суммарное время мкс)
+        в порядке вывода: зависимости модуля идут перед ним.
+    """
+
+    entries = []
+
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+
+    return entries
+
+
+def _import_once(module: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+
+def measure_import(module: str, repeats: int = 5, top: int = 3) -> dict:
+    """
+    Измеряет время импорта модуля в новом процессе.
+
+    :param module: Полное имя модуля (src.pkg.module).
+    :param repeats: Количество запусков, берется минимальное время.
+    :param top: Сколько самых тяжелых прямых зависимостей показать.
+    :return: {"ms", "heaviest": {модуль: мс}, "stdout_lines"} или {"error"}, если импорт не удался.
+    """
+
+    # Пакеты, которые импортируются перед модулем: src, src.pkg
+    parts = module.split(".")
+    chain = {".".join(parts[: i + 1]) for i in range(len(parts))}
+    best: typing.Optional[dict] = None
+
+    for _ in range(repeats):
+        process = _import_once(module)
+
+        if process.returncode != 0:
+            return {"error": process.stderr.strip().splitlines()[-1]}
+
+        entries = parse_importtime(process.stderr)
+        total = sum(
+            cum for depth, name, _, cum in entries if not depth and name in chain
+        )
+
+        if best is not None and total >= best["us"]:
+            continue
+
+        # Прямые зависимости модуля: записи глубины 1 между предыдущей записью глубины 0 и им
+        direct: dict[str, int] = {}
+        for depth, name, _, cum in entries:
+            if depth == 1:
+                direct[name] = cum
+            elif not depth:
+                if name == module:
+                    break
+                direct = {}
+
+        heaviest = sorted(direct.items(), key=lambda item: -item[1])[:top]
+        best = {
+            "us": total,
+            "heaviest": {name: round(us / 1000, 1) for name, us in heaviest},
+            "stdout_lines": len(process.stdout.splitlines()),
+        }
+
+    return {
+        "ms": round(best["us"] / 1000, 1),
+        "heaviest": best["heaviest"],
+        "stdout_lines": best["stdout_lines"],
+    }
+
+
+def find_regressions(
+    results: dict,
+    baseline: dict,
+    reference_ms: typing.Optional[float] = None,
+    tolerance: float = 0.25,
+    min_delta_ms: float = 10.0,
+) -> dict[str, tuple[float, float]]:
+    """
+    Находит модули, импорт которых стал медленнее базовой линии.
+
+    :param results: Результат performance_comparison.
+    :param baseline: Базовая линия: {"reference_ms": эталонное время, "modules": {модуль: мс}}.
+    :param reference_ms: Текущее время импорта REFERENCE_MODULE, None - без поправки.
+    :param tolerance: Допустимый относительный рост времени.
+    :param min_delta_ms: Минимальный абсолютный рост (мс), который считается регрессией.
+    :return: {модуль: (базовое время с поправкой, текущее время)}.
+    """
+
+    scale = 1.0
+
+    if reference_ms and baseline.get("reference_ms"):
+        scale = reference_ms / baseline["reference_ms"]
+
+    regressions = {}
+
+    for module, stats in results.items():
+        if "ms" not in stats or module not in baseline["modules"]:
+            continue
+
+        before, after = round(baseline["modules"][module] * scale, 1), stats["ms"]
+        if after > before * (1 + tolerance) and after - before > min_delta_ms:
+            regressions[module] = (before, after)
+
+    return regressions
+
+
+def performance_comparison(
+    modules: typing.Sequence[str] = DEFAULT_MODULES, repeats: int = 5
+) -> dict:
+    """
+    Измеряет и выводит время импорта модулей.
+
+    :param modules: Полные имена модулей.
+    :param repeats: Количество запусков на модуль.
+    :return: {модуль: результат measure_import}.
+    """
+
+    results = {module: measure_import(module, repeats) for module in modules}
+
+    for module, stats in results.items():
+        if "error" in stats:
+            print(f"{module}: ошибка импорта - {stats['error']}")
+            continue
+
+        side_effects = (
+            f", вывод при импорте: {stats['stdout_lines']} стр."
+            if stats["stdout_lines"]
+            else ""
+        )
+        print(
+            f"{module}: {stats['ms']} мс, тяжелые зависимости {stats['heaviest']}{side_effects}"
+        )
+
+    return results
+
+
+def main(argv: typing.Optional[typing.Sequence[str]] = None) -> int:
+    """
+    Точка входа командной строки.
+
+    :param argv: Аргументы командной строки, None - sys.argv.
+    :return: Код выхода: 1, если найдены регрессии относительно --baseline.
+    """
+
+    parser = argparse.ArgumentParser(description="Время импорта модулей пакета src")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", help="JSON с базовым временем импорта")
+    parser.add_argument(
+        "--save-baseline", help="Сохранить результаты как базовую линию"
+    )
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-delta-ms", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    results = performance_comparison(args.modules, args.repeats)
+    reference_ms = measure_import(REFERENCE_MODULE, args.repeats)["ms"]
+    print(f"Эталон {REFERENCE_MODULE}: {reference_ms} мс")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "reference_ms": reference_ms,
+                    "modules": {
+                        module: stats["ms"]
+                        for module, stats in results.items()
+                        if "ms" in stats
+                    },
+                },
+                file,
+                indent=2,
+                ensure_ascii=False,
+            )
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+
+        regressions = find_regressions(
+            results, baseline, reference_ms, args.tolerance, args.min_delta_ms
+        )
+
+        for module, (before, after) in regressions.items():
+            print(f"Регрессия {module}: {before} -> {after} мс")
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,10 +3,17 @@ import functools
 import threading
 import time
 
-import redis
 
-# Подключение к redis
-redis_client = redis.StrictRedis(host="localhost", port=6379, db=0)
+@functools.cache
+def get_redis_client():
+    """
+    Возвращает общий клиент redis.
+    Пакет redis импортируется и клиент создается при первом вызове, а не при импорте модуля.
+    """
+
+    import redis
+
+    return redis.StrictRedis(host="localhost", port=6379, db=0)
 
 
 def single(max_processing_time: datetime.timedelta):
@@ -25,7 +32,7 @@ def single(max_processing_time: datetime.timedelta):
         def wrapper(*args, **kwargs):
             # Создание уникального идентификатора блокировки и ключа для блокировки
             lock_name = f"lock:{func.__name__}"
-            lock = redis_client.lock(
+            lock = get_redis_client().lock(
                 lock_name, timeout=int(max_processing_time.total_seconds())
             )
 
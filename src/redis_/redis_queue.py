@@ -5,8 +5,6 @@
 import json
 from typing import Optional
 
-import redis
-
 
 class RedisQueue:
     """
@@ -14,6 +12,9 @@ class RedisQueue:
     """
 
     def __init__(self, host="localhost", port=6379, db=0, queue_name="redis_queue"):
+        # Импорт при создании очереди: модуль можно импортировать без затрат на пакет redis
+        import redis
+
         self.redis = redis.Redis(host=host, port=port, db=db)
         self.queue_name = queue_name
 
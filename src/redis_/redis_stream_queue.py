@@ -0,0 +1,288 @@
+"""
+Реализовать очередь с группами потребителей на основе Redis Streams.
+
+В отличие от RedisQueue (список + RPUSH/LPOP), поток хранит историю сообщений,
+у каждой группы потребителей свое смещение, а неподтвержденные сообщения
+упавших потребителей можно забрать через XAUTOCLAIM.
+"""
+
+import json
+import socket
+import uuid
+from typing import Optional
+
+
+class RedisStreamQueue:
+    """
+    Очередь на Redis Streams (XADD/XREADGROUP/XACK) с тем же API publish/consume, что и у RedisQueue.
+
+    Несколько экземпляров с одинаковым group_name и разными consumer_name делят сообщения между собой
+    без дублирования, разные группы получают каждое сообщение независимо.
+    """
+
+    def __init__(
+        self,
+        host="localhost",
+        port=6379,
+        db=0,
+        queue_name="redis_stream_queue",
+        group_name="workers",
+        consumer_name: Optional[str] = None,
+        maxlen: Optional[int] = 100_000,
+        block_ms: Optional[int] = None,
+    ):
+        """
+        :param queue_name: Имя потока (ключ Redis).
+        :param group_name: Имя группы потребителей.
+        :param consumer_name: Имя потребителя внутри группы. По умолчанию - hostname + случайный суффикс.
+        :param maxlen: Приблизительная максимальная длина потока (MAXLEN ~), None - без обрезки.
+        :param block_ms: Время ожидания новых сообщений в consume, None - не блокировать.
+        """
+
+        # Импорт при создании очереди: модуль можно импортировать без затрат на пакет redis
+        import redis
+
+        self.redis = redis.Redis(host=host, port=port, db=db)
+        self.queue_name = queue_name
+        self.group_name = group_name
+        self.consumer_name = (
+            consumer_name or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        )
+        self.maxlen = maxlen
+        self.block_ms = block_ms
+        self._create_group()
+
+    def _create_group(self) -> None:
+        """
+        Создает поток и группу потребителей, если их еще нет.
+        Группа читает поток с начала, чтобы не потерять сообщения, опубликованные до ее создания.
+        """
+
+        import redis
+
+        try:
+            self.redis.xgroup_create(
+                self.queue_name, self.group_name, id="0", mkstream=True
+            )
+        except redis.ResponseError as e:
+            # BUSYGROUP - группа уже создана другим потребителем
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    @staticmethod
+    def _decode(fields: dict) -> dict:
+        """
+        Десериализует тело сообщения из полей записи потока.
+
+        :param fields: Поля записи потока.
+        """
+
+        return json.loads(fields[b"data"])
+
+    def publish(self, msg: dict) -> None:
+        """
+        Отправляет сообщение в поток и обрезает его до maxlen (приблизительно, без лишних затрат).
+
+        :param msg: Сообщение в виде словаря
+        """
+
+        self.redis.xadd(
+            self.queue_name,
+            {"data": json.dumps(msg)},
+            maxlen=self.maxlen,
+            approximate=True,
+        )
+
+    def publish_batch(self, msgs: list[dict]) -> None:
+        """
+        Отправляет несколько сообщений за один round-trip через pipeline.
+
+        :param msgs: Список сообщений
+        """
+
+        with self.redis.pipeline(transaction=False) as pipe:
+            for msg in msgs:
+                pipe.xadd(
+                    self.queue_name,
+                    {"data": json.dumps(msg)},
+                    maxlen=self.maxlen,
+                    approximate=True,
+                )
+            pipe.execute()
+
+    def consume_batch(
+        self, count: int = 100, block_ms: Optional[int] = None
+    ) -> list[tuple[bytes, dict]]:
+        """
+        Читает до count новых сообщений группы. Сообщения остаются в pending-списке
+        потребителя, пока не будут подтверждены через ack.
+
+        :param count: Максимальное количество сообщений.
+        :param block_ms: Время ожидания новых сообщений, None - значение из конструктора.
+        :return: Список пар (id сообщения, сообщение).
+        """
+
+        block_ms = self.block_ms if block_ms is None else block_ms
+        response = self.redis.xreadgroup(
+            self.group_name,
+            self.consumer_name,
+            {self.queue_name: ">"},
+            count=count,
+            block=block_ms,
+        )
+
+        if not response:
+            return []
+
+        _, entries = response[0]
+        return [(msg_id, self._decode(fields)) for msg_id, fields in entries]
+
+    def ack(self, *msg_ids: bytes) -> int:
+        """
+        Подтверждает обработку сообщений и удаляет их из pending-списка.
+
+        :param msg_ids: Идентификаторы сообщений.
+        :return: Количество подтвержденных сообщений.
+        """
+
+        if not msg_ids:
+            return 0
+        return self.redis.xack(self.queue_name, self.group_name, *msg_ids)
+
+    def consume(self) -> Optional[dict]:
+        """
+        Получает, подтверждает и возвращает первое доступное сообщение группы.
+
+        Сообщение подтверждается сразу (at-most-once), как и LPOP в RedisQueue.
+        Для at-least-once используйте consume_batch + ack.
+        """
+
+        messages = self.consume_batch(count=1)
+
+        if not messages:
+            return None
+
+        msg_id, msg = messages[0]
+        self.ack(msg_id)
+        return msg
+
+    def claim_stale(
+        self, min_idle_ms: int = 60_000, count: int = 100
+    ) -> list[tuple[bytes, dict]]:
+        """
+        Забирает себе сообщения, которые другие потребители группы прочитали,
+        но не подтвердили дольше min_idle_ms (например, потребитель упал).
+        Сообщения, уже удаленные из потока через trim, не возвращаются и убираются из pending-списка.
+
+        :param min_idle_ms: Минимальное время простоя сообщения в pending-списке.
+        :param count: Максимальное количество сообщений.
+        :return: Список пар (id сообщения, сообщение) для повторной обработки.
+        """
+
+        claimed = []
+        start_id = "0-0"
+
+        while len(claimed) < count:
+            scan_start = start_id
+            response = self.redis.xautoclaim(
+                self.queue_name,
+                self.group_name,
+                self.consumer_name,
+                min_idle_time=min_idle_ms,
+                start_id=start_id,
+                count=count - len(claimed),
+            )
+            start_id, entries = response[0], response[1]
+
+            # Redis 7 сам убирает удаленные из потока (обрезанные) сообщения из pending-списка
+            # и возвращает их id третьим элементом. Redis 6.2 возвращает их как nil без id
+            # (redis-py: (None, None)) и оставляет в pending-списке.
+            if any(msg_id is None for msg_id, _ in entries):
+                self._ack_deleted(scan_start, start_id, len(entries))
+
+            claimed.extend(
+                (msg_id, self._decode(fields))
+                for msg_id, fields in entries
+                if msg_id is not None
+            )
+
+            if start_id in (b"0-0", "0-0"):
+                break
+
+        return claimed
+
+    def _ack_deleted(self, start_id, end_id, scanned: int) -> int:
+        """
+        Подтверждает pending-сообщения из просмотренного XAUTOCLAIM диапазона,
+        которых уже нет в потоке. Их id берутся из XPENDING, наличие проверяется через XRANGE.
+
+        :param start_id: Начало просмотренного диапазона (включительно).
+        :param end_id: Курсор XAUTOCLAIM - конец диапазона (не включительно), 0-0 - до конца.
+        :param scanned: Количество записей, которые вернул XAUTOCLAIM.
+        :return: Количество подтвержденных сообщений.
+        """
+
+        if isinstance(end_id, bytes):
+            end_id = end_id.decode()
+
+        pending = self.redis.xpending_range(
+            self.queue_name,
+            self.group_name,
+            min=start_id,
+            max="+" if end_id == "0-0" else f"({end_id}",
+            count=scanned * 10,
+        )
+        msg_ids = [entry["message_id"] for entry in pending]
+
+        pipe = self.redis.pipeline(transaction=False)
+
+        for msg_id in msg_ids:
+            pipe.xrange(self.queue_name, min=msg_id, max=msg_id)
+
+        deleted = [
+            msg_id for msg_id, found in zip(msg_ids, pipe.execute()) if not found
+        ]
+        return self.ack(*deleted) if deleted else 0
+
+    def pending_count(self) -> int:
+        """
+        Возвращает количество прочитанных, но не подтвержденных сообщений группы.
+        """
+
+        return self.redis.xpending(self.queue_name, self.group_name)["pending"]
+
+    def trim(self, maxlen: int) -> int:
+        """
+        Обрезает поток до maxlen последних сообщений.
+
+        :param maxlen: Количество сохраняемых сообщений.
+        :return: Количество удаленных сообщений.
+        """
+
+        return self.redis.xtrim(self.queue_name, maxlen=maxlen, approximate=False)
+
+
+if __name__ == "__main__":
+    q = RedisStreamQueue(queue_name="redis_stream_queue_demo", consumer_name="c1")
+    q.redis.delete(q.queue_name)
+    q._create_group()
+
+    q.publish({"a": 1})
+    q.publish({"b": 2})
+    q.publish_batch([{"c": 3}, {"d": 4}])
+
+    assert q.consume() == {"a": 1}
+
+    # Второй потребитель той же группы получает следующие сообщения, а не дубликаты
+    q2 = RedisStreamQueue(queue_name="redis_stream_queue_demo", consumer_name="c2")
+    batch = q2.consume_batch(count=2)
+    assert [msg for _, msg in batch] == [{"b": 2}, {"c": 3}]
+
+    # c2 "упал", не подтвердив сообщения - c1 забирает их себе
+    reclaimed = q.claim_stale(min_idle_ms=0)
+    assert [msg for _, msg in reclaimed] == [{"b": 2}, {"c": 3}]
+    q.ack(*(msg_id for msg_id, _ in reclaimed))
+
+    assert q.consume() == {"d": 4}
+    assert q.consume() is None
+    assert q.pending_count() == 0
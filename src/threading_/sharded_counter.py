@@ -0,0 +1,285 @@
+"""
+Счетчики для конкурентного увеличения из нескольких потоков и процессов.
+
+В threading_race_conditions общий counter теряет обновления: чтение и запись - разные операции,
+и между ними другой поток успевает записать свое значение. Корректные варианты:
+
+- LockedCounter - одно значение под threading.Lock: точный, но все потоки конкурируют за блокировку;
+- ShardedCounter - у каждого потока свой шард, который пишет только он сам,
+  значение - сумма шардов при чтении. Блокировка берется один раз на поток при создании шарда;
+- SharedMemoryCounter - ячейка на процесс в общей памяти multiprocessing.Array без блокировки,
+  значение - сумма ячеек.
+"""
+
+import ctypes
+import multiprocessing
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import sysconfig
+import threading
+import time
+import typing
+
+
+class LockedCounter:
+    """
+    Точный счетчик под блокировкой.
+    """
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def increment(self, n: int = 1) -> None:
+        """
+        Увеличивает счетчик.
+
+        :param n: Величина увеличения.
+        """
+
+        with self._lock:
+            self._value += n
+
+    @property
+    def value(self) -> int:
+        with self._lock:
+            return self._value
+
+
+class ShardedCounter:
+    """
+    Счетчик с шардом на поток: increment пишет только в шард текущего потока,
+    поэтому обновления не теряются и потоки не конкурируют за блокировку.
+
+    value складывает шарды; во время работы потоков это мгновенный снимок,
+    после их завершения (join) - точное значение. Шарды завершившихся потоков сохраняются.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: list[list[int]] = []
+        self._lock = threading.Lock()
+
+    def _new_shard(self) -> list[int]:
+        """
+        Создает и регистрирует шард текущего потока.
+        """
+
+        shard = [0]
+
+        with self._lock:
+            self._shards.append(shard)
+
+        self._local.shard = shard
+        return shard
+
+    def increment(self, n: int = 1) -> None:
+        """
+        Увеличивает шард текущего потока.
+
+        :param n: Величина увеличения.
+        """
+
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+
+        shard[0] += n
+
+    @property
+    def value(self) -> int:
+        with self._lock:
+            shards = list(self._shards)
+        return sum(shard[0] for shard in shards)
+
+
+class SharedMemoryCounter:
+    """
+    Счетчик для нескольких процессов: ячейка int64 на процесс в общей памяти без блокировки.
+    Каждый процесс увеличивает только свою ячейку (номер shard), value - сумма ячеек.
+
+    Объект передается в дочерние процессы аргументом multiprocessing.Process.
+    """
+
+    def __init__(self, shards: int):
+        """
+        :param shards: Количество ячеек (процессов, увеличивающих счетчик).
+        """
+
+        self._cells = multiprocessing.Array(ctypes.c_int64, shards, lock=False)
+
+    def increment(self, n: int = 1, shard: int = 0) -> None:
+        """
+        Увеличивает ячейку процесса.
+
+        :param n: Величина увеличения.
+        :param shard: Номер ячейки, у каждого процесса свой.
+        """
+
+        self._cells[shard] += n
+
+    @property
+    def value(self) -> int:
+        return sum(self._cells)
+
+
+class _UnsafeCounter:
+    """
+    Счетчик без синхронизации, как в threading_race_conditions: для сравнения в бенчмарке.
+    С GIL потери без искусственной задержки редки (поток переключается раз в 5 мс),
+    в сборке без GIL они видны сразу.
+    """
+
+    def __init__(self):
+        self.value = 0
+
+    def increment(self, n: int = 1) -> None:
+        self.value += n
+
+
+def _increment_many(counter: typing.Any, count: int) -> None:
+    for _ in range(count):
+        counter.increment()
+
+
+def _run_threads(counter: typing.Any, threads: int, count: int) -> float:
+    """
+    Запускает threads потоков по count увеличений и возвращает время в секундах.
+    """
+
+    workers = [
+        threading.Thread(target=_increment_many, args=(counter, count))
+        for _ in range(threads)
+    ]
+    start = time.perf_counter()
+
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    return time.perf_counter() - start
+
+
+def _increment_shared(counter: SharedMemoryCounter, shard: int, count: int) -> None:
+    for _ in range(count):
+        counter.increment(1, shard)
+
+
+def _increment_value(value: typing.Any, count: int) -> None:
+    for _ in range(count):
+        with value.get_lock():
+            value.value += 1
+
+
+def _run_processes(
+    target: typing.Callable, args: typing.Callable[[int], tuple], processes: int
+) -> float:
+    """
+    Запускает processes процессов с target(*args(i)) и возвращает время в секундах.
+    """
+
+    workers = [
+        multiprocessing.Process(target=target, args=args(i)) for i in range(processes)
+    ]
+    start = time.perf_counter()
+
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    return time.perf_counter() - start
+
+
+def _free_threaded_build() -> bool:
+    return bool(sysconfig.get_config_var("Py_GIL_DISABLED"))
+
+
+def performance_comparison(
+    thread_counts: typing.Sequence[int] = (1, 2, 4, 8),
+    process_counts: typing.Sequence[int] = (1, 2, 4),
+    increments: int = 200_000,
+    compare_free_threaded: bool = True,
+) -> dict:
+    """
+    Измеряет увеличения в секунду для счетчиков в зависимости от количества потоков (процессов)
+    и проверяет, что итоговое значение равно количеству увеличений.
+
+    Если текущий интерпретатор собран с GIL, а в PATH есть python3.13t (сборка без GIL),
+    тот же бенчмарк потоков запускается и в нем.
+
+    :param thread_counts: Количества потоков.
+    :param process_counts: Количества процессов для SharedMemoryCounter и multiprocessing.Value.
+    :param increments: Количество увеличений на поток (процесс).
+    :param compare_free_threaded: Запустить бенчмарк потоков в python3.13t, если он установлен.
+    """
+
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(
+        f"Python {sys.version.split()[0]}, сборка без GIL: {_free_threaded_build()}, "
+        f"GIL включен: {gil_enabled}, ядер: {os.cpu_count()}"
+    )
+
+    results: dict[str, dict[int, dict]] = {}
+    thread_counters = {
+        "unsafe": _UnsafeCounter,
+        "locked": LockedCounter,
+        "sharded": ShardedCounter,
+    }
+
+    for name, counter_class in thread_counters.items():
+        for threads in thread_counts:
+            counter = counter_class()
+            elapsed = _run_threads(counter, threads, increments)
+            results.setdefault(name, {})[threads] = {
+                "ops_per_s": round(threads * increments / elapsed),
+                "correct": counter.value == threads * increments,
+            }
+
+    for processes in process_counts:
+        shared = SharedMemoryCounter(processes)
+        elapsed = _run_processes(
+            _increment_shared, lambda i: (shared, i, increments), processes
+        )
+        results.setdefault("shared_memory", {})[processes] = {
+            "ops_per_s": round(processes * increments / elapsed),
+            "correct": shared.value == processes * increments,
+        }
+
+        value = multiprocessing.Value(ctypes.c_int64, 0)
+        elapsed = _run_processes(
+            _increment_value, lambda i: (value, increments), processes
+        )
+        results.setdefault("mp_value_locked", {})[processes] = {
+            "ops_per_s": round(processes * increments / elapsed),
+            "correct": value.value == processes * increments,
+        }
+
+    for name, stats in results.items():
+        print(f"{name}: {stats}")
+
+    free_threaded = shutil.which("python3.13t")
+
+    if compare_free_threaded and not _free_threaded_build() and free_threaded:
+        print(f"Запуск в {free_threaded}:")
+        subprocess.run(
+            [
+                free_threaded,
+                "-c",
+                "from src.threading_.sharded_counter import performance_comparison; "
+                f"performance_comparison({tuple(thread_counts)}, (), {increments}, False)",
+            ],
+            cwd=pathlib.Path(__file__).resolve().parents[2],
+            check=False,
+        )
+
+    return results
+
+
+if __name__ == "__main__":
+    performance_comparison()
@@ -1,56 +1,194 @@
+import contextlib
+import functools
 import logging
+import os
+import time
+import typing
 
-import httpx
-import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import APIRouter, FastAPI, HTTPException, Request, Response
 
-logging.basicConfig(level=logging.DEBUG)
+from src.wsgi_asgi.http_client import create_http_client, get_with_retries
+from src.wsgi_asgi.metrics import MetricsMiddleware, MetricsRegistry
+from src.wsgi_asgi.rates_cache import StaleWhileRevalidateCache, ttl_from_response
+from src.wsgi_asgi.rates_encoding import EncodedRatesCache, etag_matches
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
 
 
-@app.get("/{currency}")
-async def get_exchange_rate(currency: str) -> dict:
+def configure_logging(level: str = "INFO") -> None:
+    """
+    Настраивает логирование в формате key=value для запуска сервиса.
+    Вызывается из точки входа, а не при импорте, чтобы не менять конфигурацию логов чужого процесса.
+
+    :param level: Уровень логирования.
+    """
+
+    logging.basicConfig(
+        level=level,
+        format="ts=%(asctime)s level=%(levelname)s logger=%(name)s %(message)s",
+    )
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Создает общий пул соединений к upstream при старте приложения и закрывает его при остановке.
+    """
+
+    app.state.http_client = create_http_client()
+    try:
+        yield
+    finally:
+        await app.state.http_client.aclose()
+
+
+# Базовый URL API (используется v4, так как он бесплатный). Переопределяется для локальной заглушки.
+API_URL = os.getenv(
+    "EXCHANGE_RATE_API_URL", "https://api.exchangerate-api.com/v4/latest"
+)
+# Валюта, таблица которой запрашивается у upstream. Курсы к остальным базам вычисляются из нее.
+PIVOT_CURRENCY = os.getenv("EXCHANGE_RATE_PIVOT_CURRENCY", "USD")
+
+
+async def fetch_exchange_rate(app: FastAPI, currency: str) -> tuple[dict, float]:
+    """
+    Запрашивает курс валюты у upstream-API.
+
+    :param app: Приложение: общий HTTP-клиент и метрики берутся из app.state.
+    :param currency: Идентификатор валюты (например, USD, EUR, GBP).
+    :return: Кортеж (ответ API, TTL ответа в секундах).
+    """
+
+    import httpx
+
+    url = f"{API_URL}/{currency}"
+    upstream_latency = app.state.upstream_latency
+
+    start = time.perf_counter()
+
+    try:
+        response = await get_with_retries(app.state.http_client, url)
+    except httpx.RequestError as e:
+        upstream_latency.observe(time.perf_counter() - start, "error")
+        logger.error("event=upstream_error url=%s error=%r", url, e)
+        raise HTTPException(status_code=500, detail="Ошибка сети при запросе к API")
+
+    elapsed = time.perf_counter() - start
+    upstream_latency.observe(elapsed, str(response.status_code))
+    logger.debug(
+        "event=upstream_response url=%s status=%d duration=%.4f",
+        url,
+        response.status_code,
+        elapsed,
+    )
+
+    # Если запрос неудачный, выбрасываем исключение
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail="Ошибка получения обменного курса",
+        )
+
+    data = response.json()
+    return data, ttl_from_response(response.headers, data)
+
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def get_metrics(request: Request) -> Response:
+    """
+    Возвращает метрики приложения в текстовом формате Prometheus.
+    """
+
+    metrics = request.app.state.metrics
+    return Response(metrics.render(), media_type=metrics.content_type)
+
+
+@router.get("/{currency}")
+async def get_exchange_rate(currency: str, request: Request) -> Response:
     """
     Возвращает курс валюты в формате JSON.
 
+    Таблица upstream для PIVOT_CURRENCY кэшируется до следующего обновления курсов (см. rates_cache),
+    курсы к остальным базам вычисляются из нее. Тело ответа сериализуется один раз на версию таблицы,
+    повторные запросы с совпадающим If-None-Match получают 304.
+
     :param currency: Идентификатор валюты (например, USD, EUR, GBP).
     :return: Курс валюты в виде JSON-объекта.
     """
 
-    # URL API (используется v4, так как он бесплатный)
-    url = f"https://api.exchangerate-api.com/v4/latest/{currency}"
+    rates_cache = request.app.state.rates_cache
+    data = await rates_cache.get(PIVOT_CURRENCY)
+    encoded = request.app.state.encoded_rates.get(data, currency.upper())
+
+    if encoded is None:
+        raise HTTPException(status_code=404, detail="Неизвестная валюта")
+
+    headers = {
+        "ETag": encoded.etag,
+        "Cache-Control": f"public, max-age={int(rates_cache.ttl(PIVOT_CURRENCY))}",
+    }
+
+    if etag_matches(request.headers.get("if-none-match"), encoded.etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(encoded.body, media_type="application/json", headers=headers)
+
+
+def create_app() -> FastAPI:
+    """
+    Создает приложение прокси со своими метриками и кэшем курсов.
+    Приложение создается точкой входа, а не при импорте модуля::
+
+        uvicorn src.wsgi_asgi.asgi_wsgi_proxy_currency_rates:create_app --factory
+    """
+
+    app = FastAPI(lifespan=lifespan)
+    metrics = MetricsRegistry()
+    app.add_middleware(MetricsMiddleware, registry=metrics)
+
+    rates_cache = StaleWhileRevalidateCache(functools.partial(fetch_exchange_rate, app))
 
-    logging.debug(f"Requesting URL: {url}")
+    app.state.metrics = metrics
+    app.state.upstream_latency = metrics.histogram(
+        "upstream_request_duration_seconds",
+        "Время запроса к upstream-API",
+        labels=("status",),
+    )
+    app.state.rates_cache = rates_cache
+    app.state.encoded_rates = EncodedRatesCache()
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url)
-            logging.debug(f"Response status: {response.status_code}")
+    metrics.callback_gauge(
+        "rates_cache_hit_ratio",
+        "Доля запросов к кэшу курсов, обслуженных без ожидания upstream",
+        lambda: (
+            (rates_cache.hits + rates_cache.stale_hits)
+            / max(rates_cache.hits + rates_cache.stale_hits + rates_cache.misses, 1)
+        ),
+    )
+    metrics.callback_gauge(
+        "rates_cache_misses", "Промахи кэша курсов", lambda: rates_cache.misses
+    )
 
-            # Если запрос неудачный, выбрасываем исключение
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail="Ошибка получения обменного курса",
-                )
+    app.include_router(router)
+    return app
 
-            data = response.json()
 
-            return {
-                "provider": "www.exchangerate-api.com",
-                "WARNING_UPGRADE_TO_V6": "https://www.exchangerate-api.com/docs/free",
-                "terms": "https://www.exchangerate-api.com/terms",
-                "base": data["base"],
-                "date": data["date"],
-                "time_last_updated": data["time_last_updated"],
-                "rates": data["rates"],
-            }
+def __getattr__(name: str) -> typing.Any:
+    """
+    Создает приложение app при первом обращении, чтобы работал запуск `uvicorn module:app`.
+    """
 
-        except httpx.RequestError as e:
-            logging.error(f"Network error: {e}")
-            raise HTTPException(status_code=500, detail="Ошибка сети при запросе к API")
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="localhost", port=8001)
+    import uvicorn
+
+    configure_logging(os.getenv("LOG_LEVEL", "INFO"))
+    uvicorn.run(create_app(), host="localhost", port=8001)
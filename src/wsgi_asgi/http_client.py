@@ -0,0 +1,104 @@
+"""
+Общий httpx.AsyncClient для обращений прокси к upstream-API.
+
+Один клиент на все приложение держит пул keepalive-соединений, поэтому TCP+TLS handshake
+выполняется один раз на соединение, а не на каждый запрос.
+
+httpx импортируется при создании клиента и первом запросе, а не при импорте модуля.
+"""
+
+import asyncio
+import logging
+import random
+import typing
+
+if typing.TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# Статусы, при которых повтор запроса имеет смысл
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+
+def http2_available() -> bool:
+    """
+    Проверяет, установлен ли пакет h2, без которого httpx не умеет HTTP/2.
+    """
+
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_http_client(
+    max_connections: int = 100,
+    max_keepalive_connections: int = 20,
+    keepalive_expiry: float = 30.0,
+    timeout: float = 5.0,
+    connect_timeout: float = 2.0,
+) -> "httpx.AsyncClient":
+    """
+    Создает клиент с настроенным пулом соединений, таймаутами и HTTP/2 (если доступен).
+
+    :param max_connections: Максимальное число одновременных соединений.
+    :param max_keepalive_connections: Сколько простаивающих соединений держать открытыми.
+    :param keepalive_expiry: Через сколько секунд простоя закрывать соединение.
+    :param timeout: Таймаут чтения/записи/ожидания соединения из пула по умолчанию.
+    :param connect_timeout: Таймаут установки соединения.
+    """
+
+    import httpx
+
+    return httpx.AsyncClient(
+        http2=http2_available(),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+    )
+
+
+async def get_with_retries(
+    client: "httpx.AsyncClient",
+    url: str,
+    retries: int = 2,
+    backoff: float = 0.1,
+    timeout: typing.Optional[float] = None,
+) -> "httpx.Response":
+    """
+    Выполняет GET-запрос с повторами при сетевых ошибках и статусах из RETRY_STATUSES.
+    Пауза между попытками растет экспоненциально: backoff * 2**attempt со случайным разбросом.
+
+    :param client: Общий httpx.AsyncClient.
+    :param url: URL запроса.
+    :param retries: Количество повторов после первой попытки.
+    :param backoff: Базовая пауза между попытками в секундах.
+    :param timeout: Таймаут этого запроса, None - таймаут клиента.
+    :return: Ответ последней попытки.
+    """
+
+    import httpx
+
+    request_timeout = httpx.USE_CLIENT_DEFAULT if timeout is None else timeout
+
+    for attempt in range(retries):
+        try:
+            response = await client.get(url, timeout=request_timeout)
+        except httpx.TransportError as e:
+            logger.warning("Ошибка запроса %s (попытка %d): %r", url, attempt + 1, e)
+        else:
+            if response.status_code not in RETRY_STATUSES:
+                return response
+            logger.warning(
+                "Статус %d от %s (попытка %d)", response.status_code, url, attempt + 1
+            )
+
+        await asyncio.sleep(backoff * 2**attempt * random.uniform(0.5, 1.5))
+
+    # Последняя попытка: ее результат или ошибка возвращаются как есть
+    return await client.get(url, timeout=request_timeout)
@@ -0,0 +1,103 @@
+"""
+Нагрузочный тест обращений к upstream-API: новый httpx.AsyncClient на каждый запрос
+против общего клиента с пулом соединений.
+
+Запуск: uv run python -m src.wsgi_asgi.load_test
+"""
+
+import asyncio
+import statistics
+import time
+import typing
+
+import httpx
+
+from src.wsgi_asgi.http_client import create_http_client, get_with_retries
+from src.wsgi_asgi.upstream_stub import start_stub, stop_stub
+
+
+async def run_load(
+    request: typing.Callable[[], typing.Awaitable[typing.Any]],
+    total: int,
+    concurrency: int,
+) -> dict:
+    """
+    Выполняет total запросов с заданным числом одновременных и считает статистику задержек.
+
+    :param request: Корутина одного запроса.
+    :param total: Общее количество запросов.
+    :param concurrency: Количество одновременных запросов.
+    :return: Словарь с p50/p99 задержкой (мс) и запросами в секунду.
+    """
+
+    latencies = []
+    remaining = iter(range(total))
+
+    async def user() -> None:
+        for _ in remaining:
+            start = time.perf_counter()
+            await request()
+            latencies.append(time.perf_counter() - start)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start_time
+
+    percentiles = statistics.quantiles(latencies, n=100)
+
+    return {
+        "p50_ms": round(percentiles[49] * 1000, 2),
+        "p99_ms": round(percentiles[98] * 1000, 2),
+        "rps": round(total / elapsed, 1),
+    }
+
+
+async def performance_comparison(
+    url: str, total: int = 2000, concurrency: int = 50
+) -> dict:
+    """
+    Сравнивает клиента на каждый запрос (как было) с общим пулом соединений.
+
+    :param url: URL upstream-заглушки.
+    :param total: Количество запросов на каждый вариант.
+    :param concurrency: Количество одновременных запросов.
+    """
+
+    async def client_per_request() -> None:
+        async with httpx.AsyncClient() as client:
+            (await client.get(url)).raise_for_status()
+
+    pooled_client = create_http_client()
+
+    async def pooled() -> None:
+        (await get_with_retries(pooled_client, url)).raise_for_status()
+
+    results = {}
+
+    try:
+        for name, request in {
+            "client_per_request": client_per_request,
+            "pooled_client": pooled,
+        }.items():
+            results[name] = await run_load(request, total, concurrency)
+    finally:
+        await pooled_client.aclose()
+
+    print(f"{'вариант':<20}{'p50, мс':>10}{'p99, мс':>10}{'req/s':>10}")
+    for name, stats in results.items():
+        print(f"{name:<20}{stats['p50_ms']:>10}{stats['p99_ms']:>10}{stats['rps']:>10}")
+
+    return results
+
+
+async def main() -> None:
+    server, task = await start_stub(port=8765)
+
+    try:
+        await performance_comparison("http://127.0.0.1:8765/v4/latest/USD")
+    finally:
+        await stop_stub(server, task)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,330 @@
+"""
+Метрики ASGI-приложения в текстовом формате Prometheus без внешних зависимостей.
+
+- Counter, Gauge, Histogram с метками и CallbackGauge для значений, которые считаются при выгрузке.
+- MetricsMiddleware - чистый ASGI-middleware: задержка по шаблону маршрута, статусы, запросы в обработке.
+"""
+
+import bisect
+import time
+import typing
+
+# Границы корзин гистограммы задержек в секундах (как в prometheus_client по умолчанию)
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    """
+    Форматирует метки в виде {name="value",...}.
+
+    :param names: Имена меток.
+    :param values: Значения меток.
+    """
+
+    if not names:
+        return ""
+
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Metric:
+    """
+    Базовый класс метрики: имя, описание, имена меток и значения по наборам меток.
+    """
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = labels
+        self._values: dict[tuple[str, ...], typing.Any] = {}
+
+    def render(self) -> list[str]:
+        """
+        Возвращает строки метрики в текстовом формате Prometheus.
+        """
+
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+        for label_values, value in self._values.items():
+            lines.append(
+                f"{self.name}{_format_labels(self.label_names, label_values)} {value}"
+            )
+
+        return lines
+
+
+class Counter(Metric):
+    """
+    Монотонно растущий счетчик.
+    """
+
+    type_name = "counter"
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        """
+        Увеличивает счетчик для набора меток.
+
+        :param label_values: Значения меток в порядке label_names.
+        :param amount: Величина увеличения.
+        """
+
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    Значение, которое может как расти, так и уменьшаться.
+    """
+
+    type_name = "gauge"
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) - amount
+
+    def set(self, value: float, *label_values: str) -> None:
+        self._values[label_values] = value
+
+
+class CallbackGauge(Metric):
+    """
+    Gauge, значение которого вычисляется функцией в момент выгрузки метрик.
+    """
+
+    type_name = "gauge"
+
+    def __init__(
+        self, name: str, documentation: str, callback: typing.Callable[[], float]
+    ):
+        super().__init__(name, documentation)
+        self._callback = callback
+
+    def render(self) -> list[str]:
+        self._values[()] = self._callback()
+        return super().render()
+
+
+class Histogram(Metric):
+    """
+    Гистограмма с фиксированными границами корзин.
+
+    Для набора меток хранится список [счетчики корзин..., сумма, количество]:
+    observe - это bisect и три сложения, накопительные суммы считаются только при выгрузке.
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """
+        Учитывает наблюдение.
+
+        :param value: Наблюдаемое значение (например, задержка в секундах).
+        :param label_values: Значения меток в порядке label_names.
+        """
+
+        state = self._values.get(label_values)
+
+        if state is None:
+            # len(buckets) корзин + корзина +Inf + сумма + количество
+            state = self._values[label_values] = [0] * (len(self.buckets) + 3)
+
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        bucket_labels = self.label_names + ("le",)
+
+        for label_values, state in self._values.items():
+            cumulative = 0
+
+            for bound, count in zip(self.buckets + (float("inf"),), state):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(bucket_labels, label_values + (le,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {state[-2]}")
+            lines.append(f"{self.name}_count{labels} {state[-1]}")
+
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Набор метрик приложения, выгружаемый одним вызовом render.
+    """
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labels=()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(
+        self, name: str, documentation: str, labels=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def callback_gauge(
+        self, name: str, documentation: str, callback: typing.Callable[[], float]
+    ) -> CallbackGauge:
+        return self.register(CallbackGauge(name, documentation, callback))
+
+    def render(self) -> bytes:
+        """
+        Возвращает все метрики в текстовом формате Prometheus.
+        """
+
+        lines = []
+
+        for metric in self._metrics:
+            lines.extend(metric.render())
+
+        return ("\n".join(lines) + "\n").encode()
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware, измеряющий задержку и статус каждого HTTP-запроса.
+
+    Метка route - шаблон маршрута (например, /{currency}), а не фактический путь,
+    чтобы число временных рядов не росло с числом разных URL.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.latency = registry.histogram(
+            "http_request_duration_seconds",
+            "Время обработки HTTP-запроса",
+            labels=("method", "route", "status"),
+        )
+        self.in_flight = registry.gauge(
+            "http_requests_in_flight", "Количество запросов в обработке"
+        )
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        self.in_flight.inc()
+        start = time.perf_counter()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.in_flight.dec()
+            route = scope.get("route")
+            self.latency.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status,
+            )
+
+
+async def measure_overhead(requests: int = 50_000) -> dict:
+    """
+    Измеряет накладные расходы MetricsMiddleware на запрос, вызывая минимальное ASGI-приложение напрямую.
+
+    :param requests: Количество запросов на вариант.
+    :return: Время на запрос в микросекундах без middleware и с ним.
+    """
+
+    async def app(scope, receive, send) -> None:
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b""}
+
+    async def send(message) -> None:
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": "/USD"}
+    results = {}
+
+    for name, handler in {
+        "bare_app": app,
+        "with_metrics": MetricsMiddleware(app, MetricsRegistry()),
+    }.items():
+        start = time.perf_counter()
+
+        for _ in range(requests):
+            await handler(scope, receive, send)
+
+        results[name] = (time.perf_counter() - start) / requests * 1e6
+
+    for name, per_request in results.items():
+        print(f"{name}: {per_request:.2f} мкс/запрос")
+    print(f"Накладные расходы: {results['with_metrics'] - results['bare_app']:.2f} мкс")
+
+    return results
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    asyncio.run(measure_overhead())
@@ -0,0 +1,201 @@
+"""
+Кэш ответов upstream-API для прокси курсов валют.
+
+- TTL берется из заголовков ответа (Cache-Control: max-age, Expires) или из time_last_updated.
+- stale-while-revalidate: устаревшая запись отдается сразу, а обновление идет в фоне.
+- Объединение запросов: одновременные промахи по одному ключу делают один запрос к upstream.
+"""
+
+import asyncio
+import email.utils
+import logging
+import time
+import typing
+
+logger = logging.getLogger(__name__)
+
+# Минимальный TTL, чтобы не долбить upstream, если он уже должен был обновиться, но еще не обновился
+MIN_TTL = 60.0
+# Период обновления курсов у exchangerate-api.com (v4 обновляется раз в сутки)
+UPDATE_INTERVAL = 24 * 60 * 60.0
+# Сколько секунд после истечения TTL запись можно отдавать, обновляя ее в фоне
+STALE_TTL = 60 * 60.0
+
+
+def ttl_from_response(
+    headers: typing.Mapping[str, str], data: dict, now: typing.Optional[float] = None
+) -> float:
+    """
+    Вычисляет время жизни ответа upstream в секундах.
+
+    Приоритет: Cache-Control: max-age, затем Expires, затем time_next_update_unix
+    и time_last_updated + UPDATE_INTERVAL из тела ответа.
+
+    :param headers: Заголовки ответа upstream.
+    :param data: Тело ответа upstream.
+    :param now: Текущее unix-время (для тестов).
+    :return: TTL в секундах, не меньше MIN_TTL.
+    """
+
+    now = time.time() if now is None else now
+    cache_control = headers.get("cache-control", "")
+
+    for directive in cache_control.split(","):
+        name, _, value = directive.strip().partition("=")
+
+        if name.lower() in ("no-store", "no-cache"):
+            return MIN_TTL
+        if name.lower() == "max-age" and value.isdigit():
+            return max(float(value), MIN_TTL)
+
+    expires = headers.get("expires")
+
+    if expires:
+        try:
+            expires_at = email.utils.parsedate_to_datetime(expires).timestamp()
+            return max(expires_at - now, MIN_TTL)
+        except (TypeError, ValueError):
+            pass
+
+    if "time_next_update_unix" in data:
+        next_update = float(data["time_next_update_unix"])
+    elif "time_last_updated" in data:
+        next_update = float(data["time_last_updated"]) + UPDATE_INTERVAL
+    else:
+        return MIN_TTL
+
+    return min(max(next_update - now, MIN_TTL), UPDATE_INTERVAL)
+
+
+class CacheEntry:
+    """
+    Запись кэша: значение и моменты (time.monotonic), до которых оно свежее и допустимо устаревшее.
+    """
+
+    __slots__ = ("value", "fresh_until", "stale_until")
+
+    def __init__(self, value: typing.Any, ttl: float, stale_ttl: float):
+        now = time.monotonic()
+        self.value = value
+        self.fresh_until = now + ttl
+        self.stale_until = self.fresh_until + stale_ttl
+
+
+class StaleWhileRevalidateCache:
+    """
+    In-process кэш с фоновым обновлением устаревших записей и объединением одновременных промахов.
+
+    loader(key) - корутина, возвращающая кортеж (значение, TTL в секундах).
+    """
+
+    def __init__(
+        self,
+        loader: typing.Callable[[str], typing.Awaitable[tuple[typing.Any, float]]],
+        stale_ttl: float = STALE_TTL,
+    ):
+        """
+        :param loader: Корутина загрузки значения по ключу.
+        :param stale_ttl: Сколько секунд после истечения TTL запись можно отдавать, обновляя в фоне.
+        """
+
+        self._loader = loader
+        self._stale_ttl = stale_ttl
+        self._entries: dict[str, CacheEntry] = {}
+        # Незавершенные загрузки по ключу - общие для всех ожидающих
+        self._inflight: dict[str, asyncio.Task] = {}
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> typing.Any:
+        """
+        Возвращает значение по ключу: свежее - из кэша, устаревшее - из кэша с фоновым обновлением,
+        отсутствующее - после загрузки (одной на всех одновременных запрашивающих).
+
+        :param key: Ключ кэша.
+        """
+
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            now = time.monotonic()
+
+            if now < entry.fresh_until:
+                self.hits += 1
+                return entry.value
+
+            if now < entry.stale_until:
+                self.stale_hits += 1
+                self._load(key)
+                return entry.value
+
+        self.misses += 1
+        # shield: отмена одного клиента не должна отменять общую загрузку
+        return await asyncio.shield(self._load(key))
+
+    def _load(self, key: str) -> asyncio.Task:
+        """
+        Запускает загрузку ключа или возвращает уже идущую.
+
+        :param key: Ключ кэша.
+        """
+
+        task = self._inflight.get(key)
+
+        if task is None:
+            task = asyncio.create_task(self._refresh(key), name=f"cache-refresh:{key}")
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._on_done(key, t))
+
+        return task
+
+    async def _refresh(self, key: str) -> typing.Any:
+        """
+        Загружает значение через loader и сохраняет его в кэш.
+
+        :param key: Ключ кэша.
+        """
+
+        value, ttl = await self._loader(key)
+        self._entries[key] = CacheEntry(value, ttl, self._stale_ttl)
+        return value
+
+    def _on_done(self, key: str, task: asyncio.Task) -> None:
+        """
+        Снимает загрузку с учета. Ошибку фонового обновления только логирует:
+        устаревшее значение продолжает отдаваться до stale_until.
+
+        :param key: Ключ кэша.
+        :param task: Завершенная задача загрузки.
+        """
+
+        self._inflight.pop(key, None)
+
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Не удалось обновить кэш для %s: %r", key, task.exception())
+
+    def ttl(self, key: str) -> float:
+        """
+        Возвращает, сколько секунд запись еще остается свежей (0, если ее нет или она устарела).
+
+        :param key: Ключ кэша.
+        """
+
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return 0.0
+        return max(entry.fresh_until - time.monotonic(), 0.0)
+
+    def invalidate(self, key: typing.Optional[str] = None) -> None:
+        """
+        Удаляет запись по ключу или весь кэш.
+
+        :param key: Ключ кэша, None - очистить все.
+        """
+
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
@@ -0,0 +1,137 @@
+"""
+Готовые к отдаче тела ответов прокси курсов валют.
+
+Кросс-курсы для любой базовой валюты вычисляются из одной таблицы upstream,
+сериализуются один раз и хранятся в виде байтов вместе с ETag.
+"""
+
+import hashlib
+import json
+import typing
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj: typing.Any) -> bytes:
+    """
+    Сериализует объект в компактный JSON: через orjson, если он установлен, иначе через json.
+
+    :param obj: Сериализуемый объект.
+    """
+
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def round_significant(value: float, digits: int = 8) -> float:
+    """
+    Округляет число до digits значащих цифр: в отличие от round(value, n)
+    сохраняет относительную точность и у очень малых, и у очень больших курсов.
+
+    :param value: Число.
+    :param digits: Количество значащих цифр.
+    """
+
+    return float(f"{value:.{digits}g}")
+
+
+def cross_rates(data: dict, base: str) -> typing.Optional[dict]:
+    """
+    Пересчитывает таблицу курсов upstream на другую базовую валюту.
+
+    Курс X к базе B = rates[X] / rates[B], где rates - курсы к базе таблицы upstream.
+    Результат округляется до 8 значащих цифр, чтобы не тащить в ответ шум деления.
+
+    :param data: Ответ upstream (base, rates, ...).
+    :param base: Новая базовая валюта.
+    :return: Курсы к новой базе или None, если валюты нет в таблице.
+    """
+
+    rates = data["rates"]
+    base_rate = rates.get(base)
+
+    if base_rate is None:
+        return None
+    if base == data["base"]:
+        return rates
+
+    return {code: round_significant(rate / base_rate) for code, rate in rates.items()}
+
+
+class EncodedRates:
+    """
+    Сериализованный ответ для одной базовой валюты и его ETag.
+
+    source - таблица upstream, из которой он получен: при ее обновлении ответ пересобирается.
+    """
+
+    __slots__ = ("source", "body", "etag")
+
+    def __init__(self, source: dict, body: bytes):
+        self.source = source
+        self.body = body
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+class EncodedRatesCache:
+    """
+    Кэш сериализованных ответов по базовой валюте поверх одной таблицы upstream.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, EncodedRates] = {}
+
+    def get(self, data: dict, base: str) -> typing.Optional[EncodedRates]:
+        """
+        Возвращает сериализованный ответ для base, пересобирая его, если таблица upstream сменилась.
+
+        :param data: Текущая таблица upstream.
+        :param base: Базовая валюта ответа.
+        :return: Ответ или None, если валюты нет в таблице.
+        """
+
+        encoded = self._entries.get(base)
+
+        if encoded is not None and encoded.source is data:
+            return encoded
+
+        rates = cross_rates(data, base)
+
+        if rates is None:
+            return None
+
+        body = dumps(
+            {
+                "provider": "www.exchangerate-api.com",
+                "WARNING_UPGRADE_TO_V6": "https://www.exchangerate-api.com/docs/free",
+                "terms": "https://www.exchangerate-api.com/terms",
+                "base": base,
+                "date": data["date"],
+                "time_last_updated": data["time_last_updated"],
+                "rates": rates,
+            }
+        )
+        encoded = self._entries[base] = EncodedRates(data, body)
+        return encoded
+
+
+def etag_matches(if_none_match: typing.Optional[str], etag: str) -> bool:
+    """
+    Проверяет заголовок If-None-Match против ETag (слабое сравнение, как требует RFC 9110).
+
+    :param if_none_match: Значение заголовка If-None-Match.
+    :param etag: ETag текущего ответа.
+    """
+
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
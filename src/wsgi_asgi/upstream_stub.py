@@ -0,0 +1,82 @@
+"""
+Локальная заглушка exchangerate-api.com для нагрузочных тестов прокси курсов валют.
+
+Отдает ответы в формате v4 (/v4/latest/{currency}) без обращения в интернет.
+"""
+
+import asyncio
+import json
+import time
+
+import uvicorn
+from fastapi import FastAPI, Response
+
+CURRENCIES = ["USD", "EUR", "GBP", "JPY", "CNY", "RUB", "CHF", "CAD", "AUD", "SEK"]
+
+
+def create_stub_app(latency: float = 0.0) -> FastAPI:
+    """
+    Создает приложение-заглушку upstream-API.
+
+    :param latency: Искусственная задержка ответа в секундах.
+    """
+
+    stub = FastAPI()
+    stub.state.requests = 0
+
+    @stub.get("/v4/latest/{currency}")
+    async def latest(currency: str) -> Response:
+        stub.state.requests += 1
+
+        if latency:
+            await asyncio.sleep(latency)
+
+        base = currency.upper()
+        rates = {code: round(1 + i * 0.1, 4) for i, code in enumerate(CURRENCIES)}
+        rates[base] = 1
+        body = {
+            "base": base,
+            "date": time.strftime("%Y-%m-%d"),
+            "time_last_updated": int(time.time()),
+            "rates": rates,
+        }
+        return Response(json.dumps(body), media_type="application/json")
+
+    return stub
+
+
+async def start_stub(
+    host: str = "127.0.0.1", port: int = 8765, latency: float = 0.0
+) -> tuple[uvicorn.Server, asyncio.Task]:
+    """
+    Запускает заглушку в текущем цикле событий и ждет готовности сервера.
+
+    :param host: Адрес для прослушивания.
+    :param port: Порт для прослушивания.
+    :param latency: Искусственная задержка ответа в секундах.
+    :return: Кортеж (сервер, задача сервера) для stop_stub.
+    """
+
+    config = uvicorn.Config(
+        create_stub_app(latency), host=host, port=port, log_level="warning"
+    )
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve())
+
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    return server, task
+
+
+async def stop_stub(server: uvicorn.Server, task: asyncio.Task) -> None:
+    """
+    Останавливает заглушку, запущенную через start_stub.
+    """
+
+    server.should_exit = True
+    await task
+
+
+if __name__ == "__main__":
+    uvicorn.run(create_stub_app(), host="127.0.0.1", port=8765)